@@ -4,7 +4,8 @@ from tequila.hamiltonian import paulis, QubitHamiltonian, PauliString
 from tequila.objective import Objective, ExpectationValue, Variable, assign_variable, format_variable_dictionary
 
 from tequila.optimizers import INSTALLED_OPTIMIZERS, show_available_optimizers
-from tequila.optimizers import minimize, minimize_scipy, minimize_gd, optimizer_scipy
+from tequila.optimizers import minimize, minimize_scipy, minimize_gd, minimize_spsa, minimize_icans, minimize_rotosolve, \
+    minimize_multistart, optimizer_scipy
 
 from tequila.simulators.simulator_api import simulate, compile, compile_to_function, draw, pick_backend, \
     INSTALLED_SAMPLERS, \
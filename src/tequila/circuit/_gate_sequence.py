@@ -0,0 +1,207 @@
+"""
+Persistent gate sequences for QCircuit
+Internal module, do not use from the outside
+"""
+import typing
+
+
+class GateSequence:
+    """
+    Immutable sequence of gates with structural sharing (a height balanced rope)
+    Leaves hold small tuples of gates, inner nodes only hold references to their children
+    Concatenation, splitting and slicing create O(log(n)) new nodes and never copy the gates,
+    so the operands stay valid and can be reused afterwards
+    Gates are treated as immutable values, same as in QCircuit.__iadd__
+    """
+
+    __slots__ = ("_left", "_right", "_chunk", "_length", "_height", "_max_qubit")
+
+    # maximal number of gates which are merged into a single leaf
+    chunk_size = 64
+
+    def __init__(self, left: 'GateSequence' = None, right: 'GateSequence' = None, chunk: tuple = None):
+        if chunk is not None:
+            self._left = None
+            self._right = None
+            self._chunk = chunk
+            self._length = len(chunk)
+            self._height = 0
+            self._max_qubit = max([g.max_qubit for g in chunk], default=0)
+        else:
+            self._left = left
+            self._right = right
+            self._chunk = None
+            self._length = left._length + right._length
+            self._height = max(left._height, right._height) + 1
+            self._max_qubit = max(left._max_qubit, right._max_qubit)
+
+    @classmethod
+    def from_gates(cls, gates: typing.Iterable = None) -> 'GateSequence':
+        """
+        :param gates: iterable of gates
+        :return: balanced GateSequence holding the given gates
+        """
+        if gates is None:
+            return cls(chunk=tuple())
+        if isinstance(gates, GateSequence):
+            return gates
+        gates = tuple(gates)
+        if len(gates) <= cls.chunk_size:
+            return cls(chunk=gates)
+        leaves = [cls(chunk=gates[i:i + cls.chunk_size]) for i in range(0, len(gates), cls.chunk_size)]
+        return cls._build_balanced(leaves, 0, len(leaves))
+
+    @classmethod
+    def _build_balanced(cls, leaves, start, stop):
+        if stop - start == 1:
+            return leaves[start]
+        middle = (start + stop) // 2
+        return cls(left=cls._build_balanced(leaves, start, middle), right=cls._build_balanced(leaves, middle, stop))
+
+    def is_leaf(self) -> bool:
+        return self._chunk is not None
+
+    @property
+    def max_qubit(self) -> int:
+        """
+        :return: highest qubit index used by any of the gates (0 for empty sequences)
+        """
+        return self._max_qubit
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        # iterative traversal, the gates are yielded in circuit order
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._chunk is not None:
+                yield from node._chunk
+            else:
+                stack.append(node._right)
+                stack.append(node._left)
+
+    def to_list(self) -> list:
+        """
+        :return: the gates as new list (the list is not shared with the sequence)
+        """
+        return list(iter(self))
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("GateSequence index out of range")
+        node = self
+        while node._chunk is None:
+            if index < node._left._length:
+                node = node._left
+            else:
+                index -= node._left._length
+                node = node._right
+        return node._chunk[index]
+
+    def __add__(self, other: 'GateSequence') -> 'GateSequence':
+        return self.join(self, other)
+
+    @classmethod
+    def join(cls, left: 'GateSequence', right: 'GateSequence') -> 'GateSequence':
+        """
+        Concatenate two sequences, O(|height(left) - height(right)|) new nodes are created
+        """
+        if left._length == 0:
+            return right
+        if right._length == 0:
+            return left
+        if left._chunk is not None and right._chunk is not None \
+                and left._length + right._length <= cls.chunk_size:
+            return cls(chunk=left._chunk + right._chunk)
+        if left._height > right._height + 1:
+            return cls._join_right(left, right)
+        if right._height > left._height + 1:
+            return cls._join_left(left, right)
+        return cls(left=left, right=right)
+
+    @classmethod
+    def _join_right(cls, left, right):
+        # left is higher than right: descend along the right spine of left
+        inner = cls.join(left._right, right)
+        return cls._balance(left._left, inner)
+
+    @classmethod
+    def _join_left(cls, left, right):
+        # right is higher than left: descend along the left spine of right
+        inner = cls.join(left, right._left)
+        return cls._balance(inner, right._right)
+
+    @classmethod
+    def _balance(cls, left, right):
+        """
+        Create a node from two balanced subtrees whose heights differ by at most two
+        and restore the AVL property with single or double rotations
+        """
+        if left._height > right._height + 1:
+            if left._left._height >= left._right._height:
+                return cls(left=left._left, right=cls(left=left._right, right=right))
+            else:
+                pivot = left._right
+                return cls(left=cls(left=left._left, right=pivot._left), right=cls(left=pivot._right, right=right))
+        if right._height > left._height + 1:
+            if right._right._height >= right._left._height:
+                return cls(left=cls(left=left, right=right._left), right=right._right)
+            else:
+                pivot = right._left
+                return cls(left=cls(left=left, right=pivot._left), right=cls(left=pivot._right, right=right._right))
+        return cls(left=left, right=right)
+
+    def split(self, index: int) -> typing.Tuple['GateSequence', 'GateSequence']:
+        """
+        :param index: position of the split
+        :return: tuple of two sequences holding the gates before and after the given position
+        """
+        if index <= 0:
+            return GateSequence(chunk=tuple()), self
+        if index >= self._length:
+            return self, GateSequence(chunk=tuple())
+        if self._chunk is not None:
+            return GateSequence(chunk=self._chunk[:index]), GateSequence(chunk=self._chunk[index:])
+        left_length = self._left._length
+        if index == left_length:
+            return self._left, self._right
+        elif index < left_length:
+            a, b = self._left.split(index)
+            return a, self.join(b, self._right)
+        else:
+            a, b = self._right.split(index - left_length)
+            return self.join(self._left, a), b
+
+    def slice(self, start: int, stop: int) -> 'GateSequence':
+        """
+        :return: the gates in [start, stop) as new sequence (shares structure with this sequence)
+        """
+        head, _ = self.split(stop)
+        _, result = head.split(start)
+        return result
+
+    def splice(self, positions: typing.List[int], sequences: typing.List['GateSequence'],
+               replace: typing.List[bool]) -> 'GateSequence':
+        """
+        Replace or insert several sequences at once
+        The positions always refer to this sequence and need to be sorted in ascending order
+        :param positions: positions in this sequence
+        :param sequences: the sequences to place at the positions
+        :param replace: replace the gate at the position if True, insert before it otherwise
+        :return: the new sequence
+        """
+        result = GateSequence(chunk=tuple())
+        rest = self
+        consumed = 0
+        for pos, sequence, do_replace in zip(positions, sequences, replace):
+            head, rest = rest.split(pos - consumed)
+            consumed = pos
+            result = self.join(self.join(result, head), sequence)
+            if do_replace:
+                _, rest = rest.split(1)
+                consumed += 1
+        return self.join(result, rest)
@@ -1,4 +1,5 @@
 from tequila.circuit._gates_impl import QGateImpl
+from tequila.circuit._gate_sequence import GateSequence
 from tequila import TequilaException
 from tequila import BitNumbering
 import typing, copy
@@ -77,10 +78,43 @@ class QCircuit():
 
     @property
     def gates(self):
-        if self._gates is None:
-            return []
-        else:
-            return self._gates
+        return self._gates
+
+    @property
+    def _gates(self):
+        # the flat list is only built when needed
+        # circuits created by concatenation or replacement only hold a GateSequence
+        if self._gate_list is None:
+            self._gate_list = self._gate_sequence.to_list()
+        return self._gate_list
+
+    @_gates.setter
+    def _gates(self, other):
+        self._gate_list = other
+        self._gate_sequence = None
+        self._parameter_map = None
+
+    @property
+    def gate_sequence(self) -> GateSequence:
+        """
+        Returns
+        -------
+            The gates of the circuit as immutable GateSequence
+            Can be shared between circuits without copying the gates
+        """
+        if self._gate_sequence is None:
+            self._gate_sequence = GateSequence.from_gates(self._gate_list)
+        return self._gate_sequence
+
+    @property
+    def _parameter_map(self) -> dict:
+        if self._parameter_map_cache is None:
+            self._parameter_map_cache = self.make_parameter_map()
+        return self._parameter_map_cache
+
+    @_parameter_map.setter
+    def _parameter_map(self, other):
+        self._parameter_map_cache = other
 
     @property
     def numbering(self) -> BitNumbering:
@@ -109,15 +143,26 @@ class QCircuit():
     def __init__(self, gates=None, parameter_map=None):
         self._n_qubits = None
         self._min_n_qubits = 0
+        self._gate_sequence = None
         if gates is None:
-            self._gates = []
+            self._gate_list = []
+        elif isinstance(gates, GateSequence):
+            self._gate_list = None
+            self._gate_sequence = gates
         else:
-            self._gates = list(gates)
+            self._gate_list = list(gates)
 
-        if parameter_map is None:
-            self._parameter_map = self.make_parameter_map()
-        else:
-            self._parameter_map = parameter_map
+        # computed when accessed
+        self._parameter_map_cache = parameter_map
+
+    def __getstate__(self):
+        # only the plain list of gates is stored (and copied)
+        # the gate sequence and the parameter map are rebuilt when they are needed
+        state = dict(self.__dict__)
+        state["_gate_list"] = self._gates
+        state["_gate_sequence"] = None
+        state["_parameter_map_cache"] = None
+        return state
 
     def make_parameter_map(self) -> dict:
         """
@@ -186,28 +231,21 @@ class QCircuit():
         dataset = zip(positions, circuits, replace)
         dataset = sorted(dataset, key=lambda x: x[0])
 
-        offset = 0
-        new_gatelist = self.gates
+        sequences = []
         for idx, circuit, do_replace in dataset:
-
             # failsafe
-            if hasattr(circuit, "gates"):
-                gatelist = circuit.gates
+            if hasattr(circuit, "gate_sequence"):
+                sequences.append(circuit.gate_sequence)
             elif isinstance(circuit, typing.Iterable):
-                gatelist = circuit
+                sequences.append(GateSequence.from_gates(circuit))
             else:
-                gatelist = [circuit]
+                sequences.append(GateSequence.from_gates([circuit]))
 
-            pos = idx + offset
-            if do_replace:
-                new_gatelist = new_gatelist[:pos] + gatelist + new_gatelist[pos + 1:]
-                offset += len(gatelist) - 1
-            else:
-                new_gatelist = new_gatelist[:pos] + gatelist + new_gatelist[pos:]
-                offset += len(gatelist)
+        positions, _, replace = zip(*dataset) if len(dataset) > 0 else ([], [], [])
+        new_sequence = self.gate_sequence.splice(positions=positions, sequences=sequences, replace=replace)
 
-        result = QCircuit(gates=new_gatelist)
-        result.n_qubits = max(result.n_qubits, self.n_qubits)
+        result = QCircuit(gates=new_sequence)
+        result._min_n_qubits = max(self._min_n_qubits, self.n_qubits)
         return result
 
     def insert_gates(self, positions, gates):
@@ -240,10 +278,7 @@ class QCircuit():
         """
         :return: Maximum index this circuit touches
         """
-        qmax = 0
-        for g in self.gates:
-            qmax = max(qmax, g.max_qubit)
-        return qmax
+        return self.gate_sequence.max_qubit
 
     def is_fully_parametrized(self):
         for gate in self.gates:
@@ -281,17 +316,20 @@ class QCircuit():
         other = self.wrap_gate(gate=other)
 
         offset = len(self.gates)
-        for k, v in other._parameter_map.items():
-            self._parameter_map[k] += [(x[0] + offset, x[1]) for x in v]
+        if self._parameter_map_cache is not None:
+            for k, v in other._parameter_map.items():
+                self._parameter_map_cache[k] += [(x[0] + offset, x[1]) for x in v]
 
-        self._gates += other.gates
+        self._gate_list += other.gates
+        self._gate_sequence = None
         self._min_n_qubits = max(self._min_n_qubits, other._min_n_qubits)
 
         return self
 
     def __add__(self, other):
-        gates = [g.copy() for g in (self.gates + other.gates)]
-        result = QCircuit(gates=gates)
+        # gates are shared and not copied (same as in __iadd__)
+        # the GateSequence makes this O(log(n)) for long circuits
+        result = QCircuit(gates=self.gate_sequence + other.gate_sequence)
         result._min_n_qubits = max(self._min_n_qubits, other._min_n_qubits)
         return result
 
@@ -112,9 +112,11 @@ class Compiler:
             gatelist = enumerate(abstract_circuit.gates)
         else:
             # check & compile only gates which depend on variables
-            gatelist = []
+            # gates which depend on several of the variables are only compiled once
+            gatelist = {}
             for variable in variables:
-                gatelist += abstract_circuit._parameter_map[variable]
+                gatelist.update(abstract_circuit._parameter_map[variable])
+            gatelist = sorted(gatelist.items(), key=lambda x: x[0])
 
         compiled_gates = []
         for idx, gate in gatelist:
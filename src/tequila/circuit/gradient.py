@@ -1,5 +1,6 @@
 from tequila.circuit.compiler import Compiler
-from tequila.objective.objective import Objective, ExpectationValueImpl, Variable, assign_variable
+from tequila.objective.objective import Objective, ExpectationValueImpl, Variable, assign_variable, \
+    format_variable_list
 from tequila import TequilaException
 import numpy as np
 import copy
@@ -12,22 +13,30 @@ def grad(objective: Objective, variable: Variable = None, no_compile=False):
     '''
     wrapper function for getting the gradients of Objectives,ExpectationValues, Unitaries (including single gates), and Transforms.
     :param obj (QCircuit,ParametrizedGateImpl,Objective,ExpectationValue,Transform,Variable): structure to be differentiated
-    :param variables (list of Variable): parameter with respect to which obj should be differentiated.
+    :param variables (Variable or list of Variable): parameter with respect to which obj should be differentiated.
         default None: total gradient.
+        For lists (and None) the objective is compiled only once, so all components share the same expectation values
+        and can be simulated with the same compiled circuits
     return: dictionary of Objectives, if called on gate, circuit, exp.value, or objective; if Variable or Transform, returns number.
     '''
 
-    if variable is None:
+    if variable is None or isinstance(variable, list):
         # None means that all components are created
-        variables = objective.extract_variables()
+        if variable is None:
+            variables = objective.extract_variables()
+        else:
+            variables = format_variable_list(variable)
         result = {}
 
         if len(variables) == 0:
             raise TequilaException("Error in gradient: Objective has no variables")
 
+        if not no_compile:
+            objective = __compile_for_gradient(objective, variables=variables)
+
         for k in variables:
             assert (k is not None)
-            result[k] = grad(objective, k, no_compile=no_compile)
+            result[k] = grad(objective, k, no_compile=True)
         return result
     else:
         variable = assign_variable(variable)
@@ -35,14 +44,7 @@ def grad(objective: Objective, variable: Variable = None, no_compile=False):
     if no_compile:
         compiled = objective
     else:
-        compiler = Compiler(multitarget=True,
-                            trotterized=True,
-                            hadamard_power=True,
-                            power=True,
-                            controlled_phase=True,
-                            controlled_rotation=True)
-
-        compiled = compiler(objective, variables=[variable])
+        compiled = __compile_for_gradient(objective, variables=[variable])
 
     if variable not in compiled.extract_variables():
         raise TequilaException("Error in taking gradient. Objective does not depend on variable {} ".format(variable))
@@ -57,6 +59,17 @@ def grad(objective: Objective, variable: Variable = None, no_compile=False):
         raise TequilaException("Gradient not implemented for other types than ExpectationValue and Objective.")
 
 
+def __compile_for_gradient(objective, variables):
+    compiler = Compiler(multitarget=True,
+                        trotterized=True,
+                        hadamard_power=True,
+                        power=True,
+                        controlled_phase=True,
+                        controlled_rotation=True)
+
+    return compiler(objective, variables=variables)
+
+
 def __grad_objective(objective: Objective, variable: Variable):
     args = objective.args
     transformation = objective.transformation
@@ -130,7 +143,6 @@ def __grad_expectationvalue(E: ExpectationValueImpl, variable: Variable):
     :param variables (list, dict, str): the variables with respect to which differentiation should be performed.
     :return: vector (as dict) of dU/dpi as Objective (without hamiltonian)
     '''
-    hamiltonian = E.H
     unitary = E.U
     assert (unitary.verify())
 
@@ -149,7 +161,7 @@ def __grad_expectationvalue(E: ExpectationValueImpl, variable: Variable):
         if not hasattr(g, "shift"):
             raise TequilaException('No shift found for gate {}'.format(g))
 
-        dOinc = __grad_gaussian(unitary, g, idx, variable, hamiltonian)
+        dOinc = __grad_gaussian(E, g, idx, variable)
 
         dO += dOinc
 
@@ -157,36 +169,26 @@ def __grad_expectationvalue(E: ExpectationValueImpl, variable: Variable):
     return dO
 
 
-def __grad_gaussian(unitary, g, i, variable, hamiltonian):
+def __grad_gaussian(E, g, i, variable):
     '''
     function for getting the gradients of gaussian gates. NOTE: you had better compile first.
-    :param unitary: QCircuit: the QCircuit object containing the gate to be differentiated
+    The shifted expectation values are created as variants of E (see ExpectationValueImpl.shifted),
+    so that all of them can be simulated with a single compiled circuit
+    :param E: ExpectationValueImpl: the expectation value containing the gate to be differentiated
     :param g: a parametrized: the gate being differentiated
-    :param i: Int: the position in unitary at which g appears
+    :param i: Int: the position in E.U at which g appears
     :param variable: Variable or String: the variable with respect to which gate g is being differentiated
-    :param hamiltonian: the hamiltonian with respect to which unitary is to be measured, in the case that unitary
-        is contained within an ExpectationValue
     :return: an Objective, whose calculation yields the gradient of g w.r.t variable
     '''
 
     if not hasattr(g, "shift"):
         raise TequilaException("No shift found for gate {}".format(g))
 
-    # neo_a and neo_b are the shifted versions of gate g needed to evaluate its gradient
-    shift_a = g._parameter + np.pi / (4 * g.shift)
-    shift_b = g._parameter - np.pi / (4 * g.shift)
-    neo_a = copy.deepcopy(g)
-    neo_a._parameter = shift_a
-    neo_b = copy.deepcopy(g)
-    neo_b._parameter = shift_b
-
-    U1 = unitary.replace_gates(positions=[i], circuits=[neo_a])
+    Oplus = E.shifted(position=i, shift=np.pi / (4 * g.shift))
     w1 = g.shift * __grad_inner(g.parameter, variable)
 
-    U2 = unitary.replace_gates(positions=[i], circuits=[neo_b])
+    Ominus = E.shifted(position=i, shift=-np.pi / (4 * g.shift))
     w2 = -g.shift * __grad_inner(g.parameter, variable)
 
-    Oplus = ExpectationValueImpl(U=U1, H=hamiltonian)
-    Ominus = ExpectationValueImpl(U=U2, H=hamiltonian)
     dOinc = w1 * Objective(args=[Oplus]) + w2 * Objective(args=[Ominus])
     return dOinc
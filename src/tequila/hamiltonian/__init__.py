@@ -1,2 +1,4 @@
 from tequila.hamiltonian.qubit_hamiltonian import PauliString, QubitHamiltonian
+from tequila.hamiltonian.pauli_table import PauliTable
 from tequila.hamiltonian import paulis
+from tequila.hamiltonian.tapering import QubitTapering
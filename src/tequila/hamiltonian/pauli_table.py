@@ -0,0 +1,519 @@
+"""
+Packed (binary symplectic) storage for sums of paulistrings
+Used by QubitHamiltonian for the arithmetic on large Hamiltonians
+"""
+import numbers
+import typing
+import numpy
+
+from openfermion import QubitOperator
+from tequila import TequilaException
+
+# number of set bits for every byte value
+_POPCOUNT_TABLE = numpy.array([bin(i).count("1") for i in range(256)], dtype=numpy.int64)
+
+# dtype of the packed bit words, qubit q is bit q % 64 of word q // 64
+_WORD = numpy.dtype("<u8")
+
+
+def _popcount(words: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param words: array of packed bit words, the last axis holds the words of one paulistring
+    :return: number of set bits summed over the last axis
+    """
+    words = numpy.ascontiguousarray(words, dtype=_WORD)
+    if hasattr(numpy, "bitwise_count"):
+        return numpy.bitwise_count(words).sum(axis=-1, dtype=numpy.int64)
+    return _POPCOUNT_TABLE[words.view(numpy.uint8)].sum(axis=-1, dtype=numpy.int64)
+
+
+def _pack(bits: numpy.ndarray, n_words: int) -> numpy.ndarray:
+    """
+    :param bits: boolean array of shape (n_terms, n_bits)
+    :param n_words: number of words per row of the result
+    :return: packed words of shape (n_terms, n_words)
+    """
+    padded = numpy.zeros((bits.shape[0], 64 * n_words), dtype=numpy.uint8)
+    padded[:, :bits.shape[1]] = bits
+    packed = numpy.packbits(padded, axis=1, bitorder="little")
+    return numpy.ascontiguousarray(packed).view(_WORD).reshape(bits.shape[0], n_words)
+
+
+def _unpack(words: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param words: packed words of shape (n_terms, n_words)
+    :return: boolean array of shape (n_terms, 64*n_words)
+    """
+    words = numpy.ascontiguousarray(words, dtype=_WORD)
+    bits = numpy.unpackbits(words.view(numpy.uint8).reshape(words.shape[0], 8 * words.shape[1]), axis=1, bitorder="little")
+    return bits.astype(bool)
+
+
+def _masked_parity(values: numpy.ndarray, mask: int) -> numpy.ndarray:
+    """
+    :param values: int64 array
+    :param mask: bit mask
+    :return: parity of the number of set bits of every entry of values & mask (0 or 1)
+    """
+    bits = [b for b in range(mask.bit_length()) if (mask >> b) & 1]
+    if len(bits) > 6:
+        result = values & mask
+        for shift in (32, 16, 8, 4, 2, 1):
+            result ^= result >> shift
+    else:
+        # paulistrings are usually short, shifting the selected bits directly is cheaper
+        result = values >> bits[0]
+        for b in bits[1:]:
+            result ^= values >> b
+    return result & 1
+
+
+def _walsh_hadamard(values: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param values: array of length 2**n
+    :return: array w with w[z] = sum_j (-1)^parity(j & z) values[j]
+    """
+    result = numpy.array(values)
+    h = 1
+    while h < len(result):
+        pairs = result.reshape(-1, 2, h)
+        upper = pairs[:, 0].copy()
+        pairs[:, 0] += pairs[:, 1]
+        upper -= pairs[:, 1]
+        pairs[:, 1] = upper
+        h *= 2
+    return result
+
+
+def _hash_rows(keys: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param keys: uint64 array of shape (n_rows, n_columns)
+    :return: one uint64 hash per row
+    """
+    result = numpy.zeros(keys.shape[0], dtype=_WORD)
+    for column in keys.T:
+        result ^= column
+        result *= numpy.uint64(0x9E3779B97F4A7C15)
+        result ^= result >> numpy.uint64(29)
+    return result
+
+
+def _coefficient_array(values: list) -> numpy.ndarray:
+    """
+    Numbers are stored as float64 or complex128, everything else (e.g. sympy expressions) as objects
+    """
+    if all(isinstance(v, numbers.Number) for v in values):
+        if all(isinstance(v, numbers.Real) for v in values):
+            return numpy.asarray(values, dtype=numpy.float64).reshape(len(values))
+        return numpy.asarray(values, dtype=numpy.complex128).reshape(len(values))
+    result = numpy.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+class PauliTable:
+    """
+    Sum of paulistrings stored as two bit matrices and a coefficient array
+    Row i represents coeffs[i] * i^(x_i.z_i) X^x_i Z^z_i, i.e. Y is stored with both bits set
+    Bit q % 64 of word q // 64 in x (z) is set if the paulistring has an X or Y (Z or Y) on qubit q
+    Instances are not modified by any of the methods, duplicated rows are only combined by simplify
+    """
+
+    def __init__(self, x: numpy.ndarray, z: numpy.ndarray, coeffs: numpy.ndarray):
+        """
+        :param x: uint64 array of shape (n_terms, n_words)
+        :param z: uint64 array of shape (n_terms, n_words)
+        :param coeffs: array of n_terms coefficients
+        """
+        self.x = numpy.ascontiguousarray(x, dtype=_WORD)
+        self.z = numpy.ascontiguousarray(z, dtype=_WORD)
+        self.coeffs = numpy.asarray(coeffs)
+        assert self.x.shape == self.z.shape and self.x.ndim == 2
+        assert self.coeffs.shape == (self.x.shape[0],)
+
+    @property
+    def n_terms(self) -> int:
+        return self.x.shape[0]
+
+    @property
+    def n_words(self) -> int:
+        return self.x.shape[1]
+
+    def __len__(self):
+        return self.n_terms
+
+    def __repr__(self):
+        return "PauliTable(n_terms={}, n_words={})".format(self.n_terms, self.n_words)
+
+    @property
+    def is_numeric(self) -> bool:
+        """
+        :return: True if all coefficients are stored as numbers (and not as objects)
+        """
+        return self.coeffs.dtype != object
+
+    @classmethod
+    def zero(cls, n_words: int = 1) -> 'PauliTable':
+        empty = numpy.zeros((0, n_words), dtype=_WORD)
+        return cls(x=empty, z=empty.copy(), coeffs=numpy.zeros(0, dtype=numpy.float64))
+
+    @classmethod
+    def identity(cls, coeff=1.0, n_words: int = 1) -> 'PauliTable':
+        empty = numpy.zeros((1, n_words), dtype=_WORD)
+        return cls(x=empty, z=empty.copy(), coeffs=_coefficient_array([coeff]))
+
+    @classmethod
+    def from_terms(cls, terms: dict) -> 'PauliTable':
+        """
+        :param terms: dictionary in OpenFermion format, keys are tuples of (qubit, pauli) tuples
+        :return: new PauliTable with one row per key
+        """
+        rows, qubits, paulis = [], [], []
+        for i, key in enumerate(terms.keys()):
+            for q, p in key:
+                rows.append(i)
+                qubits.append(q)
+                paulis.append(p)
+        n_terms = len(terms)
+        n_bits = max(qubits, default=0) + 1
+        n_words = (n_bits - 1) // 64 + 1
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        qubits = numpy.asarray(qubits, dtype=numpy.int64)
+        paulis = numpy.asarray(paulis, dtype="U1")
+        paulis = numpy.char.upper(paulis)
+        xbits = numpy.zeros((n_terms, n_bits), dtype=bool)
+        zbits = numpy.zeros((n_terms, n_bits), dtype=bool)
+        xmask = paulis != "Z"
+        zmask = paulis != "X"
+        xbits[rows[xmask], qubits[xmask]] = True
+        zbits[rows[zmask], qubits[zmask]] = True
+        return cls(x=_pack(xbits, n_words), z=_pack(zbits, n_words),
+                   coeffs=_coefficient_array(list(terms.values())))
+
+    @classmethod
+    def from_openfermion(cls, qubit_operator: QubitOperator) -> 'PauliTable':
+        return cls.from_terms(qubit_operator.terms)
+
+    def to_terms(self) -> dict:
+        """
+        :return: dictionary in OpenFermion format
+        """
+        xbits = _unpack(self.x)
+        zbits = _unpack(self.z)
+        rows, qubits = numpy.nonzero(xbits | zbits)
+        letters = numpy.array(["Z", "X", "Y"])[xbits[rows, qubits].astype(int) + (xbits & zbits)[rows, qubits]]
+        keys = [[] for _ in range(self.n_terms)]
+        for row, q, p in zip(rows.tolist(), qubits.tolist(), letters.tolist()):
+            keys[row].append((q, p))
+        terms = {}
+        for key, value in zip(keys, self.coeffs.tolist()):
+            key = tuple(key)
+            if key in terms:
+                terms[key] += value
+            else:
+                terms[key] = value
+        return terms
+
+    def to_openfermion(self) -> QubitOperator:
+        result = QubitOperator.zero()
+        result.terms = self.to_terms()
+        return result
+
+    def _with_words(self, n_words: int) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        if n_words == self.n_words:
+            return self.x, self.z
+        x = numpy.zeros((self.n_terms, n_words), dtype=_WORD)
+        z = numpy.zeros((self.n_terms, n_words), dtype=_WORD)
+        x[:, :self.n_words] = self.x
+        z[:, :self.n_words] = self.z
+        return x, z
+
+    @property
+    def qubits(self) -> typing.List[int]:
+        """
+        :return: sorted list of qubits on which at least one of the paulistrings acts non-trivially
+        """
+        support = numpy.bitwise_or.reduce(self.x | self.z, axis=0, keepdims=True)
+        return numpy.flatnonzero(_unpack(support)[0]).tolist()
+
+    @property
+    def n_qubits(self) -> int:
+        """
+        :return: highest qubit index plus one (1 for tables without support)
+        """
+        return max(self.qubits, default=0) + 1
+
+    def weights(self) -> numpy.ndarray:
+        """
+        :return: number of non-trivial paulis in every row
+        """
+        return _popcount(self.x | self.z)
+
+    def scale(self, factor) -> 'PauliTable':
+        return PauliTable(x=self.x, z=self.z, coeffs=self.coeffs * factor)
+
+    def dagger(self) -> 'PauliTable':
+        if self.is_numeric:
+            return PauliTable(x=self.x, z=self.z, coeffs=self.coeffs.conjugate())
+        return PauliTable(x=self.x, z=self.z, coeffs=numpy.array([c.conjugate() for c in self.coeffs], dtype=object))
+
+    def concatenate(self, other: 'PauliTable') -> 'PauliTable':
+        """
+        :return: the sum of both tables, duplicates are not combined
+        """
+        n_words = max(self.n_words, other.n_words)
+        x1, z1 = self._with_words(n_words)
+        x2, z2 = other._with_words(n_words)
+        return PauliTable(x=numpy.concatenate([x1, x2]), z=numpy.concatenate([z1, z2]),
+                          coeffs=numpy.concatenate([self.coeffs, other.coeffs]))
+
+    def _group(self, keep_order: bool = True) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Find the duplicated paulistrings
+        :param keep_order: keep the order of first appearance, otherwise the order is arbitrary (but faster)
+        :return: rows (one representative row per distinct paulistring), inverse (group index of every row)
+        and the summed coefficients of the groups
+        """
+        keys = numpy.concatenate([self.x, self.z], axis=1)
+        # sorting a single hash is much faster than sorting the rows lexicographically
+        # with a stable sort the first row of every group of equal rows is its first appearance
+        hashes = _hash_rows(keys)
+        sorting = numpy.argsort(hashes, kind="stable" if keep_order else "quicksort")
+        sorted_keys = keys[sorting]
+        differs = numpy.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+        if numpy.any(differs & (hashes[sorting][1:] == hashes[sorting][:-1])):
+            # hash collision, equal rows might not be neighbours
+            sorting = numpy.lexsort(keys.T[::-1])
+            sorted_keys = keys[sorting]
+            differs = numpy.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+        boundary = numpy.ones(self.n_terms, dtype=bool)
+        boundary[1:] = differs
+        rows = sorting[boundary]
+        inverse = numpy.empty(self.n_terms, dtype=numpy.int64)
+        inverse[sorting] = numpy.cumsum(boundary) - 1
+        if keep_order:
+            order = numpy.argsort(rows)
+            rank = numpy.empty_like(order)
+            rank[order] = numpy.arange(len(order))
+            inverse = rank[inverse]
+            rows = rows[order]
+        n_unique = len(rows)
+        if self.coeffs.dtype == numpy.float64:
+            coeffs = numpy.bincount(inverse, weights=self.coeffs, minlength=n_unique)
+        elif self.coeffs.dtype == numpy.complex128:
+            coeffs = numpy.bincount(inverse, weights=self.coeffs.real, minlength=n_unique) \
+                     + 1.j * numpy.bincount(inverse, weights=self.coeffs.imag, minlength=n_unique)
+        else:
+            coeffs = numpy.zeros(n_unique, dtype=self.coeffs.dtype)
+            numpy.add.at(coeffs, inverse, self.coeffs)
+        return rows, inverse, coeffs
+
+    def simplify(self, threshold: float = 0.0, keep_order: bool = True) -> 'PauliTable':
+        """
+        Combine duplicated paulistrings and remove the ones with small coefficients
+        :param threshold: paulistrings with abs(coeff) <= threshold are removed
+        :param keep_order: keep the order of first appearance, otherwise the order is arbitrary (but faster)
+        :return: simplified PauliTable
+        """
+        rows, _, coeffs = self._group(keep_order=keep_order)
+        if self.is_numeric:
+            keep = numpy.abs(coeffs) > threshold
+            rows = rows[keep]
+            coeffs = coeffs[keep]
+        return PauliTable(x=self.x[rows], z=self.z[rows], coeffs=coeffs)
+
+    def add(self, other: 'PauliTable', tolerance: float = 0.0) -> 'PauliTable':
+        """
+        Sum of two simplified tables, same conventions as OpenFermion:
+        The order of self is kept, new paulistrings are appended
+        and paulistrings of other that cancel (abs(coeff) < tolerance) are removed
+        :param other: the table to add
+        :param tolerance: threshold for cancellation
+        :return: the simplified sum
+        """
+        table = self.concatenate(other)
+        rows, inverse, coeffs = table._group(keep_order=True)
+        if table.is_numeric:
+            touched = numpy.zeros(len(rows), dtype=bool)
+            touched[inverse[self.n_terms:]] = True
+            keep = ~(touched & (numpy.abs(coeffs) < tolerance))
+            rows = rows[keep]
+            coeffs = coeffs[keep]
+        return PauliTable(x=table.x[rows], z=table.z[rows], coeffs=coeffs)
+
+    @staticmethod
+    def _product(x1, z1, c1, x2, z2, c2):
+        # P1 P2 = i^(x1.z1 + x2.z2 - x3.z3 + 2 z1.x2) P3 with x3 = x1^x2, z3 = z1^z2
+        x3 = x1 ^ x2
+        z3 = z1 ^ z2
+        exponent = _popcount(x1 & z1) + _popcount(x2 & z2) - _popcount(x3 & z3) + 2 * _popcount(z1 & x2)
+        phase = numpy.array([1, 1j, -1, -1j])[exponent % 4]
+        coeffs = c1 * c2
+        if coeffs.dtype != object and numpy.all(phase.imag == 0.0):
+            phase = phase.real
+        return x3, z3, coeffs * phase
+
+    def multiply(self, other: 'PauliTable', chunk_size: int = 2 ** 20) -> 'PauliTable':
+        """
+        :param other: right factor
+        :param chunk_size: maximal number of products which are formed before they are combined
+        :return: simplified product self * other (threshold 0, arbitrary order)
+        """
+        return self._products(other=other, chunk_size=chunk_size, commutator=False)
+
+    def commutator(self, other: 'PauliTable', chunk_size: int = 2 ** 20) -> 'PauliTable':
+        """
+        Only anti-commuting pairs of paulistrings contribute with 2*P1*P2
+        :param other: right operand
+        :param chunk_size: maximal number of products which are formed before they are combined
+        :return: simplified commutator [self, other] (threshold 0, arbitrary order)
+        """
+        return self._products(other=other, chunk_size=chunk_size, commutator=True)
+
+    def _products(self, other: 'PauliTable', chunk_size: int, commutator: bool) -> 'PauliTable':
+        n_words = max(self.n_words, other.n_words)
+        x1, z1 = self._with_words(n_words)
+        x2, z2 = other._with_words(n_words)
+        if self.n_terms == 0 or other.n_terms == 0:
+            return PauliTable.zero(n_words=n_words)
+        block = max(1, chunk_size // other.n_terms)
+        result = None
+        for start in range(0, self.n_terms, block):
+            stop = min(start + block, self.n_terms)
+            x, z, c = self._product(x1[start:stop, None, :], z1[start:stop, None, :], self.coeffs[start:stop, None],
+                                    x2[None, :, :], z2[None, :, :], other.coeffs[None, :])
+            n = (stop - start) * other.n_terms
+            part = PauliTable(x=x.reshape(n, n_words), z=z.reshape(n, n_words), coeffs=c.reshape(n))
+            if commutator:
+                anticommuting = ~self._commutes(x1[start:stop, None, :], z1[start:stop, None, :],
+                                                x2[None, :, :], z2[None, :, :]).reshape(n)
+                part = PauliTable(x=part.x[anticommuting], z=part.z[anticommuting],
+                                  coeffs=2 * part.coeffs[anticommuting])
+            part = part.simplify(threshold=0.0, keep_order=False)
+            result = part if result is None else result.concatenate(part)
+            if len(result) > chunk_size:
+                result = result.simplify(threshold=0.0, keep_order=False)
+        return result.simplify(threshold=0.0, keep_order=False)
+
+    def commutes(self, other: 'PauliTable' = None) -> numpy.ndarray:
+        """
+        :param other: second table, if None the table is compared with itself
+        :return: boolean matrix, entry (i,j) tells if paulistring i of self commutes with paulistring j of other
+        """
+        if other is None:
+            other = self
+        n_words = max(self.n_words, other.n_words)
+        x1, z1 = self._with_words(n_words)
+        x2, z2 = other._with_words(n_words)
+        return self._commutes(x1[:, None, :], z1[:, None, :], x2[None, :, :], z2[None, :, :])
+
+    @staticmethod
+    def _commutes(x1, z1, x2, z2):
+        # paulistrings commute if the symplectic inner product is even
+        return (_popcount((x1 & z2) ^ (z1 & x2)) % 2) == 0
+
+    def is_hermitian(self, atol: float = 1.e-6) -> bool:
+        """
+        :return: True if all coefficients are real up to atol, the table should be simplified
+        """
+        if not self.is_numeric:
+            raise TypeError("PauliTable.is_hermitian needs numeric coefficients")
+        return bool(numpy.all(numpy.abs(numpy.imag(self.coeffs)) <= atol))
+
+    def basis_action(self, n_qubits: int) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Action of the paulistrings on computational basis states
+        Qubit 0 is the most significant bit of the basis index (same convention as QubitHamiltonian.to_matrix)
+        Paulistring k maps |j> to factors[k] * (-1)^parity(j & z_masks[k]) |j ^ x_masks[k]>
+        :param n_qubits: number of qubits of the basis
+        :return: x_masks, z_masks (int64) and the factors (coefficients times i^(number of Y))
+        """
+        if n_qubits < self.n_qubits or n_qubits > 62:
+            raise TequilaException("basis_action: n_qubits={} needs to be in [{}, 62]".format(n_qubits, self.n_qubits))
+        weights = numpy.left_shift(1, numpy.arange(n_qubits - 1, -1, -1, dtype=numpy.int64))
+        xbits = _unpack(self.x)[:, :n_qubits]
+        zbits = _unpack(self.z)[:, :n_qubits]
+        weights = weights[:xbits.shape[1]]
+        x_masks = (xbits * weights).sum(axis=1, dtype=numpy.int64)
+        z_masks = (zbits * weights).sum(axis=1, dtype=numpy.int64)
+        factors = numpy.asarray(self.coeffs, dtype=numpy.complex128) \
+                  * numpy.array([1, 1j, -1, -1j])[_popcount(self.x & self.z) % 4]
+        return x_masks, z_masks, factors
+
+    def permutation_diagonals(self, n_qubits: int, basis: numpy.ndarray = None) \
+            -> typing.Iterator[typing.Tuple[int, numpy.ndarray]]:
+        """
+        Decomposition of the operator into (permutation, diagonal) pairs
+        The paulistrings with the same X mask x combine to the operator |j> -> diagonal[j] |j ^ x>
+        :param n_qubits: number of qubits of the basis
+        :param basis: int64 array of basis states on which the diagonals are evaluated, defaults to all 2**n_qubits
+        :return: iterator over the pairs (x, diagonal), one pair per distinct X mask
+        """
+        x_masks, z_masks, factors = self.basis_action(n_qubits=n_qubits)
+        if basis is None:
+            basis = numpy.arange(2 ** n_qubits, dtype=numpy.int64)
+        for x in numpy.unique(x_masks):
+            selected = x_masks == x
+            diagonal = numpy.zeros(len(basis), dtype=numpy.complex128)
+            for z, factor in zip(z_masks[selected].tolist(), factors[selected]):
+                if z == 0:
+                    diagonal += factor
+                else:
+                    diagonal += numpy.where(_masked_parity(basis, z), -factor, factor)
+            yield int(x), diagonal
+
+    def expectation_values(self, state: numpy.ndarray, n_qubits: int = None, min_group_size: int = None) \
+            -> numpy.ndarray:
+        """
+        Expectation values of all paulistrings (times their coefficients) in one pass over the amplitudes
+        Paulistrings with the same X mask share the product conj(state[j ^ x]) * state[j],
+        their Z masks are evaluated together with a Walsh-Hadamard transform if there are enough of them
+        :param state: dense amplitude array of length 2**n_qubits (same convention as basis_action)
+        :param n_qubits: number of qubits of the state, defaults to log2 of its length
+        :param min_group_size: groups of paulistrings with the same X mask are transformed if they have more
+        members than this, defaults to n_qubits (the cost of the transform in passes over the amplitudes)
+        :return: complex array with <state|coeff_k P_k|state> for every row k
+        """
+        state = numpy.asarray(state, dtype=numpy.complex128)
+        if n_qubits is None:
+            n_qubits = len(state).bit_length() - 1
+        if len(state) != 2 ** n_qubits:
+            raise TequilaException("expectation_values: state of length {} does not fit {} qubits".format(len(state),
+                                                                                                       n_qubits))
+        result = numpy.zeros(self.n_terms, dtype=numpy.complex128)
+        if self.n_terms == 0:
+            return result
+        if min_group_size is None:
+            min_group_size = n_qubits
+        x_masks, z_masks, factors = self.basis_action(n_qubits=n_qubits)
+        basis = numpy.arange(2 ** n_qubits, dtype=numpy.int64)
+        unique, inverse = numpy.unique(x_masks, return_inverse=True)
+        for i, x in enumerate(unique.tolist()):
+            selected = numpy.flatnonzero(inverse == i)
+            products = state[basis ^ x].conj() * state if x != 0 else numpy.abs(state) ** 2
+            if len(selected) > min_group_size:
+                result[selected] = _walsh_hadamard(products)[z_masks[selected]]
+            else:
+                for k in selected.tolist():
+                    z = int(z_masks[k])
+                    if z == 0:
+                        result[k] = products.sum()
+                    else:
+                        result[k] = numpy.where(_masked_parity(basis, z), -products, products).sum()
+        return result * factors
+
+    def map_qubits(self, qubit_map: dict) -> 'PauliTable':
+        """
+        :param qubit_map: dictionary mapping old to new qubits, needs to contain all qubits of the table
+        :return: new table with mapped qubits
+        """
+        qubits = self.qubits
+        old = numpy.asarray(qubits, dtype=numpy.int64)
+        new = numpy.asarray([qubit_map[q] for q in qubits], dtype=numpy.int64)
+        n_bits = int(new.max(initial=0)) + 1
+        n_words = (n_bits - 1) // 64 + 1
+        xbits = numpy.zeros((self.n_terms, n_bits), dtype=bool)
+        zbits = numpy.zeros((self.n_terms, n_bits), dtype=bool)
+        xbits[:, new] = _unpack(self.x)[:, old]
+        zbits[:, new] = _unpack(self.z)[:, old]
+        return PauliTable(x=_pack(xbits, n_words), z=_pack(zbits, n_words), coeffs=self.coeffs)
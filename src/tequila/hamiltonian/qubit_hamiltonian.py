@@ -1,21 +1,27 @@
+import itertools
 import numbers
 import typing
 import numpy
+import scipy.sparse
+import scipy.sparse.linalg
 
 from tequila.tools import number_to_string
 from tequila.utils import to_float
 from tequila import TequilaException
+from tequila.hamiltonian.pauli_table import PauliTable
+from tequila.wavefunction.qubit_wavefunction import QubitWaveFunction
+from tequila.utils.bitstrings import BitString
 
 from openfermion import QubitOperator
-from functools import reduce
+from openfermion.config import EQ_TOLERANCE
 
 from collections import namedtuple
 
 BinaryPauli = namedtuple("BinaryPauli", "coeff, binary")
 
 """
-Explicit matrix forms for the Pauli operators for the tomatrix method
-For sparse matrices use the openfermion tool
+Explicit matrix forms for the Pauli operators
+For sparse matrices use QubitHamiltonian.to_sparse
 get the openfermion object with hamiltonian.hamiltonian
 """
 import numpy as np
@@ -185,6 +191,8 @@ class QubitHamiltonian:
     """
     Default QubitHamiltonian
     Uses OpenFermion Structures for arithmetics
+    Large scale operations (simplify, dagger, map_qubits, ...) run on a packed PauliTable
+    Both representations are created lazily from each other
     """
 
     # convenience
@@ -195,6 +203,10 @@ class QubitHamiltonian:
     def from_openfermion(cls, qubit_operator: QubitOperator):
         return QubitHamiltonian(qubit_hamiltonian=qubit_operator)
 
+    @classmethod
+    def from_pauli_table(cls, pauli_table: PauliTable):
+        return QubitHamiltonian(qubit_hamiltonian=pauli_table)
+
     def to_openfermion(self) -> QubitOperator:
         return self.qubit_operator
 
@@ -203,17 +215,47 @@ class QubitHamiltonian:
         """
         :return: The underlying OpenFermion QubitOperator
         """
-        return self._qubit_operator
+        operator = self._qubit_operator
+        # the operator can be modified from the outside, the packed table and the views are recreated when needed
+        self._pauli_table = None
+        self._cache = {}
+        return operator
+
+    @property
+    def _qubit_operator(self) -> QubitOperator:
+        if self._operator is None:
+            self._operator = self._pauli_table.to_openfermion()
+        return self._operator
+
+    @_qubit_operator.setter
+    def _qubit_operator(self, other: QubitOperator):
+        self._operator = other
+        self._pauli_table = None
+        self._cache = {}
+
+    @property
+    def pauli_table(self) -> PauliTable:
+        """
+        :return: The Hamiltonian as packed PauliTable (treated as immutable, do not modify)
+        """
+        if self._pauli_table is None:
+            self._pauli_table = PauliTable.from_openfermion(self._operator)
+        return self._pauli_table
+
+    @pauli_table.setter
+    def pauli_table(self, other: PauliTable):
+        self._operator = None
+        self._pauli_table = other
+        self._cache = {}
 
     @property
     def qubits(self):
         """
         :return: All Qubits the Hamiltonian acts on
         """
-        accumulate = []
-        for ps in self.paulistrings:
-            accumulate += ps.qubits
-        return sorted(list(set(accumulate)))
+        if "qubits" not in self._cache:
+            self._cache["qubits"] = self.pauli_table.qubits
+        return list(self._cache["qubits"])
 
     @qubit_operator.setter
     def qubit_operator(self, other: QubitOperator) -> QubitOperator:
@@ -225,15 +267,23 @@ class QubitHamiltonian:
     def pauli(selfs, ituple):
         return ituple[1]
 
-    def __init__(self, qubit_hamiltonian: typing.Union[QubitOperator, str, numbers.Number] = None):
+    def __init__(self, qubit_hamiltonian: typing.Union[QubitOperator, PauliTable, str, numbers.Number] = None):
         """
         Initialize from string or from a preexisting OpenFermion QubitOperator instance
-        :param qubit_hamiltonian: string or openfermion.QubitOperator
+        :param qubit_hamiltonian: string or openfermion.QubitOperator or PauliTable
         if string: Same conventions as openfermion
         if None: The Hamiltonian is initialized as identity operator
         if Number: initialized as scaled unit operator
-        """
-        if isinstance(qubit_hamiltonian, str):
+        if PauliTable: needs to be simplified (no duplicated paulistrings)
+        """
+        self._operator = None
+        self._pauli_table = None
+        # derived views (paulistrings, qubits, n_qubits), reset whenever the Hamiltonian changes
+        self._cache = {}
+        if isinstance(qubit_hamiltonian, PauliTable):
+            self._pauli_table = qubit_hamiltonian
+            return
+        elif isinstance(qubit_hamiltonian, str):
             self._qubit_operator = self.from_string(string=qubit_hamiltonian)._qubit_operator
         elif qubit_hamiltonian is None:
             self._qubit_operator = QubitOperator.zero()
@@ -257,7 +307,7 @@ class QubitHamiltonian:
         return self._qubit_operator.terms[item]
 
     def __setitem__(self, key, value):
-        self._qubit_operator.terms[key] = value
+        self.qubit_operator.terms[key] = value
         return self
 
     def items(self):
@@ -290,7 +340,7 @@ class QubitHamiltonian:
         elif openfermion_format:
             return QubitHamiltonian(qubit_hamiltonian=QubitOperator(string))
         else:
-            H = QubitHamiltonian.zero()
+            paulistrings = []
             string = string.replace(" ", "")
             string = string.replace("*", "")
             string = string.replace("+-", "-")
@@ -322,43 +372,45 @@ class QubitHamiltonian:
                 if coeff.imag == 0.0:
                     coeff = float(coeff.real)
 
-                H += cls.from_paulistrings(ps=PauliString.from_string(string=ps, coeff=coeff))
-            return H.simplify()
+                paulistrings.append(PauliString.from_string(string=ps, coeff=coeff))
+            return cls.from_paulistrings(ps=paulistrings)
 
     @classmethod
     def from_paulistrings(cls, ps: typing.List[PauliString]):
         if isinstance(ps, PauliString):
             return cls.from_paulistrings(ps=[ps])
         else:
-            H = cls.zero()
-            for x in ps:
-                H += QubitHamiltonian(qubit_hamiltonian=QubitOperator(term=x.key_openfermion(), coefficient=x.coeff))
-            return H.simplify()
+            return QubitHamiltonian(qubit_hamiltonian=cls._table_from_paulistrings(ps)).simplify()
+
+    @staticmethod
+    def _table_from_paulistrings(ps: typing.List[PauliString]) -> PauliTable:
+        terms = {}
+        for x in ps:
+            key = tuple(sorted(x.key_openfermion()))
+            terms[key] = terms.get(key, 0.0) + x.coeff
+        return PauliTable.from_terms(terms)
+
+    @staticmethod
+    def _as_table(other) -> PauliTable:
+        # numbers are treated as multiples of the unit operator
+        if isinstance(other, numbers.Number):
+            return PauliTable.identity(coeff=other)
+        return other.pauli_table
 
+    # arithmetic runs on the packed tables, OpenFermion is only used at the boundaries
     def __add__(self, other):
-        if isinstance(other, numbers.Number):
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator + other * self.unit().qubit_operator)
-        else:
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator + other.qubit_operator)
+        return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.add(self._as_table(other), tolerance=EQ_TOLERANCE))
 
     def __sub__(self, other):
-        if isinstance(other, numbers.Number):
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator - other * self.unit().qubit_operator)
-        else:
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator - other.qubit_operator)
+        return QubitHamiltonian(
+            qubit_hamiltonian=self.pauli_table.add(self._as_table(other).scale(-1.0), tolerance=EQ_TOLERANCE))
 
     def __iadd__(self, other):
-        if isinstance(other, numbers.Number):
-            self.qubit_operator += other * self.unit().qubit_operator
-        else:
-            self.qubit_operator += other.qubit_operator
+        self.pauli_table = self.pauli_table.add(self._as_table(other), tolerance=EQ_TOLERANCE)
         return self
 
     def __isub__(self, other):
-        if isinstance(other, numbers.Number):
-            self.qubit_operator -= other * self.unit().qubit_operator
-        else:
-            self.qubit_operator -= other.qubit_operator
+        self.pauli_table = self.pauli_table.add(self._as_table(other).scale(-1.0), tolerance=EQ_TOLERANCE)
         return self
 
     def __mul__(self, other):
@@ -366,20 +418,20 @@ class QubitHamiltonian:
             # actually an apply operation
             return other.apply_qubitoperator(operator=self)
         elif isinstance(other, numbers.Number):
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator * other)
+            return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.scale(other))
         else:
-            return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator * other.qubit_operator)
+            return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.multiply(other.pauli_table))
 
     def __imul__(self, other):
         if isinstance(other, numbers.Number):
-            self.qubit_operator *= other
+            self.pauli_table = self.pauli_table.scale(other)
         else:
-            self.qubit_operator *= other.qubit_operator
+            self.pauli_table = self.pauli_table.multiply(other.pauli_table)
         return self
 
     def __rmul__(self, other):
         assert isinstance(other, numbers.Number)
-        return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator * other)
+        return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.scale(other))
 
     def __radd__(self, other):
         return self.__add__(other=other)
@@ -388,30 +440,92 @@ class QubitHamiltonian:
         return self.__neg__().__add__(other=other)
 
     def __pow__(self, power):
-        return QubitHamiltonian(qubit_hamiltonian=self.qubit_operator ** power)
+        if not isinstance(power, numbers.Integral) or power < 0:
+            raise TequilaException("QubitHamiltonian: power needs to be a non-negative integer, got {}".format(power))
+        # exponentiation by squaring
+        result = PauliTable.identity()
+        factor = self.pauli_table
+        while power > 0:
+            if power % 2 == 1:
+                result = result.multiply(factor)
+            power //= 2
+            if power > 0:
+                factor = factor.multiply(factor)
+        return QubitHamiltonian(qubit_hamiltonian=result)
 
     def __neg__(self):
         return self.__mul__(other=-1.0)
 
+    def commutator(self, other: 'QubitHamiltonian') -> 'QubitHamiltonian':
+        """
+        :param other: QubitHamiltonian
+        :return: the commutator [self, other] = self*other - other*self
+        """
+        return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.commutator(other.pauli_table))
+
     def __eq__(self, other):
         return self._qubit_operator == other._qubit_operator
 
     def is_hermitian(self):
-        try:
-            for k, v in self.qubit_operator.terms.items():
-                self.qubit_operator.terms[k] = to_float(v)
-            return True
-        except TypeError:
+        """
+        Coefficients are converted to real numbers if the Hamiltonian is hermitian
+        :return: True if all coefficients are real
+        """
+        table = self.pauli_table
+        if not table.is_numeric:
+            try:
+                for k, v in self.qubit_operator.terms.items():
+                    self.qubit_operator.terms[k] = to_float(v)
+                return True
+            except TypeError:
+                return False
+        if not table.is_hermitian(atol=1.e-6):
             return False
+        if table.coeffs.dtype != numpy.float64:
+            self.pauli_table = PauliTable(x=table.x, z=table.z, coeffs=table.coeffs.real.astype(numpy.float64))
+        return True
 
     def simplify(self, threshold=0.0):
-        simplified = {}
-        for k, v in self.qubit_operator.terms.items():
-            if not numpy.isclose(v, 0.0, atol=threshold):
-                simplified[k] = v
-        self._qubit_operator.terms = simplified
+        table = self.pauli_table
+        simplified = table.simplify(threshold=threshold)
+        if len(simplified) != len(table):
+            self.pauli_table = simplified
         return self
 
+    def screen(self, threshold: float = 1.e-8) -> typing.Tuple['QubitHamiltonian', float]:
+        """
+        Merge identical paulistrings (e.g. after tapering or qubit mappings) and remove the ones with small coefficients.
+        Paulistrings have operator norm 1, so no expectation value changes by more than the returned error bound.
+
+        Parameters
+        ----------
+        threshold:
+            paulistrings with abs(coeff) <= threshold are removed
+
+        Returns
+        -------
+            the screened Hamiltonian and the sum of the absolute values of the removed coefficients
+        """
+        merged = self.pauli_table.simplify(threshold=0.0)
+        if not merged.is_numeric:
+            return QubitHamiltonian(qubit_hamiltonian=merged), 0.0
+        small = numpy.abs(merged.coeffs) <= threshold
+        error = float(numpy.sum(numpy.abs(merged.coeffs[small])))
+        screened = PauliTable(x=merged.x[~small], z=merged.z[~small], coeffs=merged.coeffs[~small])
+        return QubitHamiltonian(qubit_hamiltonian=screened), error
+
+    def split_constant(self) -> typing.Tuple[numbers.Number, 'QubitHamiltonian']:
+        """
+        Returns
+        -------
+            the coefficient of the unit operator and the Hamiltonian without the unit operator
+        """
+        table = self.pauli_table
+        unit = table.weights() == 0
+        constant = sum(table.coeffs[unit].tolist(), 0.0)
+        rest = PauliTable(x=table.x[~unit], z=table.z[~unit], coeffs=table.coeffs[~unit])
+        return constant, QubitHamiltonian(qubit_hamiltonian=rest)
+
     def split(self, *args, **kwargs) -> tuple:
         """
         Returns
@@ -457,14 +571,10 @@ class QubitHamiltonian:
         return QubitHamiltonian(qubit_hamiltonian=trans_hamiltonian)
 
     def dagger(self):
-        dag_hamiltonian = QubitOperator("", 0)
-        for key, value in self._qubit_operator.terms.items():
-            dag_hamiltonian.terms[key] = value.conjugate()
-
-        return QubitHamiltonian(qubit_hamiltonian=dag_hamiltonian)
+        return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.dagger())
 
     def normalize(self):
-        self._qubit_operator.renormalize()
+        self.qubit_operator.renormalize()
         return self
 
     def to_matrix(self):
@@ -473,37 +583,203 @@ class QubitHamiltonian:
 
         Returns a dense 2**N x 2**N matrix representation of this
         QubitHamiltonian. Watch for memory usage when N is >12!
+        Use to_sparse or to_linear_operator for larger N.
         
         :return: numpy.ndarray(2**N, 2**N) with type numpy.complex
         """
-        nq = self.n_qubits
-        I = numpy.eye(2, dtype=numpy.complex)
-        Hm = numpy.zeros((2 ** nq, 2 ** nq), dtype=numpy.complex)
+        return self.to_sparse().toarray()
 
-        for key, val in self.items():
-            term = [I] * nq
+    def to_sparse(self, n_qubits: int = None) -> scipy.sparse.csr_matrix:
+        """
+        Returns the Hamiltonian as sparse matrix (same ordering as to_matrix).
+        The matrix is built from the X/Z masks of the paulistrings,
+        one diagonal of the permuted basis per distinct X mask
 
-            for ind, op in key:
-                term[ind] = pauli_matrices[op]
+        :param n_qubits: number of qubits, defaults to self.n_qubits
+        :return: scipy.sparse.csr_matrix(2**N, 2**N) with type numpy.complex
+        """
+        if n_qubits is None:
+            n_qubits = self.n_qubits
+        dim = 2 ** n_qubits
+        basis = numpy.arange(dim, dtype=numpy.int64)
+        rows, columns, data = [], [], []
+        for x, diagonal in self.pauli_table.permutation_diagonals(n_qubits=n_qubits):
+            # column j holds the entry diagonal[j] at row j^x
+            nonzero = numpy.flatnonzero(diagonal)
+            rows.append(basis[nonzero] ^ x)
+            columns.append(nonzero)
+            data.append(diagonal[nonzero])
+        if len(data) == 0:
+            return scipy.sparse.csr_matrix((dim, dim), dtype=numpy.complex)
+        matrix = scipy.sparse.csr_matrix((numpy.concatenate(data), (numpy.concatenate(rows), numpy.concatenate(columns))),
+                                         shape=(dim, dim), dtype=numpy.complex)
+        matrix.sort_indices()
+        return matrix
+
+    def apply(self, vector: numpy.ndarray) -> numpy.ndarray:
+        """
+        Matrix-free action of the Hamiltonian (same ordering as to_matrix)
+        Memory is O(2**N) independent of the number of paulistrings
+
+        :param vector: numpy array of shape (2**N,) or (2**N, k), N >= self.n_qubits
+        :return: H*vector as numpy array of the same shape
+        """
+        vector = numpy.asarray(vector)
+        n_qubits = int(vector.shape[0]).bit_length() - 1
+        if vector.shape[0] != 2 ** n_qubits:
+            raise TequilaException("QubitHamiltonian.apply: vector length {} is no power of 2".format(vector.shape[0]))
+        basis = numpy.arange(vector.shape[0], dtype=numpy.int64)
+        result = numpy.zeros(vector.shape, dtype=numpy.complex)
+        for x, diagonal in self.pauli_table.permutation_diagonals(n_qubits=n_qubits):
+            # |j> -> diagonal[j] |j^x>, so (Hv)[i] receives diagonal[i^x] * v[i^x]
+            if vector.ndim == 1:
+                result += (diagonal * vector)[basis ^ x]
+            else:
+                result += (diagonal[:, None] * vector)[basis ^ x]
+        return result
 
-            Hm += val * reduce(numpy.kron, term)
-        return Hm
+    def to_linear_operator(self, n_qubits: int = None) -> scipy.sparse.linalg.LinearOperator:
+        """
+        Matrix-free representation for iterative solvers like scipy.sparse.linalg.eigsh
+
+        :param n_qubits: number of qubits, defaults to self.n_qubits
+        :return: scipy.sparse.linalg.LinearOperator of shape (2**N, 2**N) using QubitHamiltonian.apply
+        """
+        if n_qubits is None:
+            n_qubits = self.n_qubits
+        dim = 2 ** n_qubits
+        return scipy.sparse.linalg.LinearOperator(shape=(dim, dim), matvec=self.apply, matmat=self.apply,
+                                                  rmatvec=self.dagger().apply, dtype=numpy.complex)
+
+    def eigenstates(self, k: int = 1, sector: typing.Union[dict, typing.Callable, typing.Iterable[int]] = None,
+                    n_qubits: int = None, threshold: float = 1.e-8, *args, **kwargs) \
+            -> typing.Tuple[numpy.ndarray, typing.List[QubitWaveFunction]]:
+        """
+        Exact diagonalization for the lowest eigenvalues and eigenstates.
+        The Hamiltonian is restricted to the basis states of the sector and diagonalized with
+        Lanczos (scipy.sparse.linalg.eigsh), small sectors are diagonalized densely.
+
+        Parameters
+        ----------
+        k:
+            number of eigenstates
+        sector:
+            restriction of the computational basis, the Hamiltonian needs to conserve it (this is not checked)
+            dict: with keys 'n_particles' (number of qubits in state 1) and/or 'sz'
+            ((number of ones on even qubits - number of ones on odd qubits)/2, even qubits are spin-up
+            like in the Jordan-Wigner encoding of the quantumchemistry module)
+            callable: gets an int64 array of basis states (qubit 0 is the most significant bit), returns a boolean mask
+            iterable: the basis states as integers
+            None (or an empty dict): the full space
+        n_qubits:
+            number of qubits, defaults to self.n_qubits
+        threshold:
+            amplitudes with smaller absolute value are not stored in the wavefunctions
+        args
+        kwargs:
+            passed to scipy.sparse.linalg.eigsh
+
+        Returns
+        -------
+            the eigenvalues in ascending order and the eigenstates as list of QubitWaveFunction
+        """
+        if n_qubits is None:
+            n_qubits = self.n_qubits
+        basis = self._sector_basis(sector=sector, n_qubits=n_qubits)
+        if len(basis) == 0:
+            raise TequilaException("eigenstates: the sector {} is empty".format(sector))
+        k = min(k, len(basis))
+        matrix = self._sector_matrix(basis=basis, n_qubits=n_qubits)
+        if len(basis) <= 256 or k >= len(basis) - 1:
+            energies, vectors = numpy.linalg.eigh(matrix.toarray())
+        else:
+            energies, vectors = scipy.sparse.linalg.eigsh(matrix, k=k, which="SA", *args, **kwargs)
+        order = numpy.argsort(energies)[:k]
+        energies = energies[order]
+        vectors = vectors[:, order]
+
+        wavefunctions = []
+        for vector in vectors.T:
+            support = numpy.flatnonzero(numpy.abs(vector) > threshold)
+            state = {BitString.from_int(integer=int(basis[i]), nbits=n_qubits): vector[i] for i in support}
+            wavefunctions.append(QubitWaveFunction(state=state, n_qubits=n_qubits))
+        return energies, wavefunctions
+
+    @staticmethod
+    def _sector_basis(sector, n_qubits: int) -> numpy.ndarray:
+        """
+        :return: sorted int64 array of the basis states in the sector (see eigenstates)
+        """
+        if sector is None:
+            return numpy.arange(2 ** n_qubits, dtype=numpy.int64)
+        elif callable(sector):
+            basis = numpy.arange(2 ** n_qubits, dtype=numpy.int64)
+            return basis[numpy.asarray(sector(basis), dtype=bool)]
+        elif isinstance(sector, dict):
+            unknown = set(sector.keys()) - {"n_particles", "sz"}
+            if unknown:
+                raise TequilaException("eigenstates: unknown sector keys {}".format(unknown))
+            n_particles = sector.get("n_particles", None)
+            sz = sector.get("sz", None)
+            if n_particles is None and sz is None:
+                # no constraint, same as sector=None
+                return numpy.arange(2 ** n_qubits, dtype=numpy.int64)
+
+            def masks(qubits, m):
+                # all basis states with exactly m ones on the given qubits
+                return numpy.array([sum(1 << (n_qubits - 1 - q) for q in c) for c in itertools.combinations(qubits, m)],
+                                   dtype=numpy.int64)
+
+            if sz is None:
+                basis = masks(range(n_qubits), n_particles)
+            else:
+                up, down = range(0, n_qubits, 2), range(1, n_qubits, 2)
+                n_up_values = range(len(up) + 1) if n_particles is None else [(n_particles + 2 * sz) / 2]
+                parts = []
+                for n_up in n_up_values:
+                    n_down = n_up - 2 * sz
+                    if n_up != int(n_up) or n_down != int(n_down) or not 0 <= n_up <= len(up) \
+                            or not 0 <= n_down <= len(down):
+                        continue
+                    parts.append((masks(up, int(n_up))[:, None] | masks(down, int(n_down))[None, :]).reshape(-1))
+                basis = numpy.concatenate(parts) if parts else numpy.zeros(0, dtype=numpy.int64)
+            return numpy.sort(basis)
+        else:
+            return numpy.unique(numpy.asarray(list(sector), dtype=numpy.int64))
+
+    def _sector_matrix(self, basis: numpy.ndarray, n_qubits: int) -> scipy.sparse.csr_matrix:
+        """
+        :param basis: sorted int64 array of basis states
+        :return: the Hamiltonian restricted to the basis states as sparse matrix
+        """
+        rows, columns, data = [], [], []
+        for x, diagonal in self.pauli_table.permutation_diagonals(n_qubits=n_qubits, basis=basis):
+            target = basis ^ x
+            position = numpy.minimum(numpy.searchsorted(basis, target), len(basis) - 1)
+            inside = basis[position] == target
+            rows.append(position[inside])
+            columns.append(numpy.flatnonzero(inside))
+            data.append(diagonal[inside])
+        dim = len(basis)
+        if len(data) == 0:
+            return scipy.sparse.csr_matrix((dim, dim), dtype=numpy.complex)
+        return scipy.sparse.csr_matrix((numpy.concatenate(data), (numpy.concatenate(rows), numpy.concatenate(columns))),
+                                       shape=(dim, dim), dtype=numpy.complex)
 
     @property
     def n_qubits(self):
-        max_index = 0
-        for key, value in self.items():
-            indices = [self.index(k) for k in key]
-            if len(indices) > 0:  # for the case that there is a 1 in the operator
-                max_index = max(max_index, max(indices))
-        return max_index + 1
+        if "n_qubits" not in self._cache:
+            self._cache["n_qubits"] = max(self.qubits, default=0) + 1
+        return self._cache["n_qubits"]
 
     @property
     def paulistrings(self):
         """
-        :return: the Hamiltonian as list of PauliStrings
+        :return: the Hamiltonian as list of PauliStrings (copies, changing them does not change the Hamiltonian)
         """
-        return [PauliString.from_openfermion(key=k, coeff=v) for k, v in self.items()]
+        if "paulistrings" not in self._cache:
+            self._cache["paulistrings"] = [PauliString.from_openfermion(key=k, coeff=v) for k, v in self.items()]
+        return [PauliString(data=dict(ps.items()), coeff=ps.coeff) for ps in self._cache["paulistrings"]]
 
     @paulistrings.setter
     def paulistrings(self, other):
@@ -512,11 +788,7 @@ class QubitHamiltonian:
         :param other: list of PauliStrings
         :return: self for chaining
         """
-        new_hamiltonian = QubitOperator.identity()
-        for ps in other:
-            tmp = QubitOperator(term=ps.key_openfermion(), value=ps.coeff)
-            new_hamiltonian += tmp
-        self._qubit_operator = new_hamiltonian
+        self.pauli_table = self._table_from_paulistrings(other)
         return self
 
     def map_qubits(self, qubit_map: dict):
@@ -535,12 +807,4 @@ class QubitHamiltonian:
 
         """
 
-        mapped_terms = {}
-
-        for k, v in self.qubit_operator.terms.items():
-            mk = tuple([(qubit_map[x[0]], x[1]) for x in k])
-            mapped_terms[mk] = v
-
-        mapped = QubitOperator.zero()
-        mapped.terms = mapped_terms
-        return QubitHamiltonian(qubit_hamiltonian=mapped)
+        return QubitHamiltonian(qubit_hamiltonian=self.pauli_table.map_qubits(qubit_map=qubit_map))
@@ -0,0 +1,371 @@
+"""
+Qubit tapering with Z2 symmetries (Bravyi, Gambetta, Mezzacapo, Temme, arXiv:1701.08213)
+Every independent Z2 symmetry of a Hamiltonian allows to remove one qubit
+"""
+import numbers
+import typing
+import numpy
+
+from tequila import TequilaException
+from tequila.hamiltonian.pauli_table import PauliTable, _pack, _unpack
+from tequila.hamiltonian.qubit_hamiltonian import QubitHamiltonian
+from tequila.utils.bitstrings import BitString
+
+if typing.TYPE_CHECKING:
+    # circuits import the hamiltonian module, only needed for type hinting
+    from tequila.circuit.circuit import QCircuit
+
+
+def _gf2_rref(matrix: numpy.ndarray) -> typing.Tuple[numpy.ndarray, typing.List[int]]:
+    """
+    :param matrix: boolean matrix
+    :return: the non-zero rows of the reduced row echelon form over GF(2) and the pivot columns
+    """
+    matrix = numpy.array(matrix, dtype=bool)
+    pivots = []
+    row = 0
+    for col in range(matrix.shape[1]):
+        if row == matrix.shape[0]:
+            break
+        candidates = numpy.flatnonzero(matrix[row:, col])
+        if len(candidates) == 0:
+            continue
+        other = row + candidates[0]
+        if other != row:
+            matrix[[row, other]] = matrix[[other, row]]
+        eliminate = matrix[:, col].copy()
+        eliminate[row] = False
+        matrix[eliminate] ^= matrix[row]
+        pivots.append(col)
+        row += 1
+    return matrix[:row], pivots
+
+
+def _gf2_kernel(matrix: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param matrix: boolean matrix
+    :return: boolean matrix whose rows are a basis of the kernel of matrix over GF(2)
+    """
+    rref, pivots = _gf2_rref(matrix)
+    free = sorted(set(range(matrix.shape[1])) - set(pivots))
+    kernel = numpy.zeros((len(free), matrix.shape[1]), dtype=bool)
+    for i, col in enumerate(free):
+        kernel[i, col] = True
+        kernel[i, pivots] = rref[:, col]
+    return kernel
+
+
+def _bits(table: PauliTable, n_bits: int) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    :return: the x and z bits of the table as boolean matrices with n_bits columns
+    """
+    xbits = numpy.zeros((table.n_terms, n_bits), dtype=bool)
+    zbits = numpy.zeros((table.n_terms, n_bits), dtype=bool)
+    x = _unpack(table.x)[:, :n_bits]
+    xbits[:, :x.shape[1]] = x
+    zbits[:, :x.shape[1]] = _unpack(table.z)[:, :n_bits]
+    return xbits, zbits
+
+
+def _table(xbits: numpy.ndarray, zbits: numpy.ndarray, coeffs: numpy.ndarray) -> PauliTable:
+    n_words = max(xbits.shape[1] - 1, 0) // 64 + 1
+    return PauliTable(x=_pack(xbits, n_words), z=_pack(zbits, n_words), coeffs=coeffs)
+
+
+class QubitTapering:
+    """
+    Removes the qubits of a Hamiltonian which are fixed by Z2 symmetries
+
+    The symmetries tau_i are commuting paulistrings which commute with every term of the Hamiltonian.
+    Each of them is mapped to a single-qubit pauli sigma_i on qubit q_i by the Clifford
+    U_i = (sigma_i + tau_i)/sqrt(2), afterwards the transformed Hamiltonian acts on q_i only with sigma_i
+    which is replaced by the eigenvalue of tau_i in the chosen sector (+1 or -1)
+    The remaining qubits are relabeled to 0, ..., n_qubits - n_tapered - 1 in ascending order
+
+    Molecular Hamiltonians have (at least) the particle-number parities of both spins as symmetries.
+    Symmetries which only contain Z operators are preferred, their sector can be read off a reference basis state
+    (e.g. Hartree-Fock) and circuits which prepare such a reference can be tapered in the same way.
+    """
+
+    @property
+    def symmetries(self) -> typing.List[QubitHamiltonian]:
+        """
+        :return: the symmetries tau_i as QubitHamiltonians
+        """
+        table = self._symmetries
+        return [QubitHamiltonian.from_pauli_table(PauliTable(x=table.x[i:i + 1], z=table.z[i:i + 1],
+                                                             coeffs=table.coeffs[i:i + 1]))
+                for i in range(len(self._symmetries))]
+
+    @property
+    def tapered_qubits(self) -> typing.List[int]:
+        return [q for q, _ in self._pivots]
+
+    @property
+    def n_tapered(self) -> int:
+        return len(self._pivots)
+
+    @property
+    def qubit_map(self) -> typing.Dict[int, int]:
+        """
+        :return: dictionary mapping the remaining qubits of the original register to the tapered register
+        """
+        return self._qubit_map(self.n_qubits)
+
+    def _qubit_map(self, n_qubits: int) -> typing.Dict[int, int]:
+        tapered = set(self.tapered_qubits)
+        remaining = [q for q in range(n_qubits) if q not in tapered]
+        return {q: i for i, q in enumerate(remaining)}
+
+    @property
+    def sector(self) -> typing.List[int]:
+        return self._sector
+
+    @sector.setter
+    def sector(self, other: typing.List[int]):
+        if other is not None:
+            other = [int(s) for s in other]
+            if len(other) != self.n_tapered or any(s not in [-1, 1] for s in other):
+                raise TequilaException("QubitTapering: sector needs to be a list of {} eigenvalues (+1 or -1), "
+                                       "got {}".format(self.n_tapered, other))
+        self._sector = other
+
+    def __init__(self, symmetries: PauliTable, pivots: typing.List[typing.Tuple[int, str]], n_qubits: int,
+                 sector: typing.List[int] = None):
+        """
+        Use QubitTapering.from_hamiltonian to find the symmetries
+        :param symmetries: table with the (commuting) symmetries tau_i, all coefficients need to be 1
+        :param pivots: list of (qubit, pauli) tuples, the single-qubit paulis sigma_i (X or Z)
+        sigma_i needs to anti-commute with tau_i and commute with all other symmetries
+        :param n_qubits: size of the original register
+        :param sector: eigenvalues (+1 or -1) of the symmetries
+        """
+        self._symmetries = symmetries
+        self._pivots = [(int(q), p.upper()) for q, p in pivots]
+        self.n_qubits = n_qubits
+        self.sector = sector
+
+    def __repr__(self):
+        result = "QubitTapering: {} of {} qubits tapered\n".format(self.n_tapered, self.n_qubits)
+        for tau, (q, p), s in zip(self.symmetries, self._pivots, self._sector or [None] * self.n_tapered):
+            result += "symmetry {} : {}({}) sector {}\n".format(tau, p, q, s)
+        return result
+
+    @classmethod
+    def from_hamiltonian(cls, H: QubitHamiltonian, reference: typing.Union[BitString, int, 'QCircuit'] = None,
+                         sector: typing.List[int] = None, n_qubits: int = None) -> 'QubitTapering':
+        """
+        Find a maximal set of independent Z2 symmetries of the Hamiltonian
+        The symmetries are the kernel of the binary symplectic matrix of the Hamiltonian (over GF(2)),
+        from which a commuting subset is selected (all symmetries which only contain Z operators first)
+        :param H: the Hamiltonian
+        :param reference: reference basis state (BitString, integer or circuit of X gates) which defines the sector
+        :param sector: eigenvalues of the symmetries, alternative to reference
+        :param n_qubits: size of the register, defaults to the qubits of H and the reference
+        :return: the QubitTapering
+        """
+        if n_qubits is None:
+            n_qubits = H.n_qubits
+            if isinstance(reference, BitString):
+                n_qubits = max(n_qubits, reference.nbits)
+            elif reference is not None and hasattr(reference, "n_qubits"):
+                n_qubits = max(n_qubits, reference.n_qubits)
+        table = H.pauli_table.simplify(threshold=0.0, keep_order=False)
+        xbits, zbits = _bits(table, n_qubits)
+        # tau = (a, b) commutes with (x, z) if x.b + z.a = 0
+        kernel = _gf2_kernel(numpy.concatenate([xbits, zbits], axis=1))
+        symmetries = numpy.concatenate([kernel[:, n_qubits:], kernel[:, :n_qubits]], axis=1)
+        # in the [x|z] echelon form the rows without x bits span all Z-type symmetries
+        symmetries, _ = _gf2_rref(symmetries)
+        ztype = ~numpy.any(symmetries[:, :n_qubits], axis=1)
+        selected = [row for row in symmetries[ztype]]
+        for row in symmetries[~ztype]:
+            if all(cls._commute(row, other, n_qubits) for other in selected):
+                selected.append(row)
+
+        # pivots need to sit on different qubits, otherwise the sigma_i would not commute
+        while True:
+            rref, pivots = _gf2_rref(numpy.array(selected, dtype=bool).reshape(len(selected), 2 * n_qubits))
+            qubits = [p % n_qubits for p in pivots]
+            duplicates = [i for i in range(len(qubits)) if qubits[i] in qubits[:i]]
+            if not duplicates:
+                break
+            selected = [row for i, row in enumerate(rref) if i != duplicates[0]]
+
+        pivots = [(p % n_qubits, "Z" if p < n_qubits else "X") for p in pivots]
+        symmetries = _table(rref[:, :n_qubits], rref[:, n_qubits:], numpy.ones(len(rref)))
+        result = cls(symmetries=symmetries, pivots=pivots, n_qubits=n_qubits, sector=sector)
+        if reference is not None:
+            if sector is not None:
+                raise TequilaException("QubitTapering: pass either reference or sector, not both")
+            result.sector = result.sector_from_reference(reference)
+        return result
+
+    @staticmethod
+    def _commute(first: numpy.ndarray, second: numpy.ndarray, n_qubits: int) -> bool:
+        return not (numpy.sum(first[:n_qubits] & second[n_qubits:]) + numpy.sum(first[n_qubits:] & second[:n_qubits])) % 2
+
+    def _reference_bits(self, reference: typing.Union[BitString, int, 'QCircuit']) -> numpy.ndarray:
+        if isinstance(reference, numbers.Integral):
+            reference = BitString.from_int(integer=reference, nbits=self.n_qubits)
+        if isinstance(reference, BitString):
+            bits = numpy.zeros(max(self.n_qubits, reference.nbits), dtype=bool)
+            bits[:reference.nbits] = numpy.asarray(reference.array, dtype=bool)
+            return bits
+        bits = numpy.zeros(max(self.n_qubits, reference.n_qubits), dtype=bool)
+        for gate in reference.gates:
+            if gate.name != "X" or gate.is_controlled() or gate.is_parametrized():
+                raise TequilaException("QubitTapering: reference circuit can only contain X gates, found {}".format(gate))
+            bits[list(gate.target)] ^= True
+        return bits
+
+    def sector_from_reference(self, reference: typing.Union[BitString, int, 'QCircuit']) -> typing.List[int]:
+        """
+        :param reference: basis state given as BitString (qubit 0 is the first bit), integer or circuit of X gates
+        :return: eigenvalues of the symmetries for the reference state
+        """
+        bits = self._reference_bits(reference)
+        xbits, zbits = _bits(self._symmetries, len(bits))
+        if numpy.any(xbits):
+            raise TequilaException("QubitTapering: basis states are only eigenstates of symmetries with Z operators")
+        return [-1 if parity else 1 for parity in (numpy.sum(zbits & bits, axis=1) % 2).tolist()]
+
+    def clifford(self) -> typing.List[QubitHamiltonian]:
+        """
+        :return: the Clifford unitaries U_i = (sigma_i + tau_i)/sqrt(2), the Hamiltonian is transformed as U_i H U_i
+        """
+        sigmas = self._sigmas()
+        return [(QubitHamiltonian.from_pauli_table(sigma) + tau) * (1.0 / numpy.sqrt(2.0))
+                for sigma, tau in zip(sigmas, self.symmetries)]
+
+    def _sigmas(self) -> typing.List[PauliTable]:
+        result = []
+        for q, p in self._pivots:
+            bits = numpy.zeros((1, q + 1), dtype=bool)
+            bits[0, q] = True
+            empty = numpy.zeros_like(bits)
+            if p == "X":
+                result.append(_table(bits, empty, numpy.ones(1)))
+            else:
+                result.append(_table(empty, bits, numpy.ones(1)))
+        return result
+
+    def taper(self, H: QubitHamiltonian, sector: typing.List[int] = None) -> QubitHamiltonian:
+        """
+        :param H: Hamiltonian (or any operator) which commutes with all symmetries
+        :param sector: eigenvalues of the symmetries, defaults to the sector of this tapering
+        :return: the tapered Hamiltonian on n_qubits - n_tapered qubits
+        """
+        if sector is None:
+            sector = self._sector
+        if sector is None:
+            raise TequilaException("QubitTapering: no sector given, pass a reference or the sector explicitly")
+        table = H.pauli_table.simplify(threshold=0.0)
+        if len(table) == 0:
+            return QubitHamiltonian.zero()
+        if not numpy.all(table.commutes(self._symmetries)):
+            raise TequilaException("QubitTapering: operator does not commute with the symmetries:\n{}".format(H))
+        n_words = max(table.n_words, self._symmetries.n_words)
+        for i, sigma in enumerate(self._sigmas()):
+            tau = PauliTable(x=self._symmetries.x[i:i + 1], z=self._symmetries.z[i:i + 1], coeffs=numpy.ones(1))
+            # U P U = P if P commutes with sigma, and P tau sigma otherwise
+            tau_sigma = PauliTable(*PauliTable._product(*tau._with_words(n_words), tau.coeffs,
+                                                        *sigma._with_words(n_words), sigma.coeffs))
+            x, z = table._with_words(n_words)
+            anticommuting = ~table.commutes(sigma)[:, 0]
+            px, pz, pc = PauliTable._product(x[anticommuting], z[anticommuting], table.coeffs[anticommuting],
+                                             tau_sigma.x, tau_sigma.z, tau_sigma.coeffs)
+            x, z = x.copy(), z.copy()
+            x[anticommuting] = px
+            z[anticommuting] = pz
+            coeffs = numpy.array(table.coeffs, dtype=numpy.result_type(table.coeffs, pc))
+            coeffs[anticommuting] = pc
+            table = PauliTable(x=x, z=z, coeffs=coeffs)
+
+        n_bits = max(table.n_qubits, self.n_qubits)
+        xbits, zbits = _bits(table, n_bits)
+        coeffs = table.coeffs
+        for (q, p), s in zip(self._pivots, sector):
+            bits = xbits if p == "X" else zbits
+            if s == -1:
+                coeffs = numpy.where(bits[:, q], -coeffs, coeffs)
+            bits[:, q] = False
+        # the phases of the Clifford products are exact, hermitian operators stay real
+        if numpy.iscomplexobj(coeffs) and numpy.all(coeffs.imag == 0.0):
+            coeffs = coeffs.real
+        keep = [q for q in range(n_bits) if q not in set(self.tapered_qubits)]
+        table = _table(xbits[:, keep], zbits[:, keep], coeffs)
+        return QubitHamiltonian.from_pauli_table(table.simplify(threshold=0.0)).simplify()
+
+    def taper_state(self, reference: typing.Union[BitString, int, 'QCircuit']) -> BitString:
+        """
+        :param reference: basis state in the sector of this tapering (BitString, integer or circuit of X gates)
+        :return: the corresponding basis state of the tapered register
+        """
+        sector = self.sector_from_reference(reference)
+        if self._sector is not None and sector != self._sector:
+            raise TequilaException("QubitTapering: reference is in sector {}, expected {}".format(sector, self._sector))
+        bits = self._reference_bits(reference)
+        tapered = set(self.tapered_qubits)
+        return BitString.from_array([int(b) for q, b in enumerate(bits.tolist()) if q not in tapered])
+
+    def _taper_generator(self, generator: QubitHamiltonian) -> QubitHamiltonian:
+        # constant parts of tapered generators only contribute a global phase
+        _, generator = self.taper(generator).split_constant()
+        return generator
+
+    def taper_circuit(self, U: 'QCircuit') -> 'QCircuit':
+        """
+        Taper a circuit which prepares a basis state and (optionally) continues with gates
+        whose generators commute with the symmetries (exponentiated paulis, generalized rotations, trotterized gates)
+        :param U: the circuit, X gates are only allowed at the beginning (they prepare the reference state)
+        :return: circuit on the tapered register which prepares the transformed state (up to a global phase)
+        """
+        from tequila.circuit import QCircuit, gates
+        from tequila.circuit._gates_impl import RotationGateImpl, ExponentialPauliGateImpl, GaussianGateImpl, \
+            TrotterizedGateImpl, TrotterParameters
+
+        gate_list = list(U.gates)
+        n_reference = 0
+        while n_reference < len(gate_list) and gate_list[n_reference].name == "X" \
+                and not gate_list[n_reference].is_parametrized():
+            n_reference += 1
+        reference = QCircuit(gates=gate_list[:n_reference])
+        state = self.taper_state(reference)
+        result = QCircuit()
+        for q, b in enumerate(state.array):
+            if b == 1:
+                result += gates.X(target=q)
+
+        for gate in gate_list[n_reference:]:
+            if gate.is_controlled():
+                raise TequilaException("QubitTapering: can not taper controlled gate {}".format(gate))
+            if isinstance(gate, RotationGateImpl):
+                generator = self._taper_generator(QubitHamiltonian.from_string("{}({})".format("XYZ"[gate.axis],
+                                                                                                gate.target[0])))
+                if len(generator) > 0:
+                    result += gates.ExpPauli(paulistring=generator.paulistrings[0], angle=gate.parameter)
+            elif isinstance(gate, ExponentialPauliGateImpl):
+                generator = self._taper_generator(QubitHamiltonian.from_paulistrings([gate.paulistring]))
+                if len(generator) > 0:
+                    result += gates.ExpPauli(paulistring=generator.paulistrings[0], angle=gate.parameter)
+            elif isinstance(gate, GaussianGateImpl):
+                generator = self._taper_generator(gate.generator)
+                if len(generator) > 0:
+                    result += gates.GeneralizedRotation(angle=gate.parameter, generator=generator, shift=gate.shift,
+                                                        steps=gate.steps)
+            elif isinstance(gate, TrotterizedGateImpl):
+                generators = [self._taper_generator(g) for g in gate.generators]
+                angles = gate.angles
+                if angles is not None and not isinstance(angles, numbers.Number) and len(angles) == len(generators):
+                    angles = [a for a, g in zip(angles, generators) if len(g) > 0]
+                generators = [g for g in generators if len(g) > 0]
+                if len(generators) > 0:
+                    parameters = TrotterParameters(threshold=gate.threshold, join_components=gate.join_components,
+                                                   randomize_component_order=gate.randomize_component_order,
+                                                   randomize=gate.randomize)
+                    result += gates.Trotterized(generators=generators, steps=gate.steps, angles=angles,
+                                                parameters=parameters)
+            else:
+                raise TequilaException("QubitTapering: can not taper gate {}".format(gate))
+        return result
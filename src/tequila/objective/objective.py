@@ -50,6 +50,59 @@ class ExpectationValueImpl:
             self._hamiltonian = tuple(H)
         self._contraction = contraction
         self._shape = shape
+        # set for shifted variants, see the shifted function
+        self._template = None
+        self._shifts = None
+
+    def shifted(self, position: int, shift: numbers.Real) -> 'ExpectationValueImpl':
+        """
+        Create a variant of this expectation value where the parameter of a single gate is shifted by a constant
+        (as needed for the shift rule)
+        The variant shares the hamiltonian and all unchanged gates with this expectation value
+        and remembers its template, so that all variants of the same template can be simulated
+        with a single compiled circuit (see shift_template)
+        :param position: position of the parametrized gate in U
+        :param shift: constant which is added to the parameter of the gate
+        :return: the shifted expectation value, without contraction and shape
+        """
+        gate = copy.deepcopy(self.U.gates[position])
+        gate._parameter = assign_variable(gate.parameter + shift)
+        result = copy.copy(self)
+        result._unitary = self.U.replace_gates(positions=[position], circuits=[gate])
+        result._contraction = None
+        result._shape = None
+        if self._template is None:
+            result._template = self
+            result._shifts = {position: shift}
+        else:
+            result._template = self._template
+            result._shifts = dict(self._shifts)
+            result._shifts[position] = result._shifts.get(position, 0.0) + shift
+        return result
+
+    def shift_template(self) -> typing.Tuple['ExpectationValueImpl', typing.Dict[int, 'ShiftedParameter']]:
+        """
+        Create the template for the shifted variants of this expectation value
+        The parameters of all shiftable gates are replaced by ShiftedParameter objects,
+        the shifts are then passed together with the variables when the compiled template is called
+        :return: the template expectation value (without contraction and shape)
+                 and a dictionary which maps gate positions to their shifted parameters
+        """
+        positions = sorted(set(i for gates in self.U._parameter_map.values() for i, g in gates if hasattr(g, "shift")))
+        parameters = {}
+        gates = []
+        for i in positions:
+            gate = copy.copy(self.U.gates[i])
+            parameters[i] = ShiftedParameter(parameter=gate.parameter, name=i)
+            gate._parameter = parameters[i]
+            gates.append(gate)
+        template = copy.copy(self)
+        template._unitary = self.U.replace_gates(positions=positions, circuits=gates)
+        template._contraction = None
+        template._shape = None
+        template._template = None
+        template._shifts = None
+        return template, parameters
 
     def __call__(self, *args, **kwargs):
         raise TequilaException(
@@ -316,6 +369,71 @@ class Objective:
             ev_array.append(expval_result)
         return self.transformation(*ev_array)
 
+    def positional(self, keys: typing.List[typing.Hashable] = None,
+                   fixed: typing.Dict[typing.Hashable, numbers.Real] = None) -> "PositionalObjective":
+        """
+        Fast path for repeated evaluations of a compiled objective (e.g. in optimizers)
+        The returned function takes a vector of values in the order of keys
+        :param keys: the order of the variables in the vector, None means the order of self.extract_variables()
+        :param fixed: values for variables which are not part of the vector
+        :return: the objective as function of a parameter vector
+        """
+        return PositionalObjective(objective=self, keys=keys, fixed=fixed)
+
+
+class PositionalObjective:
+    """
+    A compiled Objective as function of a dense vector of values
+    The order of the variables is fixed when it is created (see Objective.positional)
+    and checked only once, every evaluation hands a plain dictionary to the compiled expectationvalues
+    without formatting and checking the variables again
+    """
+
+    @property
+    def keys(self) -> typing.Tuple["Variable", ...]:
+        return self._keys
+
+    def __init__(self, objective: Objective, keys: typing.List[typing.Hashable] = None,
+                 fixed: typing.Dict[typing.Hashable, numbers.Real] = None):
+        if keys is None:
+            keys = objective.extract_variables()
+        self.objective = objective
+        self._keys = tuple(assign_variable(k) for k in keys)
+        self._fixed = {}
+        if fixed is not None:
+            self._fixed = {assign_variable(k): v for k, v in fixed.items() if assign_variable(k) not in self._keys}
+        missing = [v for v in objective.extract_variables() if v not in self._keys and v not in self._fixed]
+        if len(missing) > 0:
+            raise TequilaException("PositionalObjective: no values for the variables {}".format(missing))
+
+        # evaluate every unique argument only once (like Objective.__call__)
+        unique = {}
+        self._functions = []
+        self._positions = []
+        for E in objective.args:
+            if E not in unique:
+                unique[E] = len(self._functions)
+                # compiled expectationvalues skip the checks of their __call__
+                self._functions.append(getattr(E, "evaluate", E))
+            self._positions.append(unique[E])
+        self._transformation = objective.transformation
+
+    def __call__(self, values, samples: int = None, *args, **kwargs):
+        """
+        :param values: vector with the values of the variables in the order of self.keys
+        :param samples: number of samples, None means full wavefunction simulation
+        :return: the value of the objective
+        """
+        if len(values) != len(self._keys):
+            raise TequilaException("PositionalObjective expects {} values, got {}".format(len(self._keys), len(values)))
+        variables = dict(zip(self._keys, values))
+        variables.update(self._fixed)
+        results = [f(variables, samples=samples, *args, **kwargs) for f in self._functions]
+        return self._transformation(*[results[i] for i in self._positions])
+
+    def __repr__(self):
+        return "PositionalObjective with keys {}".format(self._keys)
+
 
 def ExpectationValue(U, H, *args, **kwargs) -> Objective:
     """
@@ -453,6 +571,36 @@ class Variable:
         return str(self.name)
 
 
+class ShiftedParameter(Variable):
+    """
+    Internal Object, do not use from the outside
+    Parameter of a gate plus a constant shift which is only known at evaluation time
+    The shift is looked up in the variables dictionary with this object as key (no shift if it is not present)
+    Used to simulate all shifted variants of an expectation value with a single compiled circuit
+    :param parameter: the original parameter of the gate
+    :param name: name of the shift, unique within the circuit
+    """
+
+    def __init__(self, parameter, name: typing.Hashable):
+        super().__init__(name=name)
+        self._parameter = parameter
+
+    def __call__(self, variables, *args, **kwargs):
+        value = self._parameter(variables)
+        try:
+            return value + variables[self]
+        except KeyError:
+            return value
+
+    def extract_variables(self):
+        if hasattr(self._parameter, "extract_variables"):
+            return self._parameter.extract_variables()
+        return []
+
+    def __repr__(self):
+        return "{}+shift({})".format(self._parameter, self.name)
+
+
 class FixedVariable(float):
 
     def __call__(self, *args, **kwargs):
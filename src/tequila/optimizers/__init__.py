@@ -1,8 +1,15 @@
-from tequila.optimizers.optimizer_base import OptimizerHistory, Optimizer, TequilaOptimizerException
+from tequila.optimizers.optimizer_base import OptimizerHistory, ColumnarHistory, Optimizer, TequilaOptimizerException
 from tequila.optimizers.optimizer_scipy import OptimizerSciPy
 from tequila.optimizers.optimizer_gd import OptimizerGD
+from tequila.optimizers.optimizer_spsa import OptimizerSPSA
+from tequila.optimizers.optimizer_icans import OptimizerICANS
+from tequila.optimizers.optimizer_rotosolve import OptimizerRotosolve
 from tequila.optimizers.optimizer_scipy import minimize as minimize_scipy
 from tequila.optimizers.optimizer_gd import minimize as minimize_gd
+from tequila.optimizers.optimizer_spsa import minimize as minimize_spsa
+from tequila.optimizers.optimizer_icans import minimize as minimize_icans
+from tequila.optimizers.optimizer_rotosolve import minimize as minimize_rotosolve
+from tequila.optimizers.optimizer_multistart import minimize as minimize_multistart
 from dataclasses import dataclass
 
 import typing
@@ -15,7 +22,7 @@ class _Optimizers:
     methods: list = None
 
 
-SUPPORTED_OPTIMIZERS = ['scipy', 'phoenics', 'gpyopt', 'gd']
+SUPPORTED_OPTIMIZERS = ['scipy', 'phoenics', 'gpyopt', 'gd', 'spsa', 'icans', 'rotosolve']
 INSTALLED_OPTIMIZERS = {}
 INSTALLED_OPTIMIZERS['scipy'] = _Optimizers(cls=OptimizerSciPy,
                                             minimize=minimize_scipy,
@@ -23,6 +30,15 @@ INSTALLED_OPTIMIZERS['scipy'] = _Optimizers(cls=OptimizerSciPy,
 INSTALLED_OPTIMIZERS['gd'] = _Optimizers(cls=OptimizerGD,
                                          minimize=minimize_gd,
                                          methods=OptimizerGD.available_methods())
+INSTALLED_OPTIMIZERS['spsa'] = _Optimizers(cls=OptimizerSPSA,
+                                           minimize=minimize_spsa,
+                                           methods=OptimizerSPSA.available_methods())
+INSTALLED_OPTIMIZERS['icans'] = _Optimizers(cls=OptimizerICANS,
+                                            minimize=minimize_icans,
+                                            methods=OptimizerICANS.available_methods())
+INSTALLED_OPTIMIZERS['rotosolve'] = _Optimizers(cls=OptimizerRotosolve,
+                                                minimize=minimize_rotosolve,
+                                                methods=OptimizerRotosolve.available_methods())
 
 has_gpyopt = False
 try:
@@ -104,10 +120,15 @@ def minimize(method: str,
        examples are
             gradient = '2-point'
             gradient = {'method':'2-point', 'stepsize': 1.e-4}
+            gradient = {'method':'4-point', 'stepsize': 'auto', 'n_workers': 4}
             gradient = {'method':Callable, 'stepsize': 1.e-4}
             see optimizer_base.py for method examples
+            available stencils are '2-point', '2-point-forward', '2-point-backward', '4-point' and '6-point'
+            stepsize can be a number, a dictionary with one number per variable or 'auto'
+            with n_workers > 1 the stencil points are evaluated in parallel processes
 
         gradient = None: analytical gradients are compiled
+        (with backend='jax' and without samples they are computed by automatic differentiation instead)
 
 
     Returns
@@ -3,10 +3,39 @@ import numpy
 """
 Define Containers for SciPy usage
 """
-from tequila.objective import format_variable_dictionary
 from tequila.tools.qng import evaluate_qng
 
 
+class _DictFunction:
+    """
+    Evaluates objects without positional fast path (like numerical gradients) with a dictionary of all variables
+    """
+
+    def __init__(self, objective, param_keys, passive_angles=None):
+        self.objective = objective
+        self.param_keys = param_keys
+        self.passive_angles = passive_angles
+
+    def __call__(self, p, *args, **kwargs):
+        variables = dict(zip(self.param_keys, p))
+        if self.passive_angles is not None:
+            variables.update(self.passive_angles)
+        return self.objective(variables=variables, *args, **kwargs)
+
+
+def _positional(objective, param_keys, passive_angles=None):
+    """
+    :return: the objective (or dictionary of objectives) as function(s) of the parameter vector p
+    """
+    if objective is None:
+        return None
+    if hasattr(objective, "items"):
+        return {k: _positional(v, param_keys, passive_angles) for k, v in objective.items()}
+    if hasattr(objective, "positional"):
+        return objective.positional(keys=param_keys, fixed=passive_angles)
+    return _DictFunction(objective, param_keys, passive_angles)
+
+
 class _EvalContainer:
     """
     Container Class to access scipy and keep the optimization history
@@ -14,8 +43,10 @@ class _EvalContainer:
     """
 
     def __init__(self, objective, param_keys, passive_angles=None, samples=None, save_history=True,
-                 print_level: int = 3, backend_options=None):
+                 print_level: int = 3, backend_options=None, history_column=None):
         self.objective = objective
+        # the variable order is fixed once, no dictionaries are built for the evaluations
+        self.function = _positional(objective, param_keys, passive_angles)
         self.samples = samples
         self.param_keys = param_keys
         self.N = len(param_keys)
@@ -26,16 +57,20 @@ class _EvalContainer:
             self.backend_options = {}
         else:
             self.backend_options = backend_options
+        if history_column is None:
+            history_column = list
         if save_history:
-            self.history = []
-            self.history_angles = []
+            # lists, or columns of a ColumnarHistory for bounded memory
+            self.history = history_column()
+            self.history_angles = history_column()
 
     def __call__(self, p, *args, **kwargs):
-        angles = dict((self.param_keys[i], p[i]) for i in range(self.N))
-        if self.passive_angles is not None:
-            angles = {**angles, **self.passive_angles}
-        vars = format_variable_dictionary(angles)
-        E = self.objective(variables=vars, samples=self.samples, **self.backend_options)
+        E = self.function(p, samples=self.samples, **self.backend_options)
+        angles = None
+        if self.save_history or self.print_level > 2:
+            angles = dict(zip(self.param_keys, p))
+            if self.passive_angles is not None:
+                angles.update(self.passive_angles)
         if self.print_level > 2:
             print("E={:+2.8f}".format(E), " angles=", angles, " samples=", self.samples)
         elif self.print_level > 1:
@@ -53,14 +88,11 @@ class _GradContainer(_EvalContainer):
     """
 
     def __call__(self, p, *args, **kwargs):
-        dO = self.objective
+        dO = self.function
         dE_vec = numpy.zeros(self.N)
         memory = dict()
-        variables = dict((self.param_keys[i], p[i]) for i in range(len(self.param_keys)))
-        if self.passive_angles is not None:
-            variables = {**variables, **self.passive_angles}
         for i in range(self.N):
-            dE_vec[i] = dO[self.param_keys[i]](variables=variables, samples=self.samples, **self.backend_options)
+            dE_vec[i] = dO[self.param_keys[i]](p, samples=self.samples, **self.backend_options)
             memory[self.param_keys[i]] = dE_vec[i]
 
         self.history.append(memory)
@@ -70,10 +102,11 @@ class _GradContainer(_EvalContainer):
 class _QngContainer(_EvalContainer):
 
     def __init__(self, combos, param_keys, passive_angles=None, samples=None, save_history=True,
-                 backend_options=None):
+                 backend_options=None, history_column=None):
 
         super().__init__(objective=None, param_keys=param_keys, passive_angles=passive_angles,
-                         samples=samples, save_history=save_history,backend_options=backend_options)
+                         samples=samples, save_history=save_history, backend_options=backend_options,
+                         history_column=history_column)
 
         self.combos = combos
 
@@ -95,16 +128,13 @@ class _QngContainer(_EvalContainer):
 class _HessContainer(_EvalContainer):
 
     def __call__(self, p, *args, **kwargs):
-        ddO = self.objective
+        ddO = self.function
         ddE_mat = numpy.zeros(shape=[self.N, self.N])
         memory = dict()
-        variables = dict((self.param_keys[i], p[i]) for i in range(len(self.param_keys)))
-        if self.passive_angles is not None:
-            variables = {**variables, **self.passive_angles}
         for i in range(self.N):
             for j in range(i, self.N):
                 key = (self.param_keys[i], self.param_keys[j])
-                value = ddO[key](variables=variables, samples=self.samples, **self.backend_options)
+                value = ddO[key](p, samples=self.samples, **self.backend_options)
                 ddE_mat[i, j] = value
                 ddE_mat[j, i] = value
                 memory[key] = value
@@ -2,7 +2,7 @@
 BaseClss for Optimizers
 Suggestion, feel free to propose new things/changes
 """
-import typing, numbers, copy
+import typing, numbers, os, multiprocessing, concurrent.futures
 
 from tequila.utils.exceptions import TequilaException
 from tequila.simulators.simulator_api import compile, pick_backend
@@ -58,10 +58,11 @@ class OptimizerHistory:
         :param key: the key specifiying which gradient shall be extracted
         :return: dictionary with dictionary_key=iteration, dictionary_value=gradient[key]
         """
+        key = assign_variable(key)
         gradients = {}
         for i, d in enumerate(self.gradients):
             if key in d:
-                gradients[i] = d[assign_variable(key)]
+                gradients[i] = d[key]
         return gradients
 
     def extract_angles(self, key: str) -> typing.Dict[numbers.Integral, numbers.Real]:
@@ -69,10 +70,11 @@ class OptimizerHistory:
         :param key: the key specifiying which angle shall be extracted
         :return: dictionary with dictionary_key=iteration, dictionary_value=angle[key]
         """
+        key = assign_variable(key)
         angles = {}
         for i, d in enumerate(self.angles):
             if key in d:
-                angles[i] = d[assign_variable(key)]
+                angles[i] = d[key]
         return angles
 
     def plot(self,
@@ -136,13 +138,12 @@ class OptimizerHistory:
                 label = p
 
             if p == "energies":
-                data = getattr(self, "extract_" + p)()
-                plt.plot(list(data.keys()), list(data.values()), label=str(label), marker='o', linestyle='--')
+                x, y = self._plot_data(p)
+                plt.plot(x, y, label=str(label), marker='o', linestyle='--')
             else:
                 for k in keys[i]:
-                    data = getattr(self, "extract_" + p)(key=k)
-                    plt.plot(list(data.keys()), list(data.values()), label=str(label) + " " + str(k), marker='o',
-                             linestyle='--')
+                    x, y = self._plot_data(p, key=k)
+                    plt.plot(x, y, label=str(label) + " " + str(k), marker='o', linestyle='--')
 
         loc = 'best'
         if 'loc' in kwargs:
@@ -154,6 +155,303 @@ class OptimizerHistory:
             pickle.dump(fig, open(filename + ".pickle", "wb"))
             plt.savefig(fname=filename + ".pdf", **kwargs)
 
+    def _plot_data(self, property, key=None):
+        if key is None:
+            data = self.extract_energies()
+        else:
+            data = getattr(self, "extract_" + property)(key=key)
+        return list(data.keys()), list(data.values())
+
+
+class _HistoryColumn:
+    """
+    Append-only record of numbers or of dictionaries of numbers, used by ColumnarHistory
+    The values are stored as rows of a preallocated numpy array
+    Dictionaries are stored in the order of their keys, which is fixed by the first appended dictionary
+    (new keys add a column, missing keys are stored as NaN)
+    Every row remembers the number of the append (the iteration) it belongs to
+    Once max_length rows are in memory the column is either spilled to spill_dir (one npz file per chunk)
+    or downsampled: every second row is dropped and only every second append is stored from then on
+    The last appended value is always available as column.last
+    """
+
+    def __init__(self, name: str, max_length: int = None, spill_dir: str = None, capacity: int = 64):
+        if max_length is not None:
+            if max_length < 2:
+                raise TequilaOptimizerException("max_length of the history needs to be at least 2")
+            capacity = min(capacity, max_length)
+        self.name = name
+        self.max_length = max_length
+        self.spill_dir = spill_dir
+        self.keys = None
+        self.count = 0
+        self.stride = 1
+        self.last = None
+        self._capacity = capacity
+        self._scalar = None
+        self._index = {}
+        self._data = None
+        self._iterations = None
+        self._size = 0
+        self._chunks = []
+        self._spilled = 0
+
+    def append(self, value):
+        self.last = value
+        count = self.count
+        self.count += 1
+        if count % self.stride != 0:
+            return
+        row = self._to_row(value)
+        if self._size == len(self._iterations):
+            self._make_room()
+            if count % self.stride != 0:
+                return
+        self._data[self._size] = row
+        self._iterations[self._size] = count
+        self._size += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def _to_row(self, value):
+        if self._scalar is None:
+            self._scalar = not hasattr(value, "items")
+            self.keys = None if self._scalar else []
+            self._data = numpy.full((self._capacity, 1 if self._scalar else 0), numpy.nan)
+            self._iterations = numpy.zeros(self._capacity, dtype=numpy.int64)
+        if self._scalar:
+            return numpy.float64(value)
+        row = numpy.full(len(self.keys), numpy.nan)
+        for k, v in value.items():
+            j = self._index.get(k)
+            if j is None:
+                j = self._add_key(k)
+                row = numpy.append(row, numpy.nan)
+            row[j] = v
+        return row
+
+    def _add_key(self, key):
+        self._index[key] = len(self.keys)
+        self.keys.append(key)
+        self._data = numpy.hstack([self._data, numpy.full((len(self._data), 1), numpy.nan)])
+        return self._index[key]
+
+    def _make_room(self):
+        capacity = len(self._iterations)
+        if self.max_length is None or capacity < self.max_length:
+            capacity = 2 * capacity
+            if self.max_length is not None:
+                capacity = min(capacity, self.max_length)
+            data = numpy.full((capacity, self._data.shape[1]), numpy.nan)
+            data[:self._size] = self._data[:self._size]
+            iterations = numpy.zeros(capacity, dtype=numpy.int64)
+            iterations[:self._size] = self._iterations[:self._size]
+            self._data, self._iterations = data, iterations
+        elif self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            filename = os.path.join(self.spill_dir, "{}_{}_{}_{}.npz".format(self.name, os.getpid(), id(self),
+                                                                             len(self._chunks)))
+            numpy.savez(filename, data=self._data[:self._size], iterations=self._iterations[:self._size])
+            self._chunks.append(filename)
+            self._spilled += self._size
+            self._size = 0
+        else:
+            kept = (self._size + 1) // 2
+            self._data[:kept] = self._data[:self._size:2].copy()
+            self._iterations[:kept] = self._iterations[:self._size:2].copy()
+            self._size = kept
+            self.stride *= 2
+
+    def _blocks(self):
+        # all stored rows chunk by chunk, spilled chunks are padded to the current keys
+        width = 0 if self._data is None else self._data.shape[1]
+        for filename in self._chunks:
+            with numpy.load(filename) as chunk:
+                data = chunk["data"]
+                if data.shape[1] < width:
+                    data = numpy.hstack([data, numpy.full((len(data), width - data.shape[1]), numpy.nan)])
+                yield data, chunk["iterations"]
+        if self._data is not None:
+            yield self._data[:self._size], self._iterations[:self._size]
+
+    def to_array(self) -> numpy.ndarray:
+        """
+        :return: the stored values, one dimensional for numbers, (rows, keys) in the order of self.keys for dictionaries
+        """
+        blocks = [data for data, iterations in self._blocks()]
+        if len(blocks) == 0:
+            return numpy.zeros(0)
+        data = numpy.concatenate(blocks)
+        if self._scalar:
+            return data[:, 0]
+        return data
+
+    def indices(self) -> numpy.ndarray:
+        """
+        :return: the iterations (number of the append) of the stored values
+        """
+        blocks = [iterations for data, iterations in self._blocks()]
+        if len(blocks) == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate(blocks)
+
+    def extract(self, key) -> numpy.ndarray:
+        """
+        :param key: a key of the stored dictionaries
+        :return: the stored values of this key (NaN where it was missing)
+        """
+        if key not in self._index:
+            key = assign_variable(key)
+        if key not in self._index:
+            return numpy.full(len(self), numpy.nan)
+        return self.to_array()[:, self._index[key]]
+
+    def _from_row(self, row):
+        if self._scalar:
+            return float(row[0])
+        return {k: row[j] for j, k in enumerate(self.keys) if not numpy.isnan(row[j])}
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.to_array()
+        return self.to_array().astype(dtype)
+
+    def __len__(self):
+        return self._spilled + self._size
+
+    def __getitem__(self, item):
+        n = len(self)
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(n))]
+        if item < 0:
+            item += n
+        if item < 0 or item >= n:
+            raise IndexError("history index out of range")
+        if item >= self._spilled:
+            return self._from_row(self._data[item - self._spilled])
+        return self._from_row(self.to_array().reshape(n, -1)[item])
+
+    def __iter__(self):
+        for data, iterations in self._blocks():
+            for row in data:
+                yield self._from_row(row)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return "{}: {} of {} values stored".format(self.name, len(self), self.count)
+
+
+class _ColumnAttribute:
+    """
+    Attribute of ColumnarHistory, assigned lists (or arrays) are converted into columns
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        if not isinstance(value, _HistoryColumn):
+            column = instance.new_column(self.name)
+            column.extend(value)
+            value = column
+        instance.__dict__[self.name] = value
+
+
+class ColumnarHistory(OptimizerHistory):
+    """
+    OptimizerHistory with bounded memory
+    Energies are stored in numpy arrays, angles and gradients as matrices with one column per variable
+    (fixed order given by the first stored dictionary)
+    Entries are appended like in OptimizerHistory, iterating over the angles or gradients gives back dictionaries
+    The extract functions return arrays
+    Without max_length the arrays grow, with max_length at most max_length entries per property are kept in memory:
+    older entries are written to spill_dir if given, otherwise the history is downsampled
+    (every second entry is dropped and only every second iteration is stored from then on)
+    Used by the optimizers with history_options={'max_length': ..., 'spill_dir': ...}
+    """
+    energies = _ColumnAttribute()
+    gradients = _ColumnAttribute()
+    angles = _ColumnAttribute()
+    energies_calls = _ColumnAttribute()
+    gradients_calls = _ColumnAttribute()
+    angles_calls = _ColumnAttribute()
+
+    def __init__(self, max_length: int = None, spill_dir: str = None):
+        """
+        :param max_length: maximal number of entries per property kept in memory (None means unbounded)
+        :param spill_dir: directory to which full chunks of max_length entries are written instead of downsampling
+        """
+        self.max_length = max_length
+        self.spill_dir = spill_dir
+        for name in ["energies", "gradients", "angles", "energies_calls", "gradients_calls", "angles_calls"]:
+            setattr(self, name, self.new_column(name))
+
+    def new_column(self, name: str = "column") -> _HistoryColumn:
+        """
+        :return: an empty column with the memory options of this history
+        """
+        return _HistoryColumn(name=name, max_length=self.max_length, spill_dir=self.spill_dir)
+
+    @property
+    def iterations(self):
+        return self.energies.count
+
+    def extract_energies(self, *args, **kwargs) -> numpy.ndarray:
+        return self.energies.to_array()
+
+    def extract_gradients(self, key: str = None) -> numpy.ndarray:
+        """
+        :param key: the key specifiying which gradient shall be extracted
+        :return: array with the gradients of key, or matrix of all gradients (columns in the order of gradients.keys) if key is None
+        """
+        if key is None:
+            return self.gradients.to_array()
+        return self.gradients.extract(key)
+
+    def extract_angles(self, key: str = None) -> numpy.ndarray:
+        """
+        :param key: the key specifiying which angle shall be extracted
+        :return: array with the angles of key, or matrix of all angles (columns in the order of angles.keys) if key is None
+        """
+        if key is None:
+            return self.angles.to_array()
+        return self.angles.extract(key)
+
+    def extract_iterations(self, property: str = "energies") -> numpy.ndarray:
+        """
+        :param property: energies, angles or gradients
+        :return: the iterations to which the stored entries of the property belong
+        """
+        return getattr(self, property).indices()
+
+    def _plot_data(self, property, key=None):
+        if key is None:
+            values = self.extract_energies()
+        else:
+            values = getattr(self, "extract_" + property)(key=key)
+        iterations = self.extract_iterations(property)
+        mask = ~numpy.isnan(values)
+        return list(iterations[mask]), list(values[mask])
+
 
 class Optimizer:
     """
@@ -167,7 +465,12 @@ class Optimizer:
                  noise=None,
                  save_history: bool = True,
                  silent: typing.Union[bool, int] = False,
-                 print_level: int = 99, *args, **kwargs):
+                 print_level: int = 99,
+                 n_workers: int = None,
+                 checkpoint: str = None,
+                 checkpoint_every: int = 10,
+                 cache_dir: str = None,
+                 history_options: dict = None, *args, **kwargs):
         """
         :param backend: The quantum backend to use (None means autopick)
         :param backend_options: backend specific options can also be passed as keywords with `backend_optionname=...`
@@ -175,6 +478,13 @@ class Optimizer:
         :param samples: Number of Samples for the Quantum Backend takes (None means full wavefunction simulation)
         :param print_level: Allow customization in derived classes, is set to 0 if silent==True
         :param save_history: Save the optimization history in self.history
+        :param n_workers: Number of worker processes for batches of objective evaluations (None means sequential)
+        :param checkpoint: File to which the state of the optimization is written periodically (None means no checkpoints)
+        :param checkpoint_every: Write a checkpoint every checkpoint_every iterations
+        :param cache_dir: Directory of the persistent compilation cache (see tq.compile),
+        avoids compiling again when a run is resumed from a checkpoint
+        :param history_options: Keep the history in a ColumnarHistory initialized with these options
+        (like max_length and spill_dir), None means an OptimizerHistory of lists
         :silent: Silence printout
         """
 
@@ -215,15 +525,54 @@ class Optimizer:
 
         self.samples = samples
         self.save_history = save_history
+        self.history_options = history_options
         if save_history:
-            self.history = OptimizerHistory()
+            self.history = self.new_history()
         else:
             self.history = None
 
         self.noise = noise
+        self.n_workers = n_workers
+        self._batch_evaluator = None
+        self._jax_objective = None
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.cache_dir = cache_dir
+
+    def new_history(self) -> OptimizerHistory:
+        """
+        :return: an empty history, columnar if self.history_options are set
+        """
+        if self.history_options is None:
+            return OptimizerHistory()
+        return ColumnarHistory(**self.history_options)
 
     def reset_history(self):
-        self.history = OptimizerHistory()
+        self.history = self.new_history()
+
+    def evaluate_batch(self, objective, points: typing.List[typing.Dict[Variable, numbers.Real]],
+                       *args, **kwargs) -> numpy.ndarray:
+        """
+        Evaluates a compiled objective on a batch of points
+        Used by the gradient-free optimizers for all points proposed in one round
+        With self.n_workers > 1 the points are dispatched to a pool of worker processes
+        The pool is kept alive as long as the same objective is evaluated (see close_workers)
+        :param objective: the compiled objective
+        :param points: list of dictionaries with values for all variables of the objective
+        :return: array with the values of the objective at the points
+        """
+        if self._batch_evaluator is None or self._batch_evaluator.objective is not objective:
+            self.close_workers()
+            self._batch_evaluator = _BatchEvaluator(objective=objective, n_workers=self.n_workers)
+        return self._batch_evaluator(points, samples=self.samples, *args, **kwargs)
+
+    def close_workers(self):
+        """
+        Shut down the worker processes of evaluate_batch
+        """
+        if self._batch_evaluator is not None:
+            self._batch_evaluator.close()
+        self._batch_evaluator = None
 
     def __call__(self, objective: Objective,
                  variabeles: typing.List[Variable],
@@ -274,26 +623,117 @@ class Optimizer:
                        backend=self.backend,
                        backend_options=self.backend_options,
                        noise=self.noise,
+                       cache_dir=self.cache_dir,
                        *args, **kwargs)
 
+    def save_checkpoint(self, filename: str, variables: typing.Dict[Variable, numbers.Real], iteration: int,
+                        **state):
+        """
+        Write the state of the optimization to a compressed npz file
+        Contains the variables, the history (angles and gradients as arrays in the order of the variables),
+        the state of the numpy random number generator and the optimizer specific state
+        The file is replaced atomically, an interrupted write leaves the previous checkpoint intact
+        :param filename: the checkpoint file
+        :param variables: the current values of all variables
+        :param iteration: the number of completed iterations
+        :param state: optimizer specific state, given as numbers or numpy arrays
+        """
+        variables = format_variable_dictionary(variables)
+        keys = list(variables.keys())
+        # names can be arbitrary hashables (like tuples), stored one by one in an object array
+        names = numpy.empty(len(keys), dtype=object)
+        for i, k in enumerate(keys):
+            names[i] = k.name
+        data = {"variable_names": names,
+                "variable_values": numpy.asarray([variables[k] for k in keys], dtype=numpy.float64),
+                "iteration": numpy.asarray(iteration)}
+        if self.history is not None:
+            data["history_energies"] = numpy.asarray(self.history.energies, dtype=numpy.float64)
+            for name in ["angles", "gradients"]:
+                values = numpy.full((len(getattr(self.history, name)), len(keys)), numpy.nan)
+                for i, d in enumerate(getattr(self.history, name)):
+                    for j, k in enumerate(keys):
+                        if k in d:
+                            values[i, j] = d[k]
+                data["history_" + name] = values
+        rng_state = numpy.random.get_state()
+        data["rng_keys"] = rng_state[1]
+        data["rng_numbers"] = numpy.asarray(rng_state[2:], dtype=numpy.float64)
+        for k, v in state.items():
+            data["state_" + k] = numpy.asarray(v)
+
+        tmpname = "{}.{}.tmp".format(filename, os.getpid())
+        with open(tmpname, "wb") as f:
+            numpy.savez_compressed(f, **data)
+        os.replace(tmpname, filename)
+
+    def load_checkpoint(self, filename: str) -> dict:
+        """
+        Read a checkpoint written by save_checkpoint
+        Restores the history (if self.save_history) and the state of the numpy random number generator
+        :param filename: the checkpoint file
+        :return: dictionary with the variables, the number of completed iterations
+        and the optimizer specific state (under the key 'state')
+        """
+        with numpy.load(filename, allow_pickle=True) as data:
+            keys = [assign_variable(k) for k in data["variable_names"]]
+            variables = format_variable_dictionary(dict(zip(keys, data["variable_values"])))
+            if self.save_history and "history_energies" in data:
+                self.history = self.new_history()
+                self.history.energies = list(data["history_energies"])
+                self.history.angles = [format_variable_dictionary({k: v for k, v in zip(keys, row) if not numpy.isnan(v)})
+                                       for row in data["history_angles"]]
+                self.history.gradients = [{k: v for k, v in zip(keys, row) if not numpy.isnan(v)}
+                                          for row in data["history_gradients"]]
+            rng_numbers = data["rng_numbers"]
+            numpy.random.set_state(("MT19937", data["rng_keys"], int(rng_numbers[0]), int(rng_numbers[1]),
+                                    rng_numbers[2]))
+            state = {k[len("state_"):]: data[k] for k in data.files if k.startswith("state_")}
+            return {"variables": variables, "iteration": int(data["iteration"]), "state": state}
+
+    def write_checkpoint(self, iteration: int, variables: typing.Dict[Variable, numbers.Real], **state):
+        """
+        Convenience for the optimizers: save a checkpoint to self.checkpoint every self.checkpoint_every iterations
+        :param iteration: the number of completed iterations
+        """
+        if self.checkpoint is not None and iteration % self.checkpoint_every == 0:
+            self.save_checkpoint(filename=self.checkpoint, variables=variables, iteration=iteration, **state)
+
     def compile_gradient(self, objective: Objective,
                          variables: typing.List[Variable],
                          gradient=None,
                          *args, **kwargs) -> typing.Tuple[
         typing.Dict, typing.Dict]:
 
-        if gradient is None:
-            dO = {k: grad(objective=objective, variable=k, *args, **kwargs) for k in variables}
-            compiled_grad = {k: self.compile_objective(objective=dO[k], *args, **kwargs) for k in variables}
+        if gradient is None and self._use_autodiff():
+            # exact derivatives by automatic differentiation of the statevector simulation
+            # all components come from one evaluation of jax.grad at every point
+            dO = None
+            engine = self._autodiff_engine(objective)
+            compiled_grad = {k: _AutodiffComponent(engine=engine, index=(engine.keys.index(k),)) for k in variables}
+
+        elif gradient is None:
+            # all components are created from one compilation of the objective
+            # and the shared expectation values are compiled only once
+            dO = grad(objective=objective, variable=list(variables), *args, **kwargs)
+            expectationvalues = {}
+            compiled_grad = {k: self.compile_objective(objective=dO[k], expectationvalues=expectationvalues,
+                                                       *args, **kwargs) for k in variables}
 
-        elif isinstance(gradient, dict):
+        elif hasattr(gradient, "items"):
+            # dictionaries and Variables (see format_variable_dictionary)
             if all([isinstance(x, Objective) for x in gradient.values()]):
                 dO = gradient
                 compiled_grad = {k: self.compile_objective(objective=dO[k], *args, **kwargs) for k in variables}
             else:
                 dO = None
                 compiled = self.compile_objective(objective=objective)
-                compiled_grad = {k: _NumGrad(objective=compiled, variable=k, **gradient) for k in variables}
+                if callable(gradient.get("method", None)):
+                    compiled_grad = {k: _NumGrad(objective=compiled, variable=k, **gradient) for k in variables}
+                else:
+                    # all components are evaluated together as one batch of stencil points
+                    engine = _NumGradEngine(objective=compiled, variables=variables, **gradient)
+                    compiled_grad = {k: _NumGradComponent(engine=engine, variable=k) for k in variables}
         else:
             raise TequilaOptimizerException(
                 "unknown gradient instruction of type {} : {}".format(type(gradient), gradient))
@@ -311,7 +751,14 @@ class Optimizer:
         dO = grad_obj
         cdO = comp_grad_obj
 
-        if hessian is None:
+        if hessian is None and dO is None and self._use_autodiff() and self._jax_objective is not None:
+            ddO = None
+            engine = self._autodiff_engine()
+            compiled_hessian = {(k, l): _AutodiffComponent(engine=engine,
+                                                           index=(engine.keys.index(k), engine.keys.index(l)))
+                                for k in variables for l in variables}
+
+        elif hessian is None:
             if dO is None:
                 raise TequilaOptimizerException("Can not combine analytical Hessian with numerical Gradient\n"
                                                 "hessian instruction was: {}".format(hessian))
@@ -326,7 +773,7 @@ class Optimizer:
                     ddO[(l, k)] = ddO[(k, l)]
                     compiled_hessian[(l, k)] = compiled_hessian[(k, l)]
 
-        elif isinstance(hessian, dict):
+        elif hasattr(hessian, "items"):
             if all([isinstance(x, Objective) for x in hessian.values()]):
                 ddO = hessian
                 compiled_hessian = {k: self.compile_objective(objective=ddO[k], *args, **kwargs) for k in
@@ -343,60 +790,315 @@ class Optimizer:
 
         return ddO, compiled_hessian
 
+    def _use_autodiff(self) -> bool:
+        return self.backend == "jax" and self.samples is None and self.noise is None
+
+    def _autodiff_engine(self, objective: Objective = None):
+        """
+        The objective as JaxObjective (see simulator_jax), created once and shared by gradient and Hessian
+        """
+        from tequila.simulators.simulator_jax import JaxObjective
+        if objective is not None:
+            self._jax_objective = JaxObjective(objective=self.compile_objective(objective=objective))
+        return self._jax_objective
+
     def __repr__(self):
         infostring = "Optimizer: {} \n".format(str(type(self)))
         infostring += "{:15} : {}\n".format("backend", self.backend)
         infostring += "{:15} : {}\n".format("backend_options", self.backend_options)
         infostring += "{:15} : {}\n".format("samples", self.samples)
         infostring += "{:15} : {}\n".format("save_history", self.save_history)
+        if self.history_options is not None:
+            infostring += "{:15} : {}\n".format("history", self.history_options)
         infostring += "{:15} : {}\n".format("noise", self.noise)
+        infostring += "{:15} : {}\n".format("n_workers", self.n_workers)
+        if self.checkpoint is not None:
+            infostring += "{:15} : {} every {} iterations\n".format("checkpoint", self.checkpoint,
+                                                                     self.checkpoint_every)
         return infostring
 
 
+# stencils for numerical derivatives
+# offsets of the points in units of the stepsize, coefficients of the function values and order of the error
+_STENCILS = {
+    "2-point": ((0.5, -0.5), (1.0, -1.0), 2),
+    "2-point-forward": ((1.0, 0.0), (1.0, -1.0), 1),
+    "2-point-backward": ((0.0, -1.0), (1.0, -1.0), 1),
+    "4-point": ((2.0, 1.0, -1.0, -2.0), (-1.0 / 12.0, 8.0 / 12.0, -8.0 / 12.0, 1.0 / 12.0), 4),
+    "6-point": ((3.0, 2.0, 1.0, -1.0, -2.0, -3.0),
+                (1.0 / 60.0, -9.0 / 60.0, 45.0 / 60.0, -45.0 / 60.0, 9.0 / 60.0, -1.0 / 60.0), 6),
+}
+
+
+def _get_stencil(method) -> tuple:
+    """
+    :param method: name of the stencil (see _STENCILS) or tuple of offsets and coefficients
+    :return: tuple of offsets, coefficients and order of the error
+    """
+    if method is None:
+        method = "2-point"
+    if hasattr(method, "lower"):
+        if method.lower() not in _STENCILS:
+            raise TequilaOptimizerException(
+                "unknown stencil {} for numerical gradients, available are {}".format(method, list(_STENCILS.keys())))
+        return _STENCILS[method.lower()]
+    offsets, coefficients = tuple(float(x) for x in method[0]), tuple(float(x) for x in method[1])
+    if len(offsets) != len(coefficients):
+        raise TequilaOptimizerException(
+            "stencil needs as many coefficients as offsets, got {} and {}".format(offsets, coefficients))
+    # the error order of custom stencils is unknown, assume the one of the symmetric 2-point stencil
+    return offsets, coefficients, 2
+
+
+def _get_stepsizes(stepsize, variables, values, order) -> numpy.ndarray:
+    """
+    :param stepsize: a number, a dictionary with one number per variable or 'auto'
+    'auto' balances truncation and rounding errors with eps^(1/(order+1)) scaled by the magnitude of the values
+    :param variables: the variables of the gradient
+    :param values: the values of the variables at the current point
+    :param order: the order of the error of the stencil
+    :return: array of stepsizes ordered like variables
+    """
+    if stepsize is None:
+        stepsize = 1.e-4
+    if hasattr(stepsize, "lower"):
+        if stepsize.lower() != "auto":
+            raise TequilaOptimizerException("unknown stepsize instruction {}".format(stepsize))
+        eps = numpy.finfo(numpy.float64).eps
+        return eps ** (1.0 / (order + 1)) * numpy.maximum(1.0, numpy.abs(values))
+    if hasattr(stepsize, "items"):
+        stepsize = format_variable_dictionary(stepsize)
+        return numpy.asarray([stepsize[k] for k in variables], dtype=numpy.float64)
+    return numpy.full(len(variables), float(stepsize))
+
+
+# compiled objective of forked worker processes, set once when the worker starts
+_worker_objective = None
+
+
+def _initialize_worker(objective):
+    global _worker_objective
+    _worker_objective = objective
+    # forked workers inherit the random state of the parent and would draw identical samples
+    numpy.random.seed()
+
+
+def _evaluate_in_worker(variables, samples, kwargs):
+    return float(_worker_objective(variables=variables, samples=samples, **kwargs))
+
+
+class _BatchEvaluator:
+    """
+    Evaluates a compiled objective on a list of points (variable dictionaries)
+    With n_workers > 1 the points are dispatched to a pool of forked worker processes
+    which receive the compiled objective once when they start
+    Falls back to sequential evaluation if fork is not available
+    or if called inside a worker process (nested numerical derivatives)
+    Should not be used outside of optimizers
+    """
+
+    # sets up a worker with self.objective
+    _initializer = staticmethod(_initialize_worker)
+
+    def __init__(self, objective, n_workers: int = None):
+        self.objective = objective
+        self.n_workers = n_workers
+        self._pool = None
+        self._pid = None
+
+    def _get_pool(self):
+        if self._pool is not None and self._pid != os.getpid():
+            # inherited by a forked process, the worker threads of the pool do not exist here
+            return None
+        if self._pool is None:
+            try:
+                context = multiprocessing.get_context("fork")
+            except ValueError:
+                return None
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.n_workers, mp_context=context,
+                                                                initializer=self._initializer,
+                                                                initargs=(self.objective,))
+            self._pid = os.getpid()
+        return self._pool
+
+    def __call__(self, points: typing.List[dict], samples: int = None, *args, **kwargs) -> numpy.ndarray:
+        pool = None
+        if self.n_workers is not None and self.n_workers > 1 and len(points) > 1:
+            pool = self._get_pool()
+        if pool is None:
+            values = [self.objective(variables=p, samples=samples, **kwargs) for p in points]
+        else:
+            n = len(points)
+            values = list(pool.map(_evaluate_in_worker, points, [samples] * n, [kwargs] * n))
+        return numpy.asarray(values, dtype=numpy.float64)
+
+    def close(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown()
+        self._pool = None
+
+    def __del__(self):
+        self.close()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_pool"] = None
+        state["_pid"] = None
+        return state
+
+
+class _NumGradEngine:
+    """
+    Numerical Gradient with respect to several variables
+    All stencil points are collected in one parameter matrix (one row per point)
+    and evaluated as one batch, the unshifted point of one-sided stencils is evaluated only once
+    Should not be used outside of optimizers
+    """
+
+    def __init__(self, objective, variables, stepsize=None, method=None, n_workers: int = None):
+        """
+        :param objective: the compiled objective
+        :param variables: the variables of the gradient
+        :param stepsize: a number, a dictionary with one number per variable or 'auto'
+        :param method: name of the stencil or tuple of offsets and coefficients (in units of the stepsize)
+        :param n_workers: number of worker processes evaluating the points (None: sequential)
+        """
+        self.objective = objective
+        self.variables = [assign_variable(k) for k in variables]
+        self.index = {k: i for i, k in enumerate(self.variables)}
+        self.stepsize = stepsize
+        offsets, coefficients, self.order = _get_stencil(method)
+        self.center = sum([c for o, c in zip(offsets, coefficients) if o == 0.0])
+        self.shifts = [(o, c) for o, c in zip(offsets, coefficients) if o != 0.0]
+        self.evaluator = _BatchEvaluator(objective=objective, n_workers=n_workers)
+        self._cache_key = None
+        self._cache = None
+        self._delivered = set()
+
+    def parameter_matrix(self, values) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        :param values: values of self.variables at the point where the gradient is evaluated
+        :return: matrix with all stencil points as rows and the stepsizes
+        """
+        values = numpy.asarray(values, dtype=numpy.float64)
+        steps = _get_stepsizes(self.stepsize, self.variables, values, self.order)
+        blocks = [values + o * numpy.diag(steps) for o, c in self.shifts]
+        if self.center != 0.0:
+            blocks = [values.reshape(1, -1)] + blocks
+        return numpy.vstack(blocks), steps
+
+    def __call__(self, variables, samples: int = None, *args, **kwargs) -> numpy.ndarray:
+        variables = format_variable_dictionary(variables)
+        values = [variables[k] for k in self.variables]
+        matrix, steps = self.parameter_matrix(values)
+        points = [{**variables, **dict(zip(self.variables, row))} for row in matrix]
+        energies = self.evaluator(points, samples=samples, **kwargs)
+        n = len(self.variables)
+        gradient = numpy.zeros(n)
+        if self.center != 0.0:
+            gradient += self.center * energies[0]
+            energies = energies[1:]
+        for i, (o, c) in enumerate(self.shifts):
+            gradient += c * energies[i * n:(i + 1) * n]
+        return gradient / steps
+
+    def evaluate_component(self, variable, variables, samples: int = None, *args, **kwargs):
+        """
+        Evaluates the full gradient once per point and hands out the components
+        A component that is requested twice at the same point is evaluated again (new samples)
+        """
+        variables = format_variable_dictionary(variables)
+        key = (frozenset((k, float(v)) for k, v in variables.items()), samples)
+        if key != self._cache_key or variable in self._delivered:
+            self._cache = self(variables, samples=samples, **kwargs)
+            self._cache_key = key
+            self._delivered = set()
+        self._delivered.add(variable)
+        return self._cache[self.index[variable]]
+
+    def count_expectationvalues(self, *args, **kwargs):
+        return self.objective.count_expectationvalues(*args, **kwargs)
+
+
+class _NumGradComponent:
+    """
+    Component of a _NumGradEngine
+    Should not be used outside of optimizers
+    """
+
+    def __init__(self, engine: _NumGradEngine, variable):
+        self.engine = engine
+        self.variable = assign_variable(variable)
+
+    def __call__(self, variables, *args, **kwargs):
+        return self.engine.evaluate_component(self.variable, variables, *args, **kwargs)
+
+    def count_expectationvalues(self, *args, **kwargs):
+        return self.engine.count_expectationvalues(*args, **kwargs)
+
+
+class _AutodiffComponent:
+    """
+    Component of the gradient (index of length 1) or Hessian (index of length 2) of a JaxObjective
+    Should not be used outside of optimizers
+    """
+
+    def __init__(self, engine, index: typing.Tuple[int, ...]):
+        self.engine = engine
+        self.index = index
+
+    def __call__(self, variables, *args, **kwargs):
+        return self.engine.derivative(variables, self.index)
+
+    def count_expectationvalues(self, *args, **kwargs):
+        return self.engine.count_expectationvalues(*args, **kwargs)
+
+
 class _NumGrad:
     """
-    Numerical Gradient
+    Numerical Gradient with respect to a single variable
     Should not be used outside of optimizers
     Can't interact with the current tequila structures
     """
 
-    def __init__(self, objective, variable, stepsize, method=None):
+    def __init__(self, objective, variable, stepsize=None, method=None, n_workers: int = None):
         self.objective = objective
-        self.variable = variable
+        self.variable = assign_variable(variable)
         self.stepsize = stepsize
-        if method is None or method == "2-point":
-            self.method = self.symmetric_two_point_stencil
-        elif method is None or method == "2-point-forward":
-            self.method = self.forward_two_point_stencil
-        elif method is None or method == "2-point-backward":
-            self.method = self.backward_two_point_stencil
-        else:
+        if callable(method):
             self.method = method
+            self.engine = None
+        else:
+            self.method = self.stencil_derivative
+            self.engine = _NumGradEngine(objective=objective, variables=[self.variable], stepsize=stepsize,
+                                         method=method, n_workers=n_workers)
+
+    def stencil_derivative(self, obj, vars, key, step, *args, **kwargs):
+        return self.engine(vars, *args, **kwargs)[0]
 
     @staticmethod
     def symmetric_two_point_stencil(obj, vars, key, step, *args, **kwargs):
-        left = copy.deepcopy(vars)
+        left = {**vars}
         left[key] += step / 2
-        right = copy.deepcopy(vars)
+        right = {**vars}
         right[key] -= step / 2
         return 1.0 / step * (obj(left, *args, **kwargs) - obj(right, *args, **kwargs))
 
     @staticmethod
     def forward_two_point_stencil(obj, vars, key, step, *args, **kwargs):
-        left = copy.deepcopy(vars)
+        left = {**vars}
         left[key] += step
-        right = copy.deepcopy(vars)
-        return 1.0 / step * (obj(left, *args, **kwargs) - obj(right, *args, **kwargs))
+        return 1.0 / step * (obj(left, *args, **kwargs) - obj(vars, *args, **kwargs))
 
     @staticmethod
     def backward_two_point_stencil(obj, vars, key, step, *args, **kwargs):
-        left = copy.deepcopy(vars)
-        right = copy.deepcopy(vars)
+        right = {**vars}
         right[key] -= step
-        return 1.0 / step * (obj(left, *args, **kwargs) - obj(right, *args, **kwargs))
+        return 1.0 / step * (obj(vars, *args, **kwargs) - obj(right, *args, **kwargs))
 
     def __call__(self, variables, *args, **kwargs):
-        return self.method(self.objective, variables, self.variable, self.stepsize, *args, **kwargs)
+        return self.method(self.objective, format_variable_dictionary(variables), self.variable, self.stepsize, *args,
+                           **kwargs)
 
     def count_expectationvalues(self, *args, **kwargs):
         return self.objective.count_expectationvalues(*args, **kwargs)
@@ -77,6 +77,7 @@ class OptimizerGD(Optimizer):
                  reset_history: bool = True,
                  method_options: dict = None,
                  gradient: str = None,
+                 resume_from: str = None,
                  *args, **kwargs) -> GDReturnType:
         """
         Optimizes with a variation of gradient descent and gives back the optimized angles
@@ -87,12 +88,18 @@ class OptimizerGD(Optimizer):
         :param initial_values: initial values for the objective
         :param variables: which variables to optimize over. Default None: all the variables of the objective.
         :param reset_history: reset the history before optimization starts (has no effect if self.save_history is False)
+        :param resume_from: checkpoint file (see Optimizer.save_checkpoint) from which the optimization is continued
         :return: tuple of optimized energy ,optimized angles and scipy output
         """
 
         if self.save_history and reset_history:
             self.reset_history()
 
+        checkpoint = None
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            initial_values = checkpoint["variables"]
+
         active_angles, passive_angles, variables = self.initialize_variables(objective, initial_values, variables)
         v = {**active_angles, **passive_angles}
 
@@ -103,15 +110,28 @@ class OptimizerGD(Optimizer):
         if maxiter is None:
             maxiter = self.maxiter
 
+        start = 0
+        if checkpoint is not None:
+            state = checkpoint["state"]
+            start = checkpoint["iteration"]
+            s = id(comp)
+            self.moments_lookup[s] = (state["first"], state["second"])
+            self.moments_trajectory[s] = [self.moments_lookup[s]]
+            self.step_lookup[s] = int(state["step"])
+
         ### the actual algorithm acts here:
         e = comp(v, samples=self.samples)
         self.history.energies.append(e)
         self.history.angles.append(v)
         best = e
         best_angles = v
+        if checkpoint is not None and checkpoint["state"]["best"] < best:
+            best = float(checkpoint["state"]["best"])
+            best_angles = {**v, **dict(zip(active_angles.keys(), checkpoint["state"]["best_values"]))}
         v = self.step(comp, v)
         last = e
-        for step in range(1, maxiter):
+        self.write_checkpoint(start + 1, v, **self.checkpoint_state(comp, best, best_angles))
+        for step in range(start + 1, maxiter):
             e = comp(v, samples=self.samples)
             self.history.energies.append(e)
             self.history.angles.append(v)
@@ -136,6 +156,7 @@ class OptimizerGD(Optimizer):
             ### get new parameters with self.step!
             v = self.step(comp, v)
             last = e
+            self.write_checkpoint(step + 1, v, **self.checkpoint_state(comp, best, best_angles))
         E_final, angles_final = best, best_angles
         return GDReturnType(energy=E_final, angles=format_variable_dictionary(angles_final), history=self.history,
                             moments=self.moments_trajectory[id(comp)])
@@ -181,6 +202,15 @@ class OptimizerGD(Optimizer):
         self.step_lookup[ostring] = 0
         return comp
 
+    def checkpoint_state(self, objective, best, best_angles) -> dict:
+        """
+        :return: the state of the optimizer for the compiled objective as needed by save_checkpoint
+        """
+        s = id(objective)
+        first, second = self.moments_lookup[s]
+        return {"first": first, "second": second, "step": self.step_lookup[s], "best": best,
+                "best_values": [best_angles[k] for k in self.active_key_lookup[s]]}
+
     def step(self, objective, parameters):
         s = id(objective)
         try:
@@ -418,6 +448,11 @@ def minimize(objective: Objective,
              beta: float = 0.9,
              rho: float = 0.999,
              epsilon: float = 1. * 10 ** (-7),
+             checkpoint: str = None,
+             checkpoint_every: int = 10,
+             resume_from: str = None,
+             cache_dir: str = None,
+             history_options: dict = None,
              *args,
              **kwargs) -> GDReturnType:
     """
@@ -468,6 +503,21 @@ def minimize(objective: Objective,
     save_history: bool:
         (Default value = True)
         Save the history throughout the optimization
+    checkpoint: str:
+        (Default value = None)
+        file to which variables, momenta, history and random state are written every checkpoint_every iterations
+    checkpoint_every: int:
+        (Default value = 10)
+        iterations between two checkpoints
+    resume_from: str:
+        (Default value = None)
+        checkpoint file from which the optimization is continued
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile), avoids compiling again when resuming
+    history_options: dict:
+        (Default value = None)
+        keep the history in a ColumnarHistory with these options (max_length, spill_dir) to bound its memory
 
 
     optional kwargs may include beta, beta2, and rho, parameters which affect (but do not need to be altered) the various
@@ -490,9 +540,14 @@ def minimize(objective: Objective,
                             samples=samples, backend=backend,
                             noise=noise, backend_options=backend_options,
                             maxiter=maxiter,
-                            silent=silent)
+                            silent=silent,
+                            checkpoint=checkpoint,
+                            checkpoint_every=checkpoint_every,
+                            cache_dir=cache_dir,
+                            history_options=history_options)
     return optimizer(objective=objective,
                      maxiter=maxiter,
                      gradient=gradient,
                      initial_values=initial_values,
-                     variables=variables, *args, **kwargs)
+                     variables=variables,
+                     resume_from=resume_from, *args, **kwargs)
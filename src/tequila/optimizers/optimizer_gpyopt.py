@@ -37,10 +37,14 @@ class OptimizerGpyOpt(Optimizer):
         return ['lbfgs', 'direct', 'cma']
 
     def __init__(self, maxiter=100, backend=None, save_history=True, minimize=True,
-                 samples=None, noise=None, backend_options=None, silent=False):
+                 samples=None, noise=None, backend_options=None, silent=False, n_workers=None, batch_size=None):
         self._minimize = minimize
         super().__init__(backend=backend, maxiter=maxiter, samples=samples, save_history=save_history,
-                         noise=noise, backend_options=backend_options, silent=silent)
+                         noise=noise, backend_options=backend_options, silent=silent, n_workers=n_workers)
+        if batch_size is None:
+            # one proposal per worker in every round
+            batch_size = 1 if n_workers is None else n_workers
+        self.batch_size = batch_size
 
     def get_domain(self, objective, passive_angles=None) -> typing.List[typing.Dict]:
         op = objective.extract_variables()
@@ -51,13 +55,16 @@ class OptimizerGpyOpt(Optimizer):
         return [{'name': v, 'type': 'continuous', 'domain': (0, 2 * np.pi)} for v in op]
 
     def get_object(self, func, domain, method) -> GPyOpt.methods.BayesianOptimization:
+        if self.batch_size > 1:
+            # batches of points proposed with local penalization
+            return BayesianOptimization(f=func, domain=domain, acquisition=method,
+                                        batch_size=self.batch_size, evaluator_type='local_penalization')
         return BayesianOptimization(f=func, domain=domain, acquisition=method)
 
     def construct_function(self, objective, passive_angles=None) -> typing.Callable:
-        return lambda arr: objective(backend=self.backend,
-                                     variables=array_to_objective_dict(objective, arr, passive_angles),
-                                     samples=self.samples,
-                                     noise=self.noise)
+        # GPyOpt passes all points of one batch as rows of arr and expects a column of values
+        return lambda arr: self.evaluate_batch(objective, [self.redictify(row, objective, passive_angles)
+                                                           for row in np.atleast_2d(arr)]).reshape(-1, 1)
 
     def redictify(self, arr, objective, passive_angles=None) -> typing.Dict:
         op = objective.extract_variables()
@@ -91,6 +98,7 @@ class OptimizerGpyOpt(Optimizer):
         f = self.construct_function(O, passive_angles)
         opt = self.get_object(f, dom, method)
         opt.run_optimization(self.maxiter, verbosity=not self.silent)
+        self.close_workers()
         if self.save_history:
             self.history.energies = opt.get_evaluations()[1].flatten()
             self.history.angles = [self.redictify(v, objective, passive_angles) for v in opt.get_evaluations()[0]]
@@ -108,6 +116,8 @@ def minimize(objective: Objective,
              noise=None,
              method: str = 'lbfgs',
              silent: bool = False,
+             n_workers: int = None,
+             batch_size: int = None,
              *args,
              **kwargs
              ) -> GPyOptReturnType:
@@ -137,6 +147,12 @@ def minimize(objective: Objective,
     method: str:
          (Default value = 'lbfgs')
          method of acquisition. Allowed arguments are 'lbfgs', 'DIRECT', and 'CMA'
+    n_workers: int:
+         (Default value = None)
+         number of worker processes which evaluate the points of one batch in parallel (None means sequential)
+    batch_size: int:
+         (Default value = None)
+         number of points proposed per iteration, defaults to n_workers
 
     Returns
     -------
@@ -145,7 +161,8 @@ def minimize(objective: Objective,
 
     optimizer = OptimizerGpyOpt(samples=samples, backend=backend, maxiter=maxiter,
                                 backend_options=backend_options,
-                                noise=noise, silent=silent)
+                                noise=noise, silent=silent,
+                                n_workers=n_workers, batch_size=batch_size)
     return optimizer(objective=objective, initial_values=initial_values,
                      variables=variables,
                      method=method
@@ -0,0 +1,331 @@
+import numpy, typing, numbers
+from tequila.objective import Objective
+from tequila.objective.objective import Variable, format_variable_dictionary
+from .optimizer_base import Optimizer, TequilaOptimizerException
+from collections import namedtuple
+from tequila.circuit.noise import NoiseModel
+
+ICANSReturnType = namedtuple('ICANSReturnType', 'energy angles history shots')
+
+
+class OptimizerICANS(Optimizer):
+    """
+    Gradient descent with adaptive shots per gradient component
+    (iCANS, Kübler, Arrasmith, Cincio and Coles, Quantum 4, 263 (2020))
+    Every gradient component is sampled with its own number of shots,
+    chosen from running averages of the component and of its variance such that
+    the expected gain per shot is maximal: shots are spent where the signal to noise ratio is low
+    The optimization stops after maxiter iterations or when the shot budget is spent
+    """
+
+    @classmethod
+    def available_methods(cls):
+        """:return: All tested available methods"""
+        return ['icans']
+
+    def __init__(self, maxiter=100,
+                 lr: numbers.Real = None,
+                 lipschitz: numbers.Real = None,
+                 min_shots: int = 2,
+                 repetitions: int = 2,
+                 mu: numbers.Real = 0.99,
+                 bias: numbers.Real = 1.e-6,
+                 shot_budget: int = None,
+                 samples=None,
+                 backend=None,
+                 backend_options=None,
+                 noise=None,
+                 silent=True,
+                 **kwargs):
+        """
+        :param lr: the learning rate, has to be smaller than 2/lipschitz, defaults to 1/lipschitz
+        :param lipschitz: Lipschitz constant of the gradient, defaults to the sum of the absolute coefficients
+        of all hamiltonians in the objective (bound for sums of expectation values)
+        :param min_shots: minimal number of shots per gradient component
+        :param repetitions: every gradient component is evaluated as mean of this many repetitions
+        with equal shares of its shots, their spread estimates the variance (needs at least 2)
+        :param mu: weight of the old values in the running averages
+        :param bias: regularization of the shot formula for vanishing gradients
+        :param shot_budget: stop when this many shots are spent (None: no budget)
+        :param samples: shots of the energy evaluated in every iteration
+        See the Optimizer class for all other parameters to initialize
+        """
+        super().__init__(maxiter=maxiter, samples=samples,
+                         backend=backend, backend_options=backend_options,
+                         noise=noise,
+                         **kwargs)
+        if samples is None:
+            raise TequilaOptimizerException("adaptive shot optimization needs samples")
+        if repetitions < 2:
+            raise TequilaOptimizerException("need at least 2 repetitions to estimate variances, got {}".format(repetitions))
+        self.silent = silent
+        self.lr = lr
+        self.lipschitz = lipschitz
+        self.min_shots = min_shots
+        self.repetitions = repetitions
+        self.mu = mu
+        self.bias = bias
+        self.shot_budget = shot_budget
+        assert all([k > .0 for k in [min_shots, mu, bias]])
+
+    def __call__(self, objective: Objective,
+                 maxiter: int = None,
+                 initial_values: typing.Dict[Variable, numbers.Real] = None,
+                 variables: typing.List[Variable] = None,
+                 reset_history: bool = True,
+                 resume_from: str = None,
+                 *args, **kwargs) -> ICANSReturnType:
+        """
+        Optimizes with iCANS and gives back the optimized angles
+        :param objective: The tequila Objective to minimize
+        :param maxiter: how many iterations to run, at maximum.
+        :param initial_values: initial values for the objective
+        :param variables: which variables to optimize over. Default None: all the variables of the objective.
+        :param reset_history: reset the history before optimization starts (has no effect if self.save_history is False)
+        :param resume_from: checkpoint file (see Optimizer.save_checkpoint) from which the optimization is continued
+        :return: tuple of final energy, final angles, history and the number of spent shots
+        """
+
+        if self.save_history and reset_history:
+            self.reset_history()
+
+        start = 0
+        checkpoint = None
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            initial_values = checkpoint["variables"]
+            start = checkpoint["iteration"]
+
+        if maxiter is None:
+            maxiter = self.maxiter
+
+        active_angles, passive_angles, variables = self.initialize_variables(objective, initial_values, variables)
+        keys = list(active_angles.keys())
+        v = {**active_angles, **passive_angles}
+        comp = self.compile_objective(objective=objective)
+        dO, comp_grad = self.compile_gradient(objective=objective, variables=keys)
+
+        lipschitz = self.lipschitz
+        if lipschitz is None:
+            lipschitz = sum([sum([abs(c) for c in H.values()]) for E in objective.get_expectationvalues() for H in E.H])
+            if numpy.isclose(lipschitz, 0.0):
+                lipschitz = 1.0
+        lr = self.lr
+        if lr is None:
+            lr = 1.0 / lipschitz
+        if not lr < 2.0 / lipschitz:
+            raise TequilaOptimizerException(
+                "learning rate {} has to be smaller than 2/lipschitz = {}".format(lr, 2.0 / lipschitz))
+
+        if not self.silent:
+            print(self)
+            print("{:15} : {} expectationvalues".format("Objective", objective.count_expectationvalues()))
+            counts = [x.count_expectationvalues() for x in comp_grad.values()]
+            print("{:15} : {} expectationvalues".format("Gradient", sum(counts)))
+            print("{:15} : {}".format("lr", lr))
+            print("{:15} : {}".format("lipschitz", lipschitz))
+            print("{:15} : {}".format("active variables", len(active_angles)))
+
+        n = len(keys)
+        shots = numpy.full(n, self.min_shots, dtype=int)
+        chi = numpy.zeros(n)
+        xi = numpy.zeros(n)
+        spent = 0
+        if checkpoint is not None:
+            state = checkpoint["state"]
+            shots, chi, xi, spent = state["shots"], state["chi"], state["xi"], int(state["spent"])
+        e = None
+        e_angles = v
+        for step in range(start, maxiter):
+            e = comp(variables=v, samples=self.samples, **self.backend_options)
+            e_angles = v
+            spent += self.samples * comp.count_expectationvalues()
+
+            gradient = numpy.zeros(n)
+            variance = numpy.zeros(n)
+            for i, k in enumerate(keys):
+                # the spread of the repetitions estimates the single-shot variance
+                share = max(1, shots[i] // self.repetitions)
+                values = [comp_grad[k](variables=v, samples=share, **self.backend_options) for j in
+                          range(self.repetitions)]
+                gradient[i] = numpy.mean(values)
+                variance[i] = numpy.var(values, ddof=1) * share
+                spent += self.repetitions * share * comp_grad[k].count_expectationvalues()
+
+            if self.save_history:
+                self.history.energies.append(e)
+                self.history.angles.append(format_variable_dictionary(v))
+                self.history.gradients.append(dict(zip(keys, gradient)))
+
+            if not self.silent:
+                if self.print_level > 2:
+                    string = "Iteration: {} , Energy: {:+2.8f}, shots: {}, angles: {}".format(step, e, spent, v)
+                else:
+                    string = "Iteration: {} , Energy: {:+2.8f}, shots: {}".format(step, e, spent)
+                print(string)
+
+            v = {**v}
+            for i, k in enumerate(keys):
+                v[k] = v[k] - lr * gradient[i]
+
+            if self.shot_budget is not None and spent >= self.shot_budget:
+                if not self.silent:
+                    print("shot budget of {} spent. Stopping optimization.".format(self.shot_budget))
+                break
+
+            shots = self.update_shots(gradient=gradient, variance=variance, chi=chi, xi=xi, step=step, lr=lr,
+                                      lipschitz=lipschitz)
+            self.write_checkpoint(step + 1, v, shots=shots, chi=chi, xi=xi, spent=spent)
+
+        # the last measured energy together with the angles it was measured at
+        return ICANSReturnType(energy=e, angles=format_variable_dictionary(e_angles), history=self.history,
+                               shots=spent)
+
+    def update_shots(self, gradient, variance, chi, xi, step, lr, lipschitz) -> numpy.ndarray:
+        """
+        Update the running averages chi (gradient) and xi (variance) in place
+        and compute the shots for the next iteration from the expected gain per shot
+        :return: array with the shots for every gradient component
+        """
+        chi *= self.mu
+        chi += (1.0 - self.mu) * gradient
+        xi *= self.mu
+        xi += (1.0 - self.mu) * variance
+        chi_hat = chi / (1.0 - self.mu ** (step + 1))
+        xi_hat = xi / (1.0 - self.mu ** (step + 1))
+        shots = numpy.ceil(2.0 * lipschitz * lr * xi_hat /
+                           ((2.0 - lipschitz * lr) * (chi_hat ** 2 + self.bias * self.mu ** step)))
+        shots = numpy.maximum(shots, self.min_shots)
+        gain = ((lr - lipschitz * lr ** 2 / 2.0) * chi_hat ** 2 - lipschitz * lr ** 2 / (2.0 * shots) * xi_hat) / shots
+        # no component gets more shots than the one with the largest expected gain per shot
+        max_shots = shots[numpy.argmax(gain)]
+        return numpy.clip(shots, self.min_shots, max(max_shots, self.min_shots)).astype(int)
+
+    def __repr__(self):
+        infostring = super().__repr__()
+        infostring += "{:15} : {}\n".format("min_shots", self.min_shots)
+        infostring += "{:15} : {}\n".format("repetitions", self.repetitions)
+        infostring += "{:15} : {}\n".format("mu", self.mu)
+        infostring += "{:15} : {}\n".format("shot_budget", self.shot_budget)
+        return infostring
+
+
+def minimize(objective: Objective,
+             samples: int = None,
+             lr: float = None,
+             lipschitz: float = None,
+             shot_budget: int = None,
+             initial_values: typing.Dict[typing.Hashable, numbers.Real] = None,
+             variables: typing.List[typing.Hashable] = None,
+             maxiter: int = 100,
+             backend: str = None,
+             backend_options: typing.Dict = None,
+             noise: NoiseModel = None,
+             silent: bool = False,
+             save_history: bool = True,
+             min_shots: int = 2,
+             repetitions: int = 2,
+             mu: float = 0.99,
+             bias: float = 1.e-6,
+             checkpoint: str = None,
+             checkpoint_every: int = 10,
+             resume_from: str = None,
+             cache_dir: str = None,
+             history_options: dict = None,
+             *args,
+             **kwargs) -> ICANSReturnType:
+    """
+
+    Parameters
+    ----------
+    objective: Objective :
+        The tequila objective to optimize
+    samples: int :
+         (Default value = None)
+         samples/shots of the energy which is evaluated in every iteration, has to be given
+         the shots of the gradient components are chosen adaptively
+    lr: float >0:
+        the learning rate, has to be smaller than 2/lipschitz. Default None: 1/lipschitz
+    lipschitz: float >0:
+        Lipschitz constant of the gradient.
+        Default None: sum of the absolute coefficients of all hamiltonians in the objective
+    shot_budget: int:
+        (Default value = None)
+        stop the optimization when this many shots are spent (counted as samples times expectationvalues)
+    initial_values: typing.Dict[typing.Hashable, numbers.Real]: (Default value = None):
+        Initial values as dictionary of Hashable types (variable keys) and floating point numbers. If given None they will be drawn randomly
+    variables: typing.List[typing.Hashable] :
+         (Default value = None)
+         List of Variables to optimize
+    maxiter: int :
+         (Default value = 100)
+    backend: str :
+         (Default value = None)
+         Simulator backend, will be automatically chosen if set to None
+    backend_options: dict:
+        (Default value = None)
+        extra options, to be passed to the backend
+    noise: NoiseModel:
+         (Default value = None)
+         a NoiseModel to apply to all expectation values in the objective.
+    silent: bool :
+         (Default value = False)
+         No printout if True
+    save_history: bool:
+        (Default value = True)
+        Save the history throughout the optimization
+    min_shots: int:
+        (Default value = 2)
+        minimal number of shots per gradient component
+    repetitions: int:
+        (Default value = 2)
+        every gradient component is the mean of this many repetitions, their spread estimates the variance
+    mu: float:
+        (Default value = 0.99)
+        weight of the old values in the running averages of gradients and variances
+    bias: float:
+        (Default value = 1.e-6)
+        regularization of the shot formula for vanishing gradients
+    checkpoint: str:
+        (Default value = None)
+        file to which variables, shots, running averages, history and random state are written
+        every checkpoint_every iterations
+    checkpoint_every: int:
+        (Default value = 10)
+        iterations between two checkpoints
+    resume_from: str:
+        (Default value = None)
+        checkpoint file from which the optimization is continued
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile), avoids compiling again when resuming
+    history_options: dict:
+        (Default value = None)
+        keep the history in a ColumnarHistory with these options (max_length, spill_dir) to bound its memory
+
+    Returns
+    -------
+
+    """
+
+    optimizer = OptimizerICANS(save_history=save_history,
+                               lr=lr,
+                               lipschitz=lipschitz,
+                               shot_budget=shot_budget,
+                               min_shots=min_shots,
+                               repetitions=repetitions,
+                               mu=mu,
+                               bias=bias,
+                               samples=samples, backend=backend,
+                               noise=noise, backend_options=backend_options,
+                               maxiter=maxiter,
+                               silent=silent,
+                               checkpoint=checkpoint,
+                               checkpoint_every=checkpoint_every,
+                               cache_dir=cache_dir,
+                               history_options=history_options)
+    return optimizer(objective=objective,
+                     maxiter=maxiter,
+                     initial_values=initial_values,
+                     variables=variables,
+                     resume_from=resume_from, *args, **kwargs)
@@ -0,0 +1,297 @@
+import numpy, typing
+from tequila.objective import Objective
+from tequila.objective.objective import Variable, format_variable_dictionary, format_variable_list
+from tequila.simulators.simulator_api import pick_backend
+from .optimizer_base import Optimizer, TequilaOptimizerException, _BatchEvaluator
+from .optimizer_scipy import OptimizerSciPy
+from .optimizer_gd import OptimizerGD
+from .optimizer_icans import OptimizerICANS
+from collections import namedtuple
+from tequila.circuit.noise import NoiseModel
+
+MultiStartReturnType = namedtuple('MultiStartReturnType', 'energy angles history best results histories pruned')
+
+# compiled objective and derivatives of forked worker processes, set once when the worker starts
+_worker_shared = None
+
+
+def _initialize_start_worker(shared):
+    global _worker_shared
+    _worker_shared = shared
+    # forked workers inherit the random state of the parent and would draw identical samples
+    numpy.random.seed()
+
+
+def _run_start(shared, method, initial_values, maxiter, evaluate_start, kwargs):
+    """
+    Run one start for maxiter iterations with the shared objective and derivatives
+    :return: the energy at initial_values (None if not evaluate_start) and the return value of the optimizer
+    """
+    from tequila.optimizers import minimize
+    start = None
+    if evaluate_start:
+        start = float(shared["objective"](variables=initial_values, samples=kwargs.get("samples", None)))
+    derivatives = {k: v for k, v in shared.items() if k != "objective" and v is not None}
+    result = minimize(method=method, objective=shared["objective"], initial_values=initial_values, maxiter=maxiter,
+                      **derivatives, **kwargs)
+    return start, result
+
+
+def _run_start_in_worker(method, initial_values, maxiter, evaluate_start, kwargs):
+    return _run_start(_worker_shared, method, initial_values, maxiter, evaluate_start, kwargs)
+
+
+class _StartPool(_BatchEvaluator):
+    """
+    Runs the starts of one round, concurrently in a pool of forked worker processes if n_workers > 1
+    The workers receive the compiled objective and its derivatives once when they start
+    Should not be used outside of minimize
+    """
+
+    _initializer = staticmethod(_initialize_start_worker)
+
+    def __call__(self, tasks: typing.List[tuple], *args, **kwargs) -> list:
+        pool = None
+        if self.n_workers is not None and self.n_workers > 1 and len(tasks) > 1:
+            pool = self._get_pool()
+        if pool is None:
+            return [_run_start(self.objective, *task) for task in tasks]
+        return list(pool.map(_run_start_in_worker, *zip(*tasks)))
+
+
+def _share_derivatives(optimizer: Optimizer, cls: type, method: str, objective: Objective,
+                       variables: typing.List[Variable], gradient=None, hessian=None) -> dict:
+    """
+    Compile the derivatives which the method needs once for all starts
+    :return: dictionary with the gradient and hessian instructions passed to every start
+    """
+    if cls is OptimizerICANS:
+        raise TequilaOptimizerException("iCANS compiles its gradient for every start and is not supported")
+    if isinstance(gradient, str) and gradient.lower() == 'qng':
+        raise TequilaOptimizerException("the qng can not be shared between starts")
+
+    needs_gradient = cls is OptimizerGD
+    needs_hessian = False
+    if cls is OptimizerSciPy:
+        needs_gradient = method.upper() in OptimizerSciPy.gradient_based_methods + OptimizerSciPy.hessian_based_methods
+        needs_hessian = method.upper() in OptimizerSciPy.hessian_based_methods
+
+    if hasattr(gradient, "items") and all([isinstance(x, Objective) for x in gradient.values()]):
+        gradient = format_variable_dictionary(gradient)
+    if not needs_gradient or optimizer._use_autodiff():
+        # automatic differentiation needs the objective only
+        return {"gradient": gradient, "hessian": hessian}
+
+    dO = None
+    if gradient is None or hasattr(gradient, "items") and all([isinstance(x, Objective) for x in gradient.values()]):
+        dO, gradient = optimizer.compile_gradient(objective=objective, variables=variables, gradient=gradient)
+    if needs_hessian and hessian is None and dO is not None:
+        hessian = optimizer.compile_hessian(variables=variables, grad_obj=dO, comp_grad_obj=gradient)[1]
+    elif needs_hessian and hasattr(hessian, "items") and all([isinstance(x, Objective) for x in hessian.values()]):
+        hessian = {k: optimizer.compile_objective(objective=v) for k, v in hessian.items()}
+    return {"gradient": gradient, "hessian": hessian}
+
+
+def _prune(energies: numpy.ndarray, before: numpy.ndarray, remaining: int, keep: float,
+           min_starts: int) -> numpy.ndarray:
+    """
+    Select the starts which continue after a round
+    A start is dropped if it can not reach the best energy even when it keeps improving
+    at the rate of the last round for all remaining rounds,
+    of the other starts only the fraction keep with the lowest energies continues
+    :param energies: energies of the running starts after the round
+    :param before: their energies before the round
+    :param remaining: number of rounds which are left
+    :return: indices (into energies) of the starts which continue, ordered by energy
+    """
+    order = numpy.argsort(energies, kind="stable")
+    projected = energies - remaining * numpy.maximum(before - energies, 0.0)
+    promising = [i for i in order if projected[i] <= energies[order[0]]]
+    n = max(min_starts, int(numpy.ceil(keep * len(energies))))
+    survivors = promising[:n]
+    if len(survivors) < min_starts:
+        survivors += [i for i in order if i not in survivors][:min_starts - len(survivors)]
+    return numpy.asarray(sorted(survivors, key=lambda i: energies[i]), dtype=int)
+
+
+def minimize(objective: Objective,
+             method: str = "bfgs",
+             n_starts: int = 10,
+             initial_values: typing.Union[typing.Dict, typing.List[typing.Dict]] = None,
+             variables: typing.List[typing.Hashable] = None,
+             maxiter: int = 100,
+             rounds: int = 4,
+             keep: float = 0.5,
+             min_starts: int = 1,
+             samples: int = None,
+             backend: str = None,
+             backend_options: typing.Dict = None,
+             noise: NoiseModel = None,
+             gradient=None,
+             hessian=None,
+             n_workers: int = None,
+             silent: bool = False,
+             save_history: bool = True,
+             cache_dir: str = None,
+             *args,
+             **kwargs) -> MultiStartReturnType:
+    """
+    Minimize from several initial points and keep the best result
+    The objective and the derivatives needed by the method are compiled once and shared by all starts.
+    The iterations are split into rounds, all running starts are advanced by one round
+    (concurrently with n_workers > 1) and every round is warm-started from the angles of the previous one.
+    After each round the starts which are not promising anymore are pruned:
+    starts which can not reach the best energy when they keep improving at their current rate
+    and all but the fraction keep of the lowest energies.
+
+    Parameters
+    ----------
+    objective: Objective :
+        The tequila objective to optimize
+    method: str:
+        (Default value = 'bfgs')
+        the optimization method of every start, see tq.show_available_optimizers()
+        (all methods but 'icans')
+    n_starts: int:
+        (Default value = 10)
+        number of starts, ignored if a list of initial_values is given
+    initial_values: dict or list of dicts: (Default value = None):
+        Initial values of the starts as a list of dictionaries (one per start)
+        or as one dictionary for all starts. Values which are not given are drawn uniformly from [0, 2pi)
+    variables: typing.List[typing.Hashable] :
+         (Default value = None)
+         List of Variables to optimize
+    maxiter: int :
+         (Default value = 100)
+         maximal number of iterations of every start (summed over all rounds)
+    rounds: int:
+        (Default value = 4)
+        number of rounds into which the iterations are split, the starts are pruned after each round
+    keep: float:
+        (Default value = 0.5)
+        fraction of the running starts which continues after each round, 1.0 prunes only by trajectory
+    min_starts: int:
+        (Default value = 1)
+        number of starts which continue at least
+    samples: int :
+         (Default value = None)
+         samples/shots to take in every run of the quantum circuits (None activates full wavefunction simulation)
+    backend: str :
+         (Default value = None)
+         Simulator backend, will be automatically chosen if set to None
+    backend_options: dict:
+        (Default value = None)
+        extra options, to be passed to the backend
+    noise: NoiseModel:
+         (Default value = None)
+         a NoiseModel to apply to all expectation values in the objective.
+    gradient:
+        (Default value = None)
+        gradient instruction as in tq.minimize, gradients given as objectives or compiled analytically
+        are compiled once for all starts ('qng' is not supported)
+    hessian:
+        (Default value = None)
+        hessian instruction as in tq.minimize, treated like the gradient
+    n_workers: int:
+        (Default value = None)
+        number of worker processes which run the starts of one round concurrently (None means sequential)
+    silent: bool :
+         (Default value = False)
+         No printout if True
+    save_history: bool:
+        (Default value = True)
+        Save the history of every start (the rounds are appended)
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile)
+    kwargs:
+        further keyword arguments for the optimizer of every start
+
+    Returns
+    -------
+        the energy, angles and history of the best start, its index (best),
+        the last return value of the optimizer of every start (results), all histories
+        and the round after which each start was pruned (pruned, None if it ran through)
+    """
+    from tequila.optimizers import INSTALLED_OPTIMIZERS
+    entries = [v for v in INSTALLED_OPTIMIZERS.values() if method.lower() in v.methods or method.upper() in v.methods]
+    if len(entries) == 0:
+        raise TequilaOptimizerException("Could not find optimization method {} in tequila optimizers".format(method))
+    if not 0.0 < keep <= 1.0:
+        raise TequilaOptimizerException("keep has to be in (0, 1], got {}".format(keep))
+
+    backend = pick_backend(backend=backend, samples=samples, noise=noise)
+    optimizer = Optimizer(backend=backend, backend_options=backend_options, samples=samples, noise=noise,
+                          save_history=False, silent=True, cache_dir=cache_dir)
+    variables = format_variable_list(variables)
+    if variables is None:
+        variables = objective.extract_variables()
+
+    compiled = optimizer.compile_objective(objective=objective)
+    shared = {"objective": compiled, **_share_derivatives(optimizer=optimizer, cls=entries[0].cls, method=method,
+                                                          objective=objective, variables=variables,
+                                                          gradient=gradient, hessian=hessian)}
+
+    if initial_values is None or hasattr(initial_values, "items"):
+        initial_values = [initial_values] * n_starts
+    points = []
+    for values in initial_values:
+        values = format_variable_dictionary(values)
+        if values is None:
+            values = {}
+        points.append({**{k: numpy.random.uniform(0, 2 * numpy.pi) for k in compiled.extract_variables()}, **values})
+    n_starts = len(points)
+
+    rounds = max(1, min(rounds, maxiter))
+    budgets = [maxiter // rounds + (1 if r < maxiter % rounds else 0) for r in range(rounds)]
+    options = {"variables": variables, "samples": samples, "backend": backend, "backend_options": backend_options,
+               "noise": noise, "silent": True, "save_history": save_history, **kwargs}
+
+    if not silent:
+        print("{:15} : {} with {} starts".format("method", method, n_starts))
+        print("{:15} : {} rounds of {} iterations".format("rounds", rounds, budgets))
+        print("{:15} : {}".format("n_workers", n_workers))
+        print("{:15} : {} expectationvalues".format("Objective", objective.count_expectationvalues()))
+
+    results = [None] * n_starts
+    histories = [None] * n_starts
+    pruned = [None] * n_starts
+    energies = numpy.full(n_starts, numpy.inf)
+    running = numpy.arange(n_starts)
+    pool = _StartPool(objective=shared, n_workers=n_workers)
+    try:
+        for r, budget in enumerate(budgets):
+            tasks = [(method, points[i], budget, r == 0, options) for i in running]
+            before = energies[running].copy()
+            for j, (start, result) in enumerate(pool(tasks)):
+                i = running[j]
+                if start is not None:
+                    before[j] = start
+                # a restart can end above the point it started from (e.g. cobyla with its initial trust region)
+                if result.energy <= energies[i]:
+                    results[i] = result
+                    points[i] = {**points[i], **result.angles}
+                    energies[i] = result.energy
+                if save_history:
+                    if histories[i] is None:
+                        histories[i] = result.history
+                    else:
+                        histories[i] += result.history
+
+            if r + 1 < rounds:
+                survivors = running[_prune(energies=energies[running], before=before, remaining=rounds - r - 1,
+                                           keep=keep, min_starts=min_starts)]
+                for i in running:
+                    if i not in survivors:
+                        pruned[i] = r
+                running = survivors
+
+            if not silent:
+                print("Round: {} , best energy: {:+2.8f}, running starts: {}".format(r, numpy.min(energies),
+                                                                                      len(running)))
+    finally:
+        pool.close()
+
+    best = int(numpy.argmin(energies))
+    return MultiStartReturnType(energy=results[best].energy, angles=results[best].angles, history=histories[best],
+                                best=best, results=results, histories=histories, pruned=pruned)
@@ -47,13 +47,14 @@ class OptimizerPhoenics(Optimizer):
         return ["phoenics"]
 
     def __init__(self, maxiter, backend=None, save_history=True, minimize=True, backend_options=None,
-                 samples=None, silent=None, noise=None):
+                 samples=None, silent=None, noise=None, n_workers=None, checkpoint_every=1):
         self._minimize = minimize
 
         super().__init__(backend=backend, maxiter=maxiter, samples=samples,
                          noise=noise,
                          backend_options=backend_options,
-                         save_history=save_history, silent=silent)
+                         save_history=save_history, silent=silent,
+                         n_workers=n_workers, checkpoint_every=checkpoint_every)
 
     def _process_for_sim(self, recommendation, passive_angles):
         '''
@@ -79,6 +80,14 @@ class OptimizerPhoenics(Optimizer):
 
         return new
 
+    @staticmethod
+    def _save_observations(obs, file_name):
+        # write to a temporary file first, an interrupted write leaves the previous file intact
+        tmpname = "{}.{}.tmp".format(file_name, os.getpid())
+        with open(tmpname, 'wb') as file:
+            pickle.dump(obs, file)
+        os.replace(tmpname, file_name)
+
     def _make_phoenics_object(self, objective, passive_angles=None, conf=None, *args, **kwargs):
         if conf is not None:
             if hasattr(conf, 'readlines'):
@@ -167,6 +176,7 @@ class OptimizerPhoenics(Optimizer):
             print("variables   : {}".format(objective.extract_variables()))
             print("passive var : {}".format(passive_angles))
             print("backend options {} ".format(self.backend), self.backend_options)
+            print("n_workers   : {}".format(self.n_workers))
             print('now lets begin')
         for i in range(0, maxiter):
             with warnings.catch_warnings():
@@ -183,9 +193,9 @@ class OptimizerPhoenics(Optimizer):
             recs = self._process_for_sim(precs, passive_angles=passive_angles)
 
             start = time.time()
-            for j, rec in enumerate(recs):
-                En = compiled_objective(variables=rec, samples=self.samples, noise=self.noise,
-                                        backend_options=self.backend_options)
+            # all recommendations of one round are evaluated as one batch
+            energies = self.evaluate_batch(compiled_objective, recs)
+            for rec, En in zip(recs, energies):
                 runs.append((rec, En))
                 if not self.silent:
                     if self.print_level > 2:
@@ -217,9 +227,14 @@ class OptimizerPhoenics(Optimizer):
                     self.history.angles.append(angles)
                 obs.append(self._process_for_phoenics(angles, E, passive_angles=passive_angles))
 
+            # save the observations after every round, they can be passed back with previous=file_name
+            if file_name is not None and (i + 1) % self.checkpoint_every == 0:
+                self._save_observations(obs, file_name)
+
+        self.close_workers()
+
         if file_name is not None:
-            with open(file_name, 'wb') as file:
-                pickle.dump(obs, file)
+            self._save_observations(obs, file_name)
 
         if not self.silent:
             print("best energy after {} iterations : {:+2.8f}".format(self.maxiter, best))
@@ -238,6 +253,7 @@ def minimize(objective: Objective,
              phoenics_config: typing.Union[str, typing.Dict] = None,
              file_name: str = None,
              silent: bool = False,
+             n_workers: int = None,
              *args,
              **kwargs):
     """
@@ -271,9 +287,13 @@ def minimize(objective: Objective,
         Individual keywords of the 'general' sections can also be passed down as kwargs
     file_name: str:
         (Default value = None)
-        where to save output to, if save_to_file is True.
+        where to save the observations to, they are written after every round
+        and can be used to resume with previous=file_name
     kwargs: dict:
         Send down more keywords for single replacements in the phoenics config 'general' section, like e.g. batches=5, boosted=True etc
+    n_workers: int:
+        (Default value = None)
+        number of worker processes which evaluate the recommendations of one round in parallel (None means sequential)
     Returns
     -------
 
@@ -282,7 +302,7 @@ def minimize(objective: Objective,
     optimizer = OptimizerPhoenics(samples=samples, backend=backend,
                                   backend_options=backend_options,
                                   noise=noise,
-                                  maxiter=maxiter, silent=silent)
+                                  maxiter=maxiter, silent=silent, n_workers=n_workers)
     return optimizer(objective=objective, initial_values=initial_values, variables=variables, previous=previous,
                      maxiter=maxiter,
                      phoenics_config=phoenics_config, file_name=file_name, *args, **kwargs)
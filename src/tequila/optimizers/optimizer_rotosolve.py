@@ -0,0 +1,338 @@
+import numpy, typing, numbers
+from tequila.objective import Objective
+from tequila.objective.objective import Variable, format_variable_dictionary
+from .optimizer_base import Optimizer, TequilaOptimizerException
+from collections import namedtuple
+from tequila.circuit.noise import NoiseModel
+
+RotosolveReturnType = namedtuple('RotosolveReturnType', 'energy angles history')
+
+
+def _is_affine(objective: Objective, trials: int = 3) -> bool:
+    """
+    Check numerically if the transformation of the objective is affine in its arguments
+    f(t*a + (1-t)*b) = t*f(a) + (1-t)*f(b) is tested at random points a, b and t
+    :param objective: the tequila objective
+    :param trials: number of random points
+    :return: False if the transformation is not affine (or not defined at the random points)
+    """
+    n = len(objective.args)
+    if n == 0:
+        return True
+    # own random state, the global one is left untouched
+    state = numpy.random.RandomState(0)
+    f = objective.transformation
+    with numpy.errstate(all="ignore"):
+        for trial in range(trials):
+            a, b = state.uniform(-1.0, 1.0, size=(2, n))
+            t = state.uniform(-1.0, 2.0)
+            try:
+                value = numpy.asarray(f(*(t * a + (1.0 - t) * b)), dtype=float)
+                reference = t * numpy.asarray(f(*a), dtype=float) + (1.0 - t) * numpy.asarray(f(*b), dtype=float)
+            except Exception:
+                return False
+            if not numpy.all(numpy.isfinite(value)) or not numpy.allclose(value, reference):
+                return False
+    return True
+
+
+def check_rotosolve_structure(objective: Objective, variables: typing.List[Variable]) -> typing.List[Variable]:
+    """
+    Check if the objective is sinusoidal with period 2pi in each of the variables
+    This is the case if each variable enters every expectationvalue through at most a single
+    uncontrolled rotation-like gate exp(-i angle/2 generator) (shift 0.5) with the bare variable as angle
+    and the transformation of the objective is affine in the expectationvalues (e.g. sums of expectationvalues)
+    Compiled objectives are checked on the (compiled) abstract circuits of their backend circuits
+    :param objective: the tequila objective
+    :param variables: the variables which shall be optimized
+    :return: the variables which violate the structure (empty if all are fine)
+    """
+    expectationvalues = set(objective.get_expectationvalues())
+    # variables which enter the transformation directly
+    violating = set([arg for arg in objective.args if isinstance(arg, Variable)])
+    affine = _is_affine(objective)
+    for E in expectationvalues:
+        if E.U is None:
+            continue
+        parameter_map = getattr(E.U, "abstract_circuit", E.U)._parameter_map
+        for v in variables:
+            if not affine and v in parameter_map:
+                violating.add(v)
+                continue
+            gates = parameter_map.get(v, [])
+            if len(gates) > 1:
+                violating.add(v)
+                continue
+            for idx, gate in gates:
+                if not hasattr(gate, "shift") or gate.shift != 0.5 or gate.is_controlled() \
+                        or not isinstance(gate.parameter, Variable) or gate.parameter != v:
+                    violating.add(v)
+    return [v for v in variables if v in violating]
+
+
+class OptimizerRotosolve(Optimizer):
+    """
+    Rotosolve (Ostaszewski, Grant and Benedetti, Quantum 5, 391 (2021))
+    The objective is sinusoidal in every variable that enters through a single rotation:
+    E(x) = A sin(x + B) + C
+    Three evaluations determine A, B and C and the minimum in that variable is set exactly
+    The variables are optimized in sweeps over blocks:
+    all variables of a block are fitted at the same point (their evaluations are dispatched as one batch)
+    and updated together, block_size=1 gives the sequential (exact coordinate-wise) Rotosolve
+    """
+
+    @classmethod
+    def available_methods(cls):
+        """:return: All tested available methods"""
+        return ['rotosolve']
+
+    def __init__(self, maxiter=100,
+                 tol: numbers.Real = None,
+                 block_size: int = 1,
+                 samples=None,
+                 backend=None,
+                 backend_options=None,
+                 noise=None,
+                 silent=True,
+                 **kwargs):
+        """
+        :param maxiter: maximal number of sweeps over all variables
+        :param tol: stop if the energy changes less than tol during one sweep
+        :param block_size: number of variables which are fitted at the same point and updated together
+        See the Optimizer class for all other parameters to initialize
+        """
+        super().__init__(maxiter=maxiter, samples=samples,
+                         backend=backend, backend_options=backend_options,
+                         noise=noise,
+                         **kwargs)
+        self.silent = silent
+        self.tol = tol
+        if self.tol is not None:
+            self.tol = abs(float(tol))
+        assert block_size > 0
+        self.block_size = block_size
+
+    def __call__(self, objective: Objective,
+                 maxiter: int = None,
+                 initial_values: typing.Dict[Variable, numbers.Real] = None,
+                 variables: typing.List[Variable] = None,
+                 reset_history: bool = True,
+                 resume_from: str = None,
+                 *args, **kwargs) -> RotosolveReturnType:
+        """
+        Optimizes with Rotosolve and gives back the optimized angles
+        :param objective: The tequila Objective to minimize
+        :param maxiter: how many sweeps to run, at maximum.
+        :param initial_values: initial values for the objective
+        :param variables: which variables to optimize over. Default None: all the variables of the objective.
+        :param reset_history: reset the history before optimization starts (has no effect if self.save_history is False)
+        :param resume_from: checkpoint file (see Optimizer.save_checkpoint) from which the optimization is continued
+        :return: tuple of final energy, final angles and history (one entry per sweep)
+        """
+
+        if self.save_history and reset_history:
+            self.reset_history()
+
+        start = 0
+        checkpoint = None
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            initial_values = checkpoint["variables"]
+            start = checkpoint["iteration"]
+
+        if maxiter is None:
+            maxiter = self.maxiter
+
+        active_angles, passive_angles, variables = self.initialize_variables(objective, initial_values, variables)
+        keys = list(active_angles.keys())
+        violating = check_rotosolve_structure(objective=objective, variables=keys)
+        if len(violating) > 0:
+            raise TequilaOptimizerException(
+                "Rotosolve needs variables which enter through single rotations "
+                "and an objective which is affine in its expectationvalues, violated by {}".format(violating))
+
+        comp = self.compile_objective(objective=objective)
+        v = {**active_angles, **passive_angles}
+
+        if not self.silent:
+            print(self)
+            print("{:15} : {} expectationvalues".format("Objective", objective.count_expectationvalues()))
+            print("{:15} : {}".format("active variables", len(active_angles)))
+
+        blocks = [keys[i:i + self.block_size] for i in range(0, len(keys), self.block_size)]
+        if checkpoint is not None:
+            e = float(checkpoint["state"]["energy"])
+        else:
+            e = self.evaluate_batch(comp, [v])[0]
+        for sweep in range(start, maxiter):
+            if self.save_history:
+                self.history.energies.append(e)
+                self.history.angles.append(format_variable_dictionary(v))
+
+            if not self.silent:
+                if self.print_level > 2:
+                    print("Sweep: {} , Energy: {:+2.8f}, angles: {}".format(sweep, e, v))
+                else:
+                    print("Sweep: {} , Energy: {:+2.8f}".format(sweep, e))
+
+            last = e
+            for block in blocks:
+                v, e = self.step(comp, v, block, e)
+            self.write_checkpoint(sweep + 1, v, energy=e)
+
+            if self.tol is not None and numpy.abs(e - last) <= self.tol:
+                if not self.silent:
+                    print('delta f smaller than tolerance {}. Stopping optimization.'.format(str(self.tol)))
+                break
+
+        if self.save_history:
+            self.history.energies.append(e)
+            self.history.angles.append(format_variable_dictionary(v))
+        self.close_workers()
+        return RotosolveReturnType(energy=e, angles=format_variable_dictionary(v), history=self.history)
+
+    def step(self, objective, v, block, e=None) -> typing.Tuple[dict, numbers.Real]:
+        """
+        Set all variables of the block to the minimum of their sinusoidal fit at v
+        :param objective: the compiled objective
+        :param v: the current values of all variables
+        :param block: the variables which are updated
+        :param e: the energy at v (evaluated if None or if sampling)
+        :return: the new values and their energy
+        (predicted by the fit for a single variable without sampling, evaluated otherwise)
+        """
+        points = []
+        for k in block:
+            plus = {**v}
+            plus[k] = v[k] + numpy.pi / 2
+            minus = {**v}
+            minus[k] = v[k] - numpy.pi / 2
+            points += [plus, minus]
+        fresh = e is None or self.samples is not None
+        if fresh:
+            points = [v] + points
+        values = self.evaluate_batch(objective, points)
+        if fresh:
+            e, values = values[0], values[1:]
+
+        new = {**v}
+        prediction = e
+        for i, k in enumerate(block):
+            plus, minus = values[2 * i], values[2 * i + 1]
+            new[k] = v[k] - numpy.pi / 2 - numpy.arctan2(2.0 * e - plus - minus, plus - minus)
+            offset = 0.5 * (plus + minus)
+            prediction = offset - numpy.sqrt((e - offset) ** 2 + (0.5 * (plus - minus)) ** 2)
+
+        if len(block) == 1 and self.samples is None:
+            return new, prediction
+        # the fits of a block do not predict their joint update
+        return new, self.evaluate_batch(objective, [new])[0]
+
+    def __repr__(self):
+        infostring = super().__repr__()
+        infostring += "{:15} : {}\n".format("block_size", self.block_size)
+        return infostring
+
+
+def minimize(objective: Objective,
+             initial_values: typing.Dict[typing.Hashable, numbers.Real] = None,
+             variables: typing.List[typing.Hashable] = None,
+             samples: int = None,
+             maxiter: int = 100,
+             backend: str = None,
+             backend_options: typing.Dict = None,
+             noise: NoiseModel = None,
+             tol: float = None,
+             block_size: int = 1,
+             silent: bool = False,
+             save_history: bool = True,
+             n_workers: int = None,
+             checkpoint: str = None,
+             checkpoint_every: int = 10,
+             resume_from: str = None,
+             cache_dir: str = None,
+             history_options: dict = None,
+             *args,
+             **kwargs) -> RotosolveReturnType:
+    """
+
+    Parameters
+    ----------
+    objective: Objective :
+        The tequila objective to optimize
+        every variable has to enter through a single uncontrolled rotation (Rx, Ry, Rz, ExpPauli, ...)
+        in each expectationvalue and the objective has to be affine in its expectationvalues
+    initial_values: typing.Dict[typing.Hashable, numbers.Real]: (Default value = None):
+        Initial values as dictionary of Hashable types (variable keys) and floating point numbers. If given None they will be drawn randomly
+    variables: typing.List[typing.Hashable] :
+         (Default value = None)
+         List of Variables to optimize
+    samples: int :
+         (Default value = None)
+         samples/shots to take in every run of the quantum circuits (None activates full wavefunction simulation)
+    maxiter: int :
+         (Default value = 100)
+         maximal number of sweeps over all variables
+    backend: str :
+         (Default value = None)
+         Simulator backend, will be automatically chosen if set to None
+    backend_options: dict:
+        (Default value = None)
+        extra options, to be passed to the backend
+    noise: NoiseModel:
+         (Default value = None)
+         a NoiseModel to apply to all expectation values in the objective.
+    tol: float :
+         (Default value = None)
+         Convergence tolerance for optimization; if abs(delta f) during one sweep smaller than tol, stop.
+    block_size: int:
+        (Default value = 1)
+        number of variables which are fitted at the same point and updated together
+        1 means sequential updates with exact minimization in every variable
+    silent: bool :
+         (Default value = False)
+         No printout if True
+    save_history: bool:
+        (Default value = True)
+        Save the history throughout the optimization
+    n_workers: int:
+        (Default value = None)
+        number of worker processes evaluating the points of one block in parallel (None means sequential)
+    checkpoint: str:
+        (Default value = None)
+        file to which variables, energy, history and random state are written every checkpoint_every sweeps
+    checkpoint_every: int:
+        (Default value = 10)
+        sweeps between two checkpoints
+    resume_from: str:
+        (Default value = None)
+        checkpoint file from which the optimization is continued
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile), avoids compiling again when resuming
+    history_options: dict:
+        (Default value = None)
+        keep the history in a ColumnarHistory with these options (max_length, spill_dir) to bound its memory
+
+    Returns
+    -------
+
+    """
+
+    optimizer = OptimizerRotosolve(save_history=save_history,
+                                   tol=tol,
+                                   block_size=block_size,
+                                   samples=samples, backend=backend,
+                                   noise=noise, backend_options=backend_options,
+                                   maxiter=maxiter,
+                                   silent=silent,
+                                   n_workers=n_workers,
+                                   checkpoint=checkpoint,
+                                   checkpoint_every=checkpoint_every,
+                                   cache_dir=cache_dir,
+                                   history_options=history_options)
+    return optimizer(objective=objective,
+                     maxiter=maxiter,
+                     initial_values=initial_values,
+                     variables=variables,
+                     resume_from=resume_from, *args, **kwargs)
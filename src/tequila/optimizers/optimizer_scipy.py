@@ -1,7 +1,7 @@
 import scipy, numpy, typing, numbers
 from tequila.objective import Objective
 from tequila.objective.objective import assign_variable, Variable, format_variable_dictionary, format_variable_list
-from .optimizer_base import Optimizer
+from .optimizer_base import Optimizer, ColumnarHistory
 from ._containers import _EvalContainer, _GradContainer, _HessContainer, _QngContainer
 from collections import namedtuple
 from tequila.utils.exceptions import TequilaException
@@ -17,6 +17,13 @@ class TequilaScipyException(TequilaException):
 SciPyReturnType = namedtuple('SciPyReturnType', 'energy angles history scipy_output')
 
 
+def _last(history):
+    # the columns of a ColumnarHistory do not necessarily store the last entry (downsampling)
+    if hasattr(history, "last"):
+        return history.last
+    return history[-1]
+
+
 class OptimizerSciPy(Optimizer):
     """ """
     gradient_free_methods = ['NELDER-MEAD', 'COBYLA', 'POWELL', 'SLSQP']
@@ -80,6 +87,7 @@ class OptimizerSciPy(Optimizer):
                  gradient: typing.Dict[Variable, Objective] = None,
                  hessian: typing.Dict[typing.Tuple[Variable, Variable], Objective] = None,
                  reset_history: bool = True,
+                 resume_from: str = None,
                  *args,
                  **kwargs) -> SciPyReturnType:
         """
@@ -89,6 +97,8 @@ class OptimizerSciPy(Optimizer):
         :param initial_values: initial values for the objective
         :param return_scipy_output: chose if the full scipy output shall be returned
         :param reset_history: reset the history before optimization starts (has no effect if self.save_history is False)
+        :param resume_from: checkpoint file (see Optimizer.save_checkpoint) from which the optimization is continued,
+        scipy methods do not expose their internal state, they restart at the variables of the checkpoint
         :return: tuple of optimized energy ,optimized angles and scipy output
         """
 
@@ -103,6 +113,18 @@ class OptimizerSciPy(Optimizer):
         if self.save_history and reset_history:
             self.reset_history()
 
+        start = 0
+        # the history is restored from the checkpoint, the new iterations are appended
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            initial_values = checkpoint["variables"]
+            start = checkpoint["iteration"]
+
+        # the evaluations are recorded in columns of the same kind as the history
+        history_column = None
+        if isinstance(self.history, ColumnarHistory):
+            history_column = self.history.new_column
+
         active_angles, passive_angles, variables = self.initialize_variables(objective, initial_values, variables)
 
         # Transform the initial value directory into (ordered) arrays
@@ -128,7 +150,8 @@ class OptimizerSciPy(Optimizer):
                            passive_angles=passive_angles,
                            save_history=self.save_history,
                            backend_options=self.backend_options,
-                           print_level=self.print_level)
+                           print_level=self.print_level,
+                           history_column=history_column)
 
         compile_gradient = self.method in (self.gradient_based_methods + self.hessian_based_methods)
         compile_hessian = self.method in self.hessian_based_methods
@@ -146,7 +169,8 @@ class OptimizerSciPy(Optimizer):
                 combos = get_qng_combos(objective, initial_values=initial_values, backend=self.backend,
                                         samples=self.samples, noise=self.noise,
                                         backend_options=self.backend_options)
-                dE = _QngContainer(combos=combos, param_keys=param_keys, passive_angles=passive_angles)
+                dE = _QngContainer(combos=combos, param_keys=param_keys, passive_angles=passive_angles,
+                                   history_column=history_column)
                 infostring += "{:15} : QNG {}\n".format("gradient", dE)
             else:
                 dE = gradient
@@ -172,7 +196,8 @@ class OptimizerSciPy(Optimizer):
                                 passive_angles=passive_angles,
                                 save_history=self.save_history,
                                 print_level=self.print_level,
-                                backend_options=self.backend_options)
+                                backend_options=self.backend_options,
+                                history_column=history_column)
 
         if compile_hessian:
             hess_obj, comp_hess_obj = self.compile_hessian(variables=variables,
@@ -187,7 +212,8 @@ class OptimizerSciPy(Optimizer):
                                  passive_angles=passive_angles,
                                  save_history=self.save_history,
                                  print_level=self.print_level,
-                                 backend_options=self.backend_options)
+                                 backend_options=self.backend_options,
+                                 history_column=history_column)
 
         if self.print_level > 0:
             print(self)
@@ -195,22 +221,25 @@ class OptimizerSciPy(Optimizer):
             print("{:15} : {}\n".format("active variables", len(active_angles)))
 
         Es = []
+        optimizer = self
+        if self.save_history:
+            self.history.hessians = [] if history_column is None else history_column()
 
         class SciPyCallback:
-            energies = []
-            gradients = []
-            hessians = []
-            angles = []
             real_iterations = 0
 
             def __call__(self, *args, **kwargs):
-                self.energies.append(E.history[-1])
-                self.angles.append(E.history_angles[-1])
-                if dE is not None and not isinstance(dE, str):
-                    self.gradients.append(dE.history[-1])
-                if ddE is not None and not isinstance(ddE, str):
-                    self.hessians.append(ddE.history[-1])
+                if optimizer.save_history:
+                    optimizer.history.energies.append(_last(E.history))
+                    optimizer.history.angles.append(_last(E.history_angles))
+                    if dE is not None and not isinstance(dE, str):
+                        optimizer.history.gradients.append(_last(dE.history))
+                    if ddE is not None and not isinstance(ddE, str):
+                        optimizer.history.hessians.append(_last(ddE.history))
                 self.real_iterations += 1
+                # the first argument of the callback is the current parameter vector for all methods
+                angles = {**dict(zip(param_keys, args[0])), **passive_angles}
+                optimizer.write_checkpoint(start + self.real_iterations, angles)
 
         callback = SciPyCallback()
         res = scipy.optimize.minimize(E, x0=param_values, jac=dE, hess=ddE,
@@ -226,23 +255,17 @@ class OptimizerSciPy(Optimizer):
             real_iterations = range(len(E.history))
 
         if self.save_history:
-            self.history.energies = callback.energies
             self.history.energy_evaluations = E.history
-            self.history.angles = callback.angles
             self.history.angles_evaluations = E.history_angles
-            self.history.gradients = callback.gradients
-            self.history.hessians = callback.hessians
             if dE is not None and not isinstance(dE, str):
                 self.history.gradients_evaluations = dE.history
             if ddE is not None and not isinstance(ddE, str):
                 self.history.hessians_evaluations = ddE.history
 
             # some methods like "cobyla" do not support callback functions
-            if len(self.history.energies) == 0:
-                self.history.energies = E.history
-                self.history.angles = E.history_angles
-
-
+            if callback.real_iterations == 0:
+                self.history.energies.extend(E.history)
+                self.history.angles.extend(E.history_angles)
 
         E_final = res.fun
         angles_final = dict((param_keys[i], res.x[i]) for i in range(len(param_keys)))
@@ -297,6 +320,11 @@ def minimize(objective: Objective,
              method_constraints=None,
              silent: bool = False,
              save_history: bool = True,
+             checkpoint: str = None,
+             checkpoint_every: int = 10,
+             resume_from: str = None,
+             cache_dir: str = None,
+             history_options: dict = None,
              *args,
              **kwargs) -> SciPyReturnType:
     """
@@ -356,6 +384,22 @@ def minimize(objective: Objective,
     save_history: bool:
         (Default value = True)
         Save the history throughout the optimization
+    checkpoint: str:
+        (Default value = None)
+        file to which variables, history and random state are written every checkpoint_every iterations
+    checkpoint_every: int:
+        (Default value = 10)
+        iterations between two checkpoints
+    resume_from: str:
+        (Default value = None)
+        checkpoint file from which the optimization is continued
+        the internal state of the scipy method (like the BFGS Hessian) is not restored
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile), avoids compiling again when resuming
+    history_options: dict:
+        (Default value = None)
+        keep the history in a ColumnarHistory with these options (max_length, spill_dir) to bound its memory
 
     Returns
     -------
@@ -367,7 +411,7 @@ def minimize(objective: Objective,
             gradient = format_variable_dictionary(gradient)
     if isinstance(hessian, dict) or hasattr(hessian, "items"):
         if all([isinstance(x, Objective) for x in hessian.values()]):
-            hessian = {(assign_variable(k[0]), assign_variable([k[1]])): v for k, v in hessian.items()}
+            hessian = {(assign_variable(k[0]), assign_variable(k[1])): v for k, v in hessian.items()}
     method_bounds = format_variable_dictionary(method_bounds)
 
     # set defaults
@@ -384,6 +428,10 @@ def minimize(objective: Objective,
                                samples=samples,
                                noise_model=noise,
                                tol=tol,
+                               checkpoint=checkpoint,
+                               checkpoint_every=checkpoint_every,
+                               cache_dir=cache_dir,
+                               history_options=history_options,
                                *args,
                                **kwargs)
     if initial_values is not None:
@@ -392,4 +440,5 @@ def minimize(objective: Objective,
                      gradient=gradient,
                      hessian=hessian,
                      initial_values=initial_values,
-                     variables=variables, *args, **kwargs)
+                     variables=variables,
+                     resume_from=resume_from, *args, **kwargs)
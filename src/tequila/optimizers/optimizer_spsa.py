@@ -0,0 +1,415 @@
+import numpy, typing, numbers
+from tequila.objective import Objective
+from tequila.objective.objective import Variable, format_variable_dictionary
+from .optimizer_base import Optimizer, TequilaOptimizerException
+from collections import namedtuple
+from tequila.circuit.noise import NoiseModel
+
+SPSAReturnType = namedtuple('SPSAReturnType', 'energy angles history hessian')
+
+
+class OptimizerSPSA(Optimizer):
+    """
+    Simultaneous Perturbation Stochastic Approximation (Spall, IEEE Trans. Autom. Control 37, 332 (1992))
+    Every iteration estimates the full gradient from two evaluations at randomly perturbed points
+    independent of the number of variables
+    2-SPSA (Spall, IEEE Trans. Autom. Control 45, 1839 (2000)) additionally estimates the Hessian
+    from two more evaluations and takes preconditioned steps, steps which increase the energy are blocked
+    All evaluations of one iteration are dispatched as one batch (see Optimizer.evaluate_batch)
+    """
+
+    @classmethod
+    def available_methods(cls):
+        """:return: All tested available methods"""
+        return ['spsa', '2-spsa']
+
+    def __init__(self, maxiter=100,
+                 method='spsa',
+                 tol: numbers.Real = None,
+                 lr: numbers.Real = None,
+                 perturbation: numbers.Real = 0.1,
+                 stability: numbers.Real = None,
+                 alpha: numbers.Real = 0.602,
+                 gamma: numbers.Real = 0.101,
+                 target_magnitude: numbers.Real = None,
+                 calibration_steps: int = 10,
+                 resamplings: int = 1,
+                 regularization: numbers.Real = 1.e-3,
+                 blocking: bool = None,
+                 samples=None,
+                 backend=None,
+                 backend_options=None,
+                 noise=None,
+                 silent=True,
+                 **kwargs):
+        """
+        Gain sequences are a_k = lr/(k+1+stability)^alpha for the steps and c_k = perturbation/(k+1)^gamma
+        for the perturbations (default exponents from Spall)
+        :param method: 'spsa' or '2-spsa'
+        :param tol: stop if the energy changes less than tol between two iterations
+        :param lr: the learning rate a, if None it is calibrated such that the first steps have target_magnitude (spsa)
+        or 1 as recommended by Spall (2-spsa, the preconditioned steps already have the scale of Newton steps)
+        :param perturbation: the perturbation c
+        :param stability: the stability constant A, defaults to 10% of maxiter
+        :param target_magnitude: magnitude of the first steps for calibration, defaults to 2pi/10
+        :param calibration_steps: number of gradient estimates for calibration
+        :param resamplings: number of independent gradient (and Hessian) estimates averaged in every iteration
+        :param regularization: added to the absolute eigenvalues of the Hessian estimate (2-spsa)
+        :param blocking: reject steps which increase the energy (costs one evaluation per iteration),
+        defaults to True for 2-spsa and False for spsa
+        See the Optimizer class for all other parameters to initialize
+        """
+
+        super().__init__(maxiter=maxiter, samples=samples,
+                         backend=backend, backend_options=backend_options,
+                         noise=noise,
+                         **kwargs)
+
+        if method.lower() not in self.available_methods():
+            raise TequilaOptimizerException(
+                "unknown method {} for SPSA, available are {}".format(method, self.available_methods()))
+        self.method = method.lower()
+        self.silent = silent
+        self.tol = tol
+        if self.tol is not None:
+            self.tol = abs(float(tol))
+        self.lr = lr
+        self.perturbation = perturbation
+        if stability is None:
+            stability = 0.1 * self.maxiter
+        self.stability = stability
+        self.alpha = alpha
+        self.gamma = gamma
+        if target_magnitude is None:
+            target_magnitude = 2.0 * numpy.pi / 10.0
+        self.target_magnitude = target_magnitude
+        self.calibration_steps = calibration_steps
+        self.resamplings = resamplings
+        self.regularization = regularization
+        if blocking is None:
+            blocking = self.method == '2-spsa'
+        self.blocking = blocking
+        assert all([k > .0 for k in [perturbation, alpha, gamma, target_magnitude, calibration_steps, resamplings]])
+
+    def __call__(self, objective: Objective,
+                 maxiter: int = None,
+                 initial_values: typing.Dict[Variable, numbers.Real] = None,
+                 variables: typing.List[Variable] = None,
+                 reset_history: bool = True,
+                 resume_from: str = None,
+                 *args, **kwargs) -> SPSAReturnType:
+        """
+        Optimizes with SPSA and gives back the optimized angles
+        :param objective: The tequila Objective to minimize
+        :param maxiter: how many iterations to run, at maximum.
+        :param initial_values: initial values for the objective
+        :param variables: which variables to optimize over. Default None: all the variables of the objective.
+        :param reset_history: reset the history before optimization starts (has no effect if self.save_history is False)
+        :param resume_from: checkpoint file (see Optimizer.save_checkpoint) from which the optimization is continued
+        :return: tuple of final energy, final angles, history and (2-spsa) the final Hessian estimate
+        """
+
+        if self.save_history and reset_history:
+            self.reset_history()
+
+        state = {}
+        start = 0
+        if resume_from is not None:
+            checkpoint = self.load_checkpoint(resume_from)
+            initial_values = checkpoint["variables"]
+            state = checkpoint["state"]
+            start = checkpoint["iteration"]
+
+        if maxiter is None:
+            maxiter = self.maxiter
+
+        active_angles, passive_angles, variables = self.initialize_variables(objective, initial_values, variables)
+        keys = list(active_angles.keys())
+        x = numpy.asarray([active_angles[k] for k in keys], dtype=numpy.float64)
+        comp = self.compile_objective(objective=objective)
+
+        def to_dict(p):
+            return {**passive_angles, **dict(zip(keys, p))}
+
+        lr = self.lr
+        if "lr" in state:
+            # do not calibrate again
+            lr = float(state["lr"])
+        elif lr is None and self.method == '2-spsa':
+            lr = 1.0
+        elif lr is None:
+            lr = self.calibrate(comp, x, to_dict)
+
+        if not self.silent:
+            print(self)
+            print("{:15} : {} expectationvalues".format("Objective", objective.count_expectationvalues()))
+            print("{:15} : {}".format("method", self.method))
+            print("{:15} : {}".format("lr", lr))
+            print("{:15} : {}".format("active variables", len(active_angles)))
+
+        n = len(keys)
+        hessian = None
+        if self.method == '2-spsa':
+            hessian = state.get("hessian", numpy.eye(n))
+        last = None
+        if "last" in state:
+            last = float(state["last"])
+        # energy at x if known from blocking
+        e = None
+        blocked = False
+        for step in range(start, maxiter):
+            ak = lr / (step + 1 + self.stability) ** self.alpha
+            ck = self.perturbation / (step + 1) ** self.gamma
+
+            # the current point (if not known) and all perturbed points of this iteration as one batch
+            deltas = [numpy.random.choice([-1.0, 1.0], size=n) for i in range(self.resamplings)]
+            points = [] if e is not None else [x]
+            for delta in deltas:
+                points += [x + ck * delta, x - ck * delta]
+            if self.method == '2-spsa':
+                deltas2 = [numpy.random.choice([-1.0, 1.0], size=n) for i in range(self.resamplings)]
+                for delta, delta2 in zip(deltas, deltas2):
+                    points += [x + ck * delta + ck * delta2, x - ck * delta + ck * delta2]
+            values = self.evaluate_batch(comp, [to_dict(p) for p in points])
+            if e is None:
+                e, values = values[0], values[1:]
+
+            plus, minus = values[0:2 * self.resamplings:2], values[1:2 * self.resamplings:2]
+            gradient = numpy.mean([(p - m) / (2.0 * ck) * d for p, m, d in zip(plus, minus, deltas)], axis=0)
+
+            if self.save_history:
+                self.history.energies.append(e)
+                self.history.angles.append(format_variable_dictionary(to_dict(x)))
+                self.history.gradients.append(dict(zip(keys, gradient)))
+
+            if not self.silent:
+                if self.print_level > 2:
+                    print("Iteration: {} , Energy: {:+2.8f}, angles: {}".format(step, e, to_dict(x)))
+                else:
+                    print("Iteration: {} , Energy: {:+2.8f}".format(step, e))
+
+            # after a blocked step the energy did not change
+            if self.tol is not None and last is not None and not blocked and numpy.abs(e - last) <= self.tol:
+                if not self.silent:
+                    print('delta f smaller than tolerance {}. Stopping optimization.'.format(str(self.tol)))
+                break
+            last = e
+
+            if self.method == '2-spsa':
+                plus2 = values[2 * self.resamplings::2]
+                minus2 = values[2 * self.resamplings + 1::2]
+                estimate = numpy.zeros(shape=(n, n))
+                for p, m, p2, m2, d, d2 in zip(plus, minus, plus2, minus2, deltas, deltas2):
+                    rank_one = numpy.outer(d, d2)
+                    estimate += (p2 - p - m2 + m) / (2.0 * ck ** 2) * 0.5 * (rank_one + rank_one.T)
+                estimate /= self.resamplings
+                hessian = (step + 1) / (step + 2) * hessian + 1.0 / (step + 2) * estimate
+                new = x - ak * numpy.linalg.solve(self.regularize(hessian), gradient)
+            else:
+                new = x - ak * gradient
+
+            blocked = False
+            if self.blocking:
+                e_new = self.evaluate_batch(comp, [to_dict(new)])[0]
+                blocked = e_new > e
+                if not blocked:
+                    x, e = new, e_new
+                elif not self.silent and self.print_level > 2:
+                    print("Iteration: {} , step blocked, energy would be {:+2.8f}".format(step, e_new))
+            else:
+                x, e = new, None
+
+            if self.method == '2-spsa':
+                self.write_checkpoint(step + 1, to_dict(x), lr=lr, last=last, hessian=hessian)
+            else:
+                self.write_checkpoint(step + 1, to_dict(x), lr=lr, last=last)
+
+        angles = format_variable_dictionary(to_dict(x))
+        energy = self.evaluate_batch(comp, [to_dict(x)])[0]
+        self.close_workers()
+        return SPSAReturnType(energy=energy, angles=angles, history=self.history, hessian=hessian)
+
+    def calibrate(self, objective, x, to_dict) -> float:
+        """
+        Calibrate the learning rate such that the first steps have about the size of self.target_magnitude
+        :param objective: the compiled objective
+        :param x: the initial values of the active variables
+        :param to_dict: converts an array of active values to a variable dictionary
+        :return: the calibrated learning rate
+        """
+        ck = self.perturbation
+        deltas = [numpy.random.choice([-1.0, 1.0], size=len(x)) for i in range(self.calibration_steps)]
+        points = []
+        for delta in deltas:
+            points += [to_dict(x + ck * delta), to_dict(x - ck * delta)]
+        values = self.evaluate_batch(objective, points)
+        magnitude = numpy.mean(numpy.abs(values[0::2] - values[1::2])) / (2.0 * ck)
+        if numpy.isclose(magnitude, 0.0):
+            magnitude = 1.0
+        return self.target_magnitude / magnitude * (self.stability + 1) ** self.alpha
+
+    def regularize(self, hessian) -> numpy.ndarray:
+        """
+        :return: positive definite version of the Hessian estimate (absolute eigenvalues plus self.regularization)
+        """
+        eigvals, eigvecs = numpy.linalg.eigh(hessian)
+        return (eigvecs * (numpy.abs(eigvals) + self.regularization)) @ eigvecs.T
+
+    def __repr__(self):
+        infostring = super().__repr__()
+        infostring += "{:15} : {}\n".format("perturbation", self.perturbation)
+        infostring += "{:15} : {}\n".format("stability", self.stability)
+        infostring += "{:15} : {}\n".format("alpha", self.alpha)
+        infostring += "{:15} : {}\n".format("gamma", self.gamma)
+        infostring += "{:15} : {}\n".format("resamplings", self.resamplings)
+        infostring += "{:15} : {}\n".format("blocking", self.blocking)
+        return infostring
+
+
+def minimize(objective: Objective,
+             method: str = 'spsa',
+             lr: float = None,
+             perturbation: float = 0.1,
+             initial_values: typing.Dict[typing.Hashable, numbers.Real] = None,
+             variables: typing.List[typing.Hashable] = None,
+             samples: int = None,
+             maxiter: int = 100,
+             backend: str = None,
+             backend_options: typing.Dict = None,
+             noise: NoiseModel = None,
+             tol: float = None,
+             silent: bool = False,
+             save_history: bool = True,
+             stability: float = None,
+             alpha: float = 0.602,
+             gamma: float = 0.101,
+             target_magnitude: float = None,
+             calibration_steps: int = 10,
+             resamplings: int = 1,
+             regularization: float = 1.e-3,
+             blocking: bool = None,
+             n_workers: int = None,
+             checkpoint: str = None,
+             checkpoint_every: int = 10,
+             resume_from: str = None,
+             cache_dir: str = None,
+             history_options: dict = None,
+             *args,
+             **kwargs) -> SPSAReturnType:
+    """
+
+    Parameters
+    ----------
+    objective: Objective :
+        The tequila objective to optimize
+    method: str:
+        'spsa' or '2-spsa' (with Hessian estimation). Default 'spsa'
+    lr: float >0:
+        the learning rate (a). Default None: calibrated from a few gradient estimates at the initial point (spsa)
+        or 1 (2-spsa, Spall's recommendation for the preconditioned steps)
+    perturbation: float >0:
+        the perturbation (c). Default 0.1
+    initial_values: typing.Dict[typing.Hashable, numbers.Real]: (Default value = None):
+        Initial values as dictionary of Hashable types (variable keys) and floating point numbers. If given None they will be drawn randomly
+    variables: typing.List[typing.Hashable] :
+         (Default value = None)
+         List of Variables to optimize
+    samples: int :
+         (Default value = None)
+         samples/shots to take in every run of the quantum circuits (None activates full wavefunction simulation)
+    maxiter: int :
+         (Default value = 100)
+    backend: str :
+         (Default value = None)
+         Simulator backend, will be automatically chosen if set to None
+    backend_options: dict:
+        (Default value = None)
+        extra options, to be passed to the backend
+    noise: NoiseModel:
+         (Default value = None)
+         a NoiseModel to apply to all expectation values in the objective.
+    tol: float :
+         (Default value = None)
+         Convergence tolerance for optimization; if abs(delta f) smaller than tol, stop.
+    silent: bool :
+         (Default value = False)
+         No printout if True
+    save_history: bool:
+        (Default value = True)
+        Save the history throughout the optimization
+    stability: float:
+        (Default value = None)
+        stability constant (A) of the learning rate sequence lr/(k+1+A)^alpha, None means 10% of maxiter
+    alpha: float:
+        (Default value = 0.602)
+        exponent of the learning rate sequence
+    gamma: float:
+        (Default value = 0.101)
+        exponent of the perturbation sequence perturbation/(k+1)^gamma
+    target_magnitude: float:
+        (Default value = None)
+        size of the first steps if lr is calibrated (spsa), None means 2pi/10
+    calibration_steps: int:
+        (Default value = 10)
+        number of gradient estimates used for calibration
+    resamplings: int:
+        (Default value = 1)
+        number of independent gradient (and Hessian) estimates averaged in every iteration
+    regularization: float:
+        (Default value = 1.e-3)
+        added to the absolute eigenvalues of the Hessian estimate (2-spsa)
+    blocking: bool:
+        (Default value = None)
+        reject steps which increase the energy (one more evaluation per iteration), None means only for 2-spsa
+    n_workers: int:
+        (Default value = None)
+        number of worker processes evaluating the points of one iteration in parallel (None means sequential)
+    checkpoint: str:
+        (Default value = None)
+        file to which variables, learning rate, Hessian estimate, history and random state are written
+        every checkpoint_every iterations
+    checkpoint_every: int:
+        (Default value = 10)
+        iterations between two checkpoints
+    resume_from: str:
+        (Default value = None)
+        checkpoint file from which the optimization is continued
+    cache_dir: str:
+        (Default value = None)
+        directory of the persistent compilation cache (see tq.compile), avoids compiling again when resuming
+    history_options: dict:
+        (Default value = None)
+        keep the history in a ColumnarHistory with these options (max_length, spill_dir) to bound its memory
+
+    Returns
+    -------
+
+    """
+
+    optimizer = OptimizerSPSA(save_history=save_history,
+                              method=method,
+                              lr=lr,
+                              perturbation=perturbation,
+                              stability=stability,
+                              alpha=alpha,
+                              gamma=gamma,
+                              target_magnitude=target_magnitude,
+                              calibration_steps=calibration_steps,
+                              resamplings=resamplings,
+                              regularization=regularization,
+                              blocking=blocking,
+                              tol=tol,
+                              samples=samples, backend=backend,
+                              noise=noise, backend_options=backend_options,
+                              maxiter=maxiter,
+                              silent=silent,
+                              n_workers=n_workers,
+                              checkpoint=checkpoint,
+                              checkpoint_every=checkpoint_every,
+                              cache_dir=cache_dir,
+                              history_options=history_options)
+    return optimizer(objective=objective,
+                     maxiter=maxiter,
+                     initial_values=initial_values,
+                     variables=variables,
+                     resume_from=resume_from, *args, **kwargs)
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 from tequila import TequilaException, BitString, QubitWaveFunction
-from tequila.hamiltonian import QubitHamiltonian, paulis
+from tequila.hamiltonian import QubitHamiltonian, QubitTapering, paulis
 
 from tequila.circuit import QCircuit, gates
+from tequila.circuit.compiler import change_basis
 from tequila.objective.objective import Variable
 from tequila.utils import to_float
 
@@ -593,6 +594,26 @@ class QuantumChemistryBase:
             self.molecule.get_molecular_hamiltonian(occupied_indices, active_indices))
         return QubitHamiltonian(qubit_hamiltonian=self.transformation(fop))
 
+    def make_tapering(self, H: QubitHamiltonian = None, reference_orbitals: list = None) -> QubitTapering:
+        """Find the Z2 symmetries of the molecular Hamiltonian (e.g. the particle-number parities of both spins)
+
+        Parameters
+        ----------
+        H: QubitHamiltonian :
+            the Hamiltonian, default is None which leads to make_hamiltonian()
+        reference_orbitals: list :
+            doubly occupied orbitals of the reference, see reference_state
+
+        Returns
+        -------
+        QubitTapering in the symmetry sector of the reference state
+        taper the Hamiltonian with tapering.taper(H) and the reference with tapering.taper_circuit(prepare_reference())
+        """
+        if H is None:
+            H = self.make_hamiltonian()
+        reference = self.reference_state(reference_orbitals=reference_orbitals)
+        return QubitTapering.from_hamiltonian(H=H, reference=reference)
+
     def compute_one_body_integrals(self):
         """ """
         if hasattr(self, "molecule"):
@@ -837,6 +858,143 @@ class QuantumChemistryBase:
 
         return ResultCIS(omegas=list(omega), amplitudes=amplitudes)
 
+    def compute_rdms(self, U: QCircuit, variables: dict = None, spin_free: bool = True, get_rdm1: bool = True,
+                     get_rdm2: bool = True, samples: int = None, *args, **kwargs) \
+            -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """Compute the 1- and 2-particle reduced density matrices of the state prepared by U
+
+        All required paulistrings are collected once, duplicates over the RDM elements are evaluated only once.
+        Without samples they are evaluated together on a single simulated wavefunction,
+        with samples the paulistrings are grouped into qubit-wise commuting sets which share the measurements.
+
+        Parameters
+        ----------
+        U: QCircuit :
+            circuit which prepares the state (in the qubit encoding of this molecule)
+        variables: dict :
+            values of the variables of U
+        spin_free: bool :
+            return the spin-free RDMs in the spatial orbitals (default), otherwise the RDMs in the spin orbitals
+            (with the same ordering as in the Hamiltonian, i.e. even indices are spin up)
+            the spin-free RDMs only need the elements which conserve the spin projection
+        get_rdm1: bool :
+            compute the 1-RDM rdm1[p,q] = <a^p a_q>
+        get_rdm2: bool :
+            compute the 2-RDM rdm2[p,q,r,s] = <a^p a^q a_r a_s>, spin-free: sum over the spins of (p,s) and (q,r)
+        samples: int :
+            number of samples per group of commuting paulistrings, None for exact simulation
+        args
+        kwargs :
+            passed to tequila.simulate (e.g. backend, noise)
+
+        Returns
+        -------
+        tuple of rdm1 and rdm2 as numpy arrays (None if not computed)
+        the real parts are computed, which is sufficient for real orbitals
+        """
+        from tequila.objective.objective import ExpectationValue
+        from tequila.simulators.simulator_api import simulate
+
+        n_spatial = self.n_orbitals
+        n = 2 * n_spatial
+
+        def conserves_spin(*indices):
+            return sum(i % 2 for i in indices[:len(indices) // 2]) == sum(i % 2 for i in indices[len(indices) // 2:])
+
+        # unique elements and the hermitian parts of their operators
+        elements = []
+        if get_rdm1:
+            for p in range(n):
+                for q in range(p, n):
+                    if not spin_free or conserves_spin(p, q):
+                        fop = openfermion.FermionOperator(((p, 1), (q, 0)), 0.5)
+                        elements.append(((p, q), fop + openfermion.hermitian_conjugated(fop)))
+        if get_rdm2:
+            pairs = [(p, q) for p in range(n) for q in range(p + 1, n)]
+            for i, (p, q) in enumerate(pairs):
+                for r, s in pairs[i:]:
+                    if not spin_free or conserves_spin(p, q, r, s):
+                        fop = openfermion.FermionOperator(((p, 1), (q, 1), (r, 0), (s, 0)), 0.5)
+                        elements.append(((p, q, r, s), fop + openfermion.hermitian_conjugated(fop)))
+
+        # deduplicate the paulistrings of all elements
+        columns = {}
+        rows, cols, coeffs = [], [], []
+        for i, (_, fop) in enumerate(elements):
+            for key, coeff in self.transformation(fop).terms.items():
+                rows.append(i)
+                cols.append(columns.setdefault(key, len(columns)))
+                coeffs.append(coeff)
+        keys = list(columns.keys())
+        values = numpy.zeros(len(keys))
+
+        if samples is None:
+            operators = [QubitHamiltonian.from_openfermion(openfermion.QubitOperator(key, 1.0)) for key in keys]
+            if len(operators) > 0:
+                E = ExpectationValue(H=operators, U=U, shape=[len(operators)])
+                values = numpy.asarray(simulate(E, variables=variables, samples=None, *args, **kwargs)).reshape(-1)
+        else:
+            # greedy grouping into qubit-wise commuting sets, strings with many paulis first
+            groups = []
+            for k in sorted(range(len(keys)), key=lambda k: -len(keys[k])):
+                for basis, members in groups:
+                    if all(basis.get(q, p) == p for q, p in keys[k]):
+                        basis.update(dict(keys[k]))
+                        members.append(k)
+                        break
+                else:
+                    groups.append((dict(keys[k]), [k]))
+            for basis, members in groups:
+                circuit = U
+                for q, p in sorted(basis.items()):
+                    circuit = circuit + change_basis(target=q, axis=p)
+                if len(circuit.qubits) == 0:
+                    # nothing to measure, all paulistrings act as Z on qubits in state |0>
+                    values[members] = 1.0
+                    continue
+                # not all backends sample circuits without measurement instructions
+                circuit = circuit + gates.Measurement(target=circuit.qubits)
+                counts = simulate(circuit, variables=variables, samples=samples, *args, **kwargs)
+                position = {q: i for i, q in enumerate(circuit.qubits)}
+                outcomes = numpy.asarray([bitstring.array for bitstring in counts.keys()], dtype=int)
+                weights = numpy.asarray(list(counts.values()), dtype=float)
+                weights = weights / numpy.sum(weights)
+                for k in members:
+                    # qubits outside of the circuit are in state |0> and only carry Z
+                    measured = [position[q] for q, p in keys[k] if q in position]
+                    parity = numpy.sum(outcomes[:, measured], axis=1) % 2
+                    values[k] = numpy.sum(weights * (1 - 2 * parity))
+
+        contracted = numpy.zeros(len(elements))
+        if len(coeffs) > 0:
+            numpy.add.at(contracted, rows, numpy.real(numpy.asarray(coeffs) * values[cols]))
+
+        rdm1 = numpy.zeros([n, n]) if get_rdm1 else None
+        rdm2 = numpy.zeros([n, n, n, n]) if get_rdm2 else None
+        for (indices, _), value in zip(elements, contracted):
+            if len(indices) == 2:
+                p, q = indices
+                rdm1[p, q] = rdm1[q, p] = value
+            else:
+                p, q, r, s = indices
+                # antisymmetry in (p,q) and (r,s) and the symmetry of the real part under (p,q) <-> (r,s)
+                for a, b, c, d in [(p, q, r, s), (r, s, p, q)]:
+                    rdm2[a, b, c, d] = value
+                    rdm2[b, a, c, d] = -value
+                    rdm2[a, b, d, c] = -value
+                    rdm2[b, a, d, c] = value
+
+        if spin_free:
+            if get_rdm1:
+                rdm1 = rdm1[0::2, 0::2] + rdm1[1::2, 1::2]
+            if get_rdm2:
+                spin_free_rdm2 = numpy.zeros([n_spatial] * 4)
+                for sigma in range(2):
+                    for tau in range(2):
+                        spin_free_rdm2 += rdm2[sigma::2, tau::2, tau::2, sigma::2]
+                rdm2 = spin_free_rdm2
+        return rdm1, rdm2
+
     def __str__(self) -> str:
         result = str(type(self)) + "\n"
         for k, v in self.parameters.__dict__.items():
@@ -1,14 +1,15 @@
 from collections import namedtuple
-import typing, warnings
+import typing, warnings, os, hashlib
 from numbers import Real as RealNumber
 from typing import Dict, Union, Hashable
 
 from tequila.objective import Objective, Variable, assign_variable, format_variable_dictionary
 from tequila.utils.exceptions import TequilaException, TequilaWarning
-from tequila.simulators.simulator_base import BackendCircuit, BackendExpectationValue
+from tequila.simulators.simulator_base import BackendCircuit, BackendExpectationValue, \
+    BackendExpectationValueShifted
 from tequila.circuit.noise import NoiseModel
 
-SUPPORTED_BACKENDS = ["qulacs", "qiskit", "cirq", "pyquil", "symbolic"]
+SUPPORTED_BACKENDS = ["qulacs", "qiskit", "cirq", "pyquil", "jax", "symbolic"]
 SUPPORTED_NOISE_BACKENDS = ["qiskit", 'cirq', 'pyquil', 'qulacs']
 BackendTypes = namedtuple('BackendTypes', 'CircType ExpValueType')
 INSTALLED_SIMULATORS = {}
@@ -76,12 +77,29 @@ try:
 except ImportError:
     HAS_PYQUIL = False
 
+# statevector simulation in jax.numpy, differentiable end-to-end (see simulator_jax.JaxObjective)
+HAS_JAX = True
+try:
+    from tequila.simulators.simulator_jax import BackendCircuitJax, BackendExpectationValueJax
+
+    INSTALLED_SIMULATORS["jax"] = BackendTypes(CircType=BackendCircuitJax, ExpValueType=BackendExpectationValueJax)
+except ImportError:
+    HAS_JAX = False
+
 from tequila.simulators.simulator_symbolic import BackendCircuitSymbolic, BackendExpectationValueSymbolic
 
 INSTALLED_SIMULATORS["symbolic"] = BackendTypes(CircType=BackendCircuitSymbolic,
                                                 ExpValueType=BackendExpectationValueSymbolic)
 HAS_SYMBOLIC = True
 
+# needed to serialize compiled objectives for the compilation cache (transformations are lambdas)
+try:
+    import cloudpickle
+
+    HAS_CLOUDPICKLE = True
+except ImportError:
+    HAS_CLOUDPICKLE = False
+
 
 def show_available_simulators():
     """ """
@@ -102,7 +120,7 @@ def pick_backend(backend: str = None, samples: int = None, noise: NoiseModel = N
     :param backend: the demanded backend
     :param samples: if not None the simulator needs to be able to sample wavefunctions
     :param noise: if true,
-    :param exclude_symbolic: only for random choice
+    :param exclude_symbolic: only for random choice, exclude the symbolic and the other backends which can not sample
     :return: An installed backend as string
     """
 
@@ -141,7 +159,8 @@ def pick_backend(backend: str = None, samples: int = None, noise: NoiseModel = N
             backend = state.choice(list(INSTALLED_SAMPLERS.keys()), 1)[0]
 
         if exclude_symbolic:
-            while (backend == "symbolic"):
+            # wavefunction-only backends (like jax) are excluded as well if a sampler is installed
+            while (backend == "symbolic" or (backend not in INSTALLED_SAMPLERS and len(INSTALLED_SAMPLERS) > 0)):
                 backend = state.choice(list(INSTALLED_SIMULATORS.keys()), 1)[0]
         return backend
 
@@ -164,17 +183,22 @@ def compile_objective(objective: 'Objective',
                       backend: str = None,
                       samples: int = None,
                       noise: NoiseModel = None,
+                      expectationvalues: dict = None,
                       *args,
                       **kwargs) -> Objective:
     """
     Compiles an objective to a chosen backend
     The abstract circuits are replaced by the circuit objects of the backend
+    Shifted variants of the same expectation value (as created by the gradient) share a single compiled template
     Direct return if the objective was alrady compiled
     :param objective: abstract objective
     :param variables: The variables of the objective given as dictionary
     with keys as tequila Variables and values the corresponding real numbers
     :param backend: specify the backend or give None for automatic assignment
     :param noise: the NoiseModel to apply to the objective.
+    :param expectationvalues: dictionary of already compiled expectation values which is used and updated,
+    pass the same dictionary when compiling several objectives with the same backend and noise
+    to compile expectation values (and templates) which they share only once
     :return: Compiled Objective
     """
 
@@ -189,7 +213,7 @@ def compile_objective(objective: 'Objective',
     # check if compiling is necessary
     for arg in objective.args:
         if hasattr(arg, "U") and isinstance(arg, BackendExpectationValue):
-            if not isinstance(arg, ExpValueType):
+            if not isinstance(getattr(arg, "template", arg), ExpValueType):
                 warnings.warn(
                     "Looks like part the objective was already compiled for another backend.\nFound ExpectationValue of type {} and {}\n... proceeding with hybrid\n".format(
                         type(arg), ExpValueType), TequilaWarning)
@@ -201,14 +225,25 @@ def compile_objective(objective: 'Objective',
 
     compiled_args = []
     # avoid double compilations
-    expectationvalues = {}
+    if expectationvalues is None:
+        expectationvalues = {}
     for arg in objective.args:
         if hasattr(arg, "H") and hasattr(arg, "U") and not isinstance(arg, BackendExpectationValue):
-            if arg not in expectationvalues:
-                compiled_expval = ExpValueType(arg, variables, noise)
+            if arg in expectationvalues:
+                compiled_expval = expectationvalues[arg]
+            elif getattr(arg, "_template", None) is not None:
+                # the template is stored with a separate key, it can also appear as regular argument
+                key = (arg._template, "template")
+                if key not in expectationvalues:
+                    template, parameters = arg._template.shift_template()
+                    expectationvalues[key] = (ExpValueType(template, variables, noise), parameters)
+                compiled_template, parameters = expectationvalues[key]
+                shifts = {parameters[position]: shift for position, shift in arg._shifts.items()}
+                compiled_expval = BackendExpectationValueShifted(template=compiled_template, shifts=shifts)
                 expectationvalues[arg] = compiled_expval
             else:
-                compiled_expval = expectationvalues[arg]
+                compiled_expval = ExpValueType(arg, variables, noise)
+                expectationvalues[arg] = compiled_expval
             compiled_args.append(compiled_expval)
         else:
             compiled_args.append(arg)
@@ -356,6 +391,7 @@ def compile(objective: typing.Union['Objective', 'QCircuit'],
             samples: int = None,
             backend: str = None,
             noise: NoiseModel = None,
+            cache_dir: str = None,
             *args,
             **kwargs) -> typing.Union['BackendCircuit', 'Objective']:
     """Compile a tequila objective or circuit to a backend
@@ -373,6 +409,12 @@ def compile(objective: typing.Union['Objective', 'QCircuit'],
         specify the backend or give None for automatic assignment
     noise: NoiseModel : (Default value =None) :
         the noise model to apply to the objective or QCircuit.
+    cache_dir: str : (Default value = None) :
+        directory of a persistent compilation cache (created if it does not exist)
+        the compiled result is stored under a hash of the abstract objective, variables, backend, samples, noise
+        and all further keyword arguments
+        and loaded instead of compiling again in later calls (also from other processes), needs cloudpickle
+        the cache is not invalidated when tequila is updated, clear the directory in that case
 
     Returns
     -------
@@ -383,6 +425,10 @@ def compile(objective: typing.Union['Objective', 'QCircuit'],
 
     backend = pick_backend(backend=backend, noise=noise, samples=samples)
 
+    if cache_dir is not None:
+        return _compile_cached(cache_dir=cache_dir, objective=objective, variables=variables, samples=samples,
+                               backend=backend, noise=noise, *args, **kwargs)
+
     if variables is None and not (len(objective.extract_variables()) == 0):
         variables = {key: 0.0 for key in objective.extract_variables()}
     elif variables is not None:
@@ -390,7 +436,7 @@ def compile(objective: typing.Union['Objective', 'QCircuit'],
         variables = {assign_variable(k): v for k, v in variables.items()}
 
     if isinstance(objective, Objective) or hasattr(objective, "args"):
-        return compile_objective(objective=objective, variables=variables, backend=backend, noise=noise)
+        return compile_objective(objective=objective, variables=variables, backend=backend, noise=noise, **kwargs)
     elif hasattr(objective, "gates") or hasattr(objective, "abstract_circuit"):
         return compile_circuit(abstract_circuit=objective, variables=variables, backend=backend,
                                noise=noise, *args, **kwargs)
@@ -400,6 +446,39 @@ def compile(objective: typing.Union['Objective', 'QCircuit'],
                                                                                   object=objective))
 
 
+def _compile_cached(cache_dir: str, objective, backend: str, samples: int = None, noise: NoiseModel = None, *args,
+                    **kwargs):
+    """
+    Load the compiled objective or circuit from the cache directory, compile and store it if it is not there
+    The compiled backend objects only store the compiled abstract circuits and hamiltonians,
+    so loading skips the compilation and only translates into the backend types again
+    """
+    if not HAS_CLOUDPICKLE:
+        raise TequilaException("compilation cache needs the cloudpickle package: pip install cloudpickle")
+
+    # all arguments which end up in the compiled objects are part of the key (variables, device, backend options ...)
+    key = hashlib.sha256(cloudpickle.dumps((objective, backend, samples, noise, args,
+                                            sorted(kwargs.items(), key=lambda x: x[0])))).hexdigest()
+    filename = os.path.join(cache_dir, "{}.pickle".format(key))
+    if os.path.isfile(filename):
+        try:
+            with open(filename, "rb") as f:
+                return cloudpickle.load(f)
+        except Exception as e:
+            warnings.warn("could not load compiled objective from {}, compiling again\n{}".format(filename, str(e)),
+                          TequilaWarning)
+
+    compiled = compile(objective=objective, samples=samples, backend=backend, noise=noise, *args, **kwargs)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, so that processes which share the cache never read incomplete files
+    tmpname = "{}.{}.tmp".format(filename, os.getpid())
+    with open(tmpname, "wb") as f:
+        cloudpickle.dump(compiled, f)
+    os.replace(tmpname, filename)
+    return compiled
+
+
 def compile_to_function(objective: typing.Union['Objective', 'QCircuit'], *args,
                         **kwargs) -> typing.Union['BackendCircuit', 'Objective']:
     """
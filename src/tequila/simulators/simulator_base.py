@@ -6,6 +6,7 @@ from tequila.wavefunction.qubit_wavefunction import QubitWaveFunction
 from tequila.circuit.compiler import change_basis
 from tequila.circuit.gates import Measurement
 from tequila import BitString
+from tequila.hamiltonian.pauli_table import PauliTable
 from tequila.objective.objective import Variable, format_variable_dictionary
 from tequila.circuit import compiler
 
@@ -55,9 +56,21 @@ class BackendCircuit():
         return tuple(self._qubits)
 
     def __init__(self, abstract_circuit: QCircuit, variables, noise=None,
-                 use_mapping=True, optimize_circuit=True, *args, **kwargs):
+                 use_mapping=True, optimize_circuit=True, precompiled=False, *args, **kwargs):
+        """
+        :param abstract_circuit: the abstract tequila circuit
+        :param variables: dictionary with values for the variables of the circuit
+        :param noise: NoiseModel
+        :param use_mapping: map the active qubits of the circuit to a smaller register
+        :param optimize_circuit: let the backend optimize the translated circuit (only without noise)
+        :param precompiled: the abstract circuit was already compiled for this backend (e.g. by deserialization)
+        """
         self._variables = tuple(abstract_circuit.extract_variables())
+        # further backend specific arguments (e.g. the device), stored for serialization
+        self._init_kwargs = kwargs
+        self._variable_set = frozenset(self._variables)
         self.use_mapping = use_mapping
+        self._optimize_circuit = optimize_circuit
 
         compiler_arguments = self.compiler_arguments
         if noise is not None:
@@ -78,8 +91,16 @@ class BackendCircuit():
         self.abstract_qubit_map = {q: i for i, q in enumerate(qubits)}
         self.qubit_map = self.make_qubit_map(qubits)
 
-        compiled = c(abstract_circuit)
+        if precompiled:
+            compiled = abstract_circuit
+        else:
+            compiled = c(abstract_circuit)
         self.abstract_circuit = compiled
+        # translated basis changes and measurements for sampling, see measurement_suffix
+        self._measurement_suffixes = {}
+        self._sampling_circuits = {}
+        # positions of the parametrized gates in the translated circuit, see create_circuit
+        self.parameter_slots = None
         # translate into the backend object
         self.circuit = self.create_circuit(abstract_circuit=compiled, variables=variables)
 
@@ -88,6 +109,21 @@ class BackendCircuit():
 
         self.noise = noise
 
+    def __getstate__(self):
+        # backend objects are in general not serializable
+        # only the compiled abstract circuit is stored and translated again when loaded
+        return {"abstract_circuit": self.abstract_circuit,
+                "noise": self.noise,
+                "use_mapping": self.use_mapping,
+                "optimize_circuit": self._optimize_circuit,
+                "kwargs": self._init_kwargs}
+
+    def __setstate__(self, state):
+        state = dict(state)
+        kwargs = state.pop("kwargs", {})
+        variables = {k: 0.0 for k in state["abstract_circuit"].extract_variables()}
+        self.__init__(variables=variables, precompiled=True, **state, **kwargs)
+
     def __call__(self,
                  variables: typing.Dict[Variable, numbers.Real] = None,
                  samples: int = None,
@@ -95,7 +131,7 @@ class BackendCircuit():
                  **kwargs):
         variables = format_variable_dictionary(variables=variables)
         if self._variables is not None and len(self._variables) > 0:
-            if variables is None or set(self._variables) != set(variables.keys()):
+            if variables is None or self._variable_set != variables.keys():
                 raise TequilaException("BackendCircuit received not all variables. Circuit depends on variables {}, you gave {}".format(self._variables, variables))
         if samples is None:
             return self.simulate(variables=variables, noise=self.noise, *args, **kwargs)
@@ -114,19 +150,46 @@ class BackendCircuit():
 
         result = self.initialize_circuit(*args,**kwargs)
 
+        # record where the gates which depend on variables end up in the translated circuit
+        # add_parametrized_gate returns this position (or None if the backend does not support it)
+        parameter_slots = []
         for g in abstract_circuit.gates:
             if g.is_parametrized():
-                self.add_parametrized_gate(g, result, *args,**kwargs)
+                slot = self.add_parametrized_gate(g, result, *args,**kwargs)
+                if len(g.extract_variables()) > 0:
+                    parameter_slots.append((slot, g))
             else:
                 if not g.name == 'Measure':
                     self.add_basic_gate(g, result, *args, **kwargs)
                 else:
                     self.add_measurement(g, result, *args, **kwargs)
+
+        if abstract_circuit is self.abstract_circuit:
+            if any(slot is None for slot, g in parameter_slots):
+                self.parameter_slots = None
+            else:
+                self.parameter_slots = parameter_slots
         return result
 
     def add_parametrized_gate(self, gate, circuit, *args, **kwargs):
+        """
+        Translate the gate and add it to the circuit
+        Return a backend specific position of the gate (e.g. the index of its parameter)
+        which update_parameter can use to change the parameter in place afterwards
+        Returning None means the circuit needs to be translated again when the variables change
+        """
         TequilaException("Backend Handler needs to be overwritten for supported simulators")
 
+    def update_parameter(self, circuit, slot, gate, variables):
+        """
+        Overwrite together with add_parametrized_gate to change single parameters in place
+        :param circuit: the translated circuit
+        :param slot: the position which add_parametrized_gate returned for the gate
+        :param gate: the abstract gate
+        :param variables: the new variables
+        """
+        raise TequilaException("Backend Handler needs to be overwritten for supported simulators")
+
     def add_basic_gate(self, gate, circuit, *args, **kwargs):
         TequilaException("Backend Handler needs to be overwritten for supported simulators")
 
@@ -138,10 +201,16 @@ class BackendCircuit():
 
     def update_variables(self, variables):
         """
-        This is the default which just translates the circuit again
-        Overwrite in backend if parametrized circuits are supported
+        This is the default which changes the parameters of the translated circuit in place
+        if the backend records the positions of the parametrized gates (see add_parametrized_gate and update_parameter)
+        and just translates the circuit again otherwise
+        Overwrite in backend if parametrized circuits are supported in a different way
         """
-        self.circuit = self.create_circuit(abstract_circuit=self.abstract_circuit, variables=variables)
+        if self.parameter_slots is not None:
+            for slot, gate in self.parameter_slots:
+                self.update_parameter(circuit=self.circuit, slot=slot, gate=gate, variables=variables)
+        else:
+            self.circuit = self.create_circuit(abstract_circuit=self.abstract_circuit, variables=variables)
 
     def simulate(self, variables, initial_state=0, *args, **kwargs) -> QubitWaveFunction:
         """
@@ -171,10 +240,26 @@ class BackendCircuit():
         result.apply_keymap(keymap=keymap, initial_state=initial_state)
         return result
 
+    def measurement_suffix(self, basis: typing.Tuple[typing.Tuple[numbers.Integral, str], ...], measure: bool = True):
+        """
+        Translated basis change (followed by the measurement of the qubits) for the given measurement basis
+        Translated only once for each basis, all paulistrings of the same basis share it
+        :param basis: tuple of (qubit, axis) pairs for the measured qubits of the circuit
+        :param measure: add the measurement instruction
+        :return: the translated circuit
+        """
+        key = (basis, measure)
+        if key not in self._measurement_suffixes:
+            circuit = QCircuit()
+            for idx, axis in basis:
+                circuit += change_basis(target=idx, axis=axis)
+            if measure:
+                circuit += Measurement(target=[idx for idx, axis in basis])
+            self._measurement_suffixes[key] = self.create_circuit(abstract_circuit=circuit, variables=None)
+        return self._measurement_suffixes[key]
+
     def sample_paulistring(self, samples: int, paulistring, *args,
                            **kwargs) -> numbers.Real:
-        # make basis change and translate to backend
-        basis_change = QCircuit()
         not_in_u = []  # all indices of the paulistring which are not part of the circuit i.e. will always have the same outcome
         qubits = []
         for idx, p in paulistring.items():
@@ -182,7 +267,6 @@ class BackendCircuit():
                 not_in_u.append(idx)
             else:
                 qubits.append(idx)
-                basis_change += change_basis(target=idx, axis=p)
 
         # check the constant parts as <0|pauli|0>, can only be 0 or 1
         # so we can do a fast return of one of them is not Z
@@ -191,15 +275,16 @@ class BackendCircuit():
             if pauli.upper() != "Z":
                 return 0.0
 
-        # make measurement instruction
-        measure = QCircuit()
         if len(qubits) == 0:
             # no measurement instructions for a constant term as paulistring
             return paulistring.coeff
         else:
-            measure += Measurement(target=qubits)
-            #measure += Measurement(name=str(paulistring), target=qubits)
-            circuit = self.circuit + self.create_circuit(basis_change + measure)
+            # make basis change and measurement instruction
+            # the full circuit is reused as long as the translated circuit does not change
+            basis = tuple(sorted((idx, paulistring[idx].upper()) for idx in qubits))
+            if basis not in self._sampling_circuits or self._sampling_circuits[basis][0] is not self.circuit:
+                self._sampling_circuits[basis] = (self.circuit, self.circuit + self.measurement_suffix(basis=basis))
+            circuit = self._sampling_circuits[basis][1]
             # run simulators
             counts = self.do_sample(samples=samples, circuit=circuit, *args, **kwargs)
             # compute energy
@@ -246,6 +331,7 @@ class BackendCircuit():
         Can be overwritten if the backend supports its own circuit optimization
         To be clear: Optimization means optimizing the compiled circuit w.r.t depth not
         optimizing parameters
+        The positions in parameter_slots need to stay valid (or parameter_slots needs to be set to None)
         :return: Optimized circuit, if supported by backend, else no action is taken
         """
         return circuit
@@ -277,6 +363,10 @@ class BackendExpectationValue:
     # should be deactivated if expectationvalues are computed by the backend since the hamiltonians are currently not mapped
     use_mapping = True
 
+    # paulistrings with smaller coefficients are removed before the hamiltonians are initialized
+    # the resulting error bounds are stored in truncation_error (see QubitHamiltonian.screen), None switches it off
+    screening_threshold = 1.e-8
+
     @property
     def n_qubits(self):
         return self.U.n_qubits
@@ -297,25 +387,47 @@ class BackendExpectationValue:
 
     def __init__(self, E, variables, noise):
         self._U = self.initialize_unitary(E.U, variables, noise)
-        self._H = self.initialize_hamiltonian(E.H)
-        self._abstract_hamiltonians = E.H
+        self._abstract_hamiltonians, self._constants, self.truncation_error = self.screen_hamiltonians(E.H)
+        self._stacked = None
+        self._H = self.initialize_hamiltonian(self._abstract_hamiltonians)
         self._variables = E.extract_variables()
+        self._variable_set = frozenset(self._variables)
         self._contraction = E._contraction
         self._shape = E._shape
 
+    def __getstate__(self):
+        # the backend hamiltonians are initialized again when loaded
+        state = dict(self.__dict__)
+        del state["_H"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._H = self.initialize_hamiltonian(self._abstract_hamiltonians)
+
     def __call__(self, variables, samples: int = None, *args, **kwargs):
 
         variables = format_variable_dictionary(variables=variables)
         if self._variables is not None and len(self._variables) > 0:
-            if variables is None or (not set(self._variables) <= set(variables.keys())):
+            if variables is None or (not self._variable_set <= variables.keys()):
                 raise TequilaException(
                     "BackendExpectationValue received not all variables. Circuit depends on variables {}, you gave {}".format(
                         self._variables, variables))
+        return self.evaluate(variables, samples=samples, *args, **kwargs)
 
+    def evaluate(self, variables, samples: int = None, *args, **kwargs):
+        """
+        Evaluate without formatting and checking the variables (see Objective.positional)
+        :param variables: dictionary with tequila Variables as keys and values for all variables of the expectationvalue
+        :param samples: number of samples, None means full wavefunction simulation
+        :return: the expectationvalue
+        """
         if samples is None:
             data = self.simulate(variables=variables, *args, **kwargs)
         else:
             data = self.sample(variables=variables, samples=samples, *args, **kwargs)
+        # constant parts of the hamiltonians are not simulated
+        data = data + self._constants
 
         if self._shape is None and self._contraction is None:
             # this is the default
@@ -328,6 +440,31 @@ class BackendExpectationValue:
         else:
             return self._contraction(data)
 
+    def screen_hamiltonians(self, hamiltonians) -> tuple:
+        """
+        Screen the hamiltonians (see QubitHamiltonian.screen) and split off their constant parts
+        The constant parts are added to the results in __call__ without simulation
+        :param hamiltonians: the abstract hamiltonians
+        :return: tuple of the screened hamiltonians without constant parts,
+        array with the constant parts and array with the truncation errors
+        """
+        screened = []
+        constants = []
+        errors = []
+        for H in hamiltonians:
+            error = 0.0
+            if self.screening_threshold is not None:
+                H, error = H.screen(threshold=self.screening_threshold)
+            constant, H = H.split_constant()
+            try:
+                constant = to_float(constant)
+            except TypeError:
+                pass
+            screened.append(H)
+            constants.append(constant)
+            errors.append(error)
+        return tuple(screened), numpy.asarray(constants), numpy.asarray(errors)
+
     def initialize_hamiltonian(self, H):
         return tuple(H)
 
@@ -349,33 +486,132 @@ class BackendExpectationValue:
             result.append(to_float(E))
         return numpy.asarray(result)
 
+    @staticmethod
+    def stack_hamiltonians(tables: typing.List[PauliTable]) -> typing.Tuple[PauliTable, numpy.ndarray]:
+        """
+        :param tables: one PauliTable for each hamiltonian
+        :return: a single table with the rows of all tables and the index of the hamiltonian of every row
+        """
+        stacked = PauliTable.zero()
+        for table in tables:
+            stacked = stacked.concatenate(table)
+        owners = numpy.repeat(numpy.arange(len(tables)), [len(table) for table in tables])
+        return stacked, owners
+
+    @staticmethod
+    def evaluate_stacked(stacked: typing.Tuple[PauliTable, numpy.ndarray], n_hamiltonians: int,
+                         state: numpy.ndarray, n_qubits: int) -> numpy.ndarray:
+        """
+        Evaluate all hamiltonians of a stacked table in one pass over the amplitudes (see PauliTable.expectation_values)
+        :param stacked: result of stack_hamiltonians
+        :param n_hamiltonians: number of hamiltonians
+        :param state: dense amplitude array (qubit 0 is the most significant bit)
+        :param n_qubits: number of qubits of the state
+        :return: array with one expectation value per hamiltonian
+        """
+        table, owners = stacked
+        values = numpy.zeros(n_hamiltonians, dtype=numpy.complex128)
+        numpy.add.at(values, owners, table.expectation_values(state=state, n_qubits=n_qubits))
+        return numpy.asarray([to_float(v) for v in values])
+
     def simulate(self, variables, *args, **kwargs):
         self.update_variables(variables)
-        result = []
-        for H in self.H:
-            final_E = 0.0
-            if self.use_mapping:
-                # The hamiltonian can be defined on more qubits as the unitaries
-                qubits_h = H.qubits
-                qubits_u = self.U.qubits
-                all_qubits = list(set(qubits_h) | set(qubits_u) | set(range(self.U.abstract_circuit.max_qubit() + 1)))
-                keymap = KeyMapSubregisterToRegister(subregister=qubits_u, register=all_qubits)
-            else:
-                if H.qubits != self.U.qubits:
+        if all(len(H) == 0 for H in self.H):
+            # nothing left after the constant parts were removed
+            return numpy.zeros(len(self.H))
+        qubits_h = sorted(set(q for H in self.H for q in H.qubits))
+        if self.use_mapping:
+            # The hamiltonian can be defined on more qubits as the unitaries
+            qubits_u = self.U.qubits
+            # the register needs to be contiguous since the hamiltonian is applied with the absolute qubit indices
+            all_qubits = list(range(max(list(qubits_h) + list(qubits_u) + [self.U.abstract_circuit.max_qubit()]) + 1))
+            keymap = KeyMapSubregisterToRegister(subregister=qubits_u, register=all_qubits)
+        else:
+            for H in self.H:
+                if len(H) > 0 and H.qubits != self.U.qubits:
                     raise TequilaException(
                         "Can not compute expectation value without using qubit mappings."
                         " Your Hamiltonian and your Unitary do not act on the same set of qubits. "
                         "Hamiltonian acts on {}, Unitary acts on {}".format(
                             H.qubits, self.U.qubits))
-                keymap = KeyMapSubregisterToRegister(subregister=self.U.qubits, register=self.U.qubits)
-            # TODO inefficient, let the backend do it if possible or interface some library
-            simresult = self.U.simulate(variables=variables, *args, **kwargs)
-            wfn = simresult.apply_keymap(keymap=keymap)
-            final_E += wfn.compute_expectationvalue(operator=H)
-
-            result.append(to_float(final_E))
-        return numpy.asarray(result)
+            keymap = KeyMapSubregisterToRegister(subregister=self.U.qubits, register=self.U.qubits)
+        # the state is simulated once for all hamiltonians
+        simresult = self.U.simulate(variables=variables, *args, **kwargs)
+        wfn = simresult.apply_keymap(keymap=keymap)
+
+        if self._stacked is None:
+            tables = [H.pauli_table for H in self.H]
+            if all(table.is_numeric for table in tables):
+                self._stacked = self.stack_hamiltonians(tables)
+            else:
+                self._stacked = False
+        n_qubits = max(wfn.n_qubits, max(qubits_h) + 1)
+        if self._stacked is False or n_qubits > 24:
+            # symbolic coefficients or too many qubits for a dense array
+            return numpy.asarray([to_float(wfn.compute_expectationvalue(operator=H)) if len(H) > 0 else 0.0
+                                  for H in self.H])
+        state = numpy.zeros(2 ** n_qubits, dtype=numpy.complex128)
+        for k, v in wfn.items():
+            state[int(k) << (n_qubits - k.nbits)] = v
+        return self.evaluate_stacked(self._stacked, len(self.H), state, n_qubits)
 
     def sample_paulistring(self, samples: int,
                            paulistring,*args,**kwargs) -> numbers.Real:
         return self.U.sample_paulistring(samples=samples, paulistring=paulistring,*args,**kwargs)
+
+
+class BackendExpectationValueShifted(BackendExpectationValue):
+    """
+    Compiled variant of an expectation value where constant shifts are added to some gate parameters
+    (see ExpectationValueImpl.shifted, used by the shift rule)
+    All variants of the same template share the compiled template
+    the shifts are passed down to it together with the variables at call time
+    """
+
+    @property
+    def template(self):
+        return self._template
+
+    def __init__(self, template: BackendExpectationValue, shifts: dict):
+        """
+        :param template: the compiled template (see ExpectationValueImpl.shift_template)
+        :param shifts: dictionary with the ShiftedParameter objects of the template as keys and the shifts as values
+        """
+        self._template = template
+        self._shifts = shifts
+        self._U = template.U
+        self._H = template.H
+        self._abstract_hamiltonians = template._abstract_hamiltonians
+        self._constants = template._constants
+        self.truncation_error = template.truncation_error
+        self._variables = template._variables
+        self._variable_set = template._variable_set
+        self._contraction = None
+        self._shape = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_U"]
+        del state["_H"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._U = self._template.U
+        self._H = self._template.H
+
+    def shifted_variables(self, variables):
+        if variables is None:
+            variables = {}
+        variables = format_variable_dictionary(variables=variables)
+        variables.update(self._shifts)
+        return variables
+
+    def update_variables(self, variables):
+        self._template.update_variables(variables=self.shifted_variables(variables))
+
+    def simulate(self, variables, *args, **kwargs):
+        return self._template.simulate(variables=self.shifted_variables(variables), *args, **kwargs)
+
+    def sample(self, variables, samples, *args, **kwargs):
+        return self._template.sample(variables=self.shifted_variables(variables), samples=samples, *args, **kwargs)
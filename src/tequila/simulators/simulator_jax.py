@@ -0,0 +1,413 @@
+"""
+Statevector simulator written in jax.numpy
+Circuits and expectation values are translated into pure functions of a parameter vector,
+which are jitted and can be differentiated with jax.grad and vectorized with jax.vmap (see JaxObjective)
+Only full wavefunction simulation without noise is supported
+The backend computes in double precision (jax.experimental.enable_x64 around every entry point),
+the global jax configuration is not changed
+"""
+import typing, numbers
+import numpy
+import jax
+from jax import numpy as jnp
+from jax.experimental import enable_x64
+
+from tequila.utils.exceptions import TequilaException
+from tequila.objective.objective import Objective, Variable, ShiftedParameter, ExpectationValueImpl, \
+    assign_variable, format_variable_dictionary
+from tequila.simulators.simulator_base import BackendCircuit, BackendExpectationValue, \
+    BackendExpectationValueShifted
+from tequila.wavefunction.qubit_wavefunction import QubitWaveFunction
+
+_IDENTITY = numpy.eye(2, dtype=numpy.complex128)
+_MATRICES = {
+    "X": numpy.asarray([[0.0, 1.0], [1.0, 0.0]], dtype=numpy.complex128),
+    "Y": numpy.asarray([[0.0, -1.0j], [1.0j, 0.0]], dtype=numpy.complex128),
+    "Z": numpy.asarray([[1.0, 0.0], [0.0, -1.0]], dtype=numpy.complex128),
+    "H": numpy.asarray([[1.0, 1.0], [1.0, -1.0]], dtype=numpy.complex128) / numpy.sqrt(2.0),
+}
+
+
+class TequilaJaxException(TequilaException):
+    def __str__(self):
+        return "Error in jax backend:" + self.message
+
+
+def _gate_matrix(gate, variables):
+    """
+    :param gate: single qubit gate (controls are applied separately)
+    :param variables: dictionary with values (or jax tracers) for the variables of the gate
+    :return: the 2x2 matrix of the gate
+    """
+    name = gate.name.upper()
+    if name in _MATRICES:
+        if not gate.is_parametrized():
+            return _MATRICES[name]
+        # X, Y, Z and H are involutions: P^t = (1+e^(i pi t))/2 + (1-e^(i pi t))/2 P
+        phase = jnp.exp(1.0j * jnp.pi * gate.parameter(variables))
+        return 0.5 * (1.0 + phase) * _IDENTITY + 0.5 * (1.0 - phase) * _MATRICES[name]
+    angle = gate.parameter(variables)
+    if name == "RX":
+        c = jnp.cos(0.5 * angle)
+        s = -1.0j * jnp.sin(0.5 * angle)
+        return jnp.stack([jnp.stack([c, s]), jnp.stack([s, c])])
+    elif name == "RY":
+        c = jnp.cos(0.5 * angle)
+        s = jnp.sin(0.5 * angle)
+        return jnp.stack([jnp.stack([c, -s]), jnp.stack([s, c])]).astype(jnp.complex128)
+    elif name == "RZ":
+        return jnp.diag(jnp.stack([jnp.exp(-0.5j * angle), jnp.exp(0.5j * angle)]))
+    elif name == "PHASE":
+        return jnp.diag(jnp.stack([jnp.ones_like(angle) + 0.0j, jnp.exp(1.0j * angle)]))
+    raise TequilaJaxException("gate {} is not supported".format(gate))
+
+
+def _apply_gate(state, matrix, target: int, mask):
+    """
+    :param state: the state as tensor with one axis per qubit
+    :param matrix: 2x2 matrix acting on the target axis
+    :param mask: boolean tensor which is True where all controls are 1 (None for uncontrolled gates)
+    """
+    result = jnp.moveaxis(jnp.tensordot(matrix, state, axes=[[1], [target]]), 0, target)
+    if mask is not None:
+        result = jnp.where(mask, result, state)
+    return result
+
+
+def _shift_parameters(gates) -> list:
+    """
+    :return: the ShiftedParameter objects (see ExpectationValueImpl.shift_template) in the parameters of the gates
+    """
+    result = []
+
+    def collect(parameter):
+        if isinstance(parameter, ShiftedParameter):
+            if parameter not in result:
+                result.append(parameter)
+        elif isinstance(parameter, Objective):
+            for arg in parameter.args:
+                collect(arg)
+
+    for gate in gates:
+        if gate.is_parametrized():
+            collect(gate.parameter)
+    return result
+
+
+def _pauli_terms(hamiltonians, axes: dict, n_qubits: int):
+    """
+    Every paulistring P acts on the amplitudes as (P psi)[x] = phase[x] psi[perm[x]]
+    :param hamiltonians: the qubit hamiltonians
+    :param axes: dictionary which maps the qubits to the axes of the state (axis 0 is the most significant bit)
+    :param n_qubits: number of qubits of the state
+    :return: permutations, phases and coefficients (one row per paulistring)
+    and a matrix which sums the paulistrings of every hamiltonian
+    """
+    dim = 2 ** n_qubits
+    indices = numpy.arange(dim)
+    perms, phases, coeffs, owners = [], [], [], []
+    for i, H in enumerate(hamiltonians):
+        for ps in H.paulistrings:
+            try:
+                coeff = complex(ps.coeff)
+            except TypeError:
+                raise TequilaJaxException("hamiltonians with symbolic coefficients are not supported")
+            flip = 0
+            source_phase = numpy.ones(dim, dtype=numpy.complex128)
+            for q, p in ps.items():
+                shift = n_qubits - 1 - axes[q]
+                bits = (indices >> shift) & 1
+                p = p.upper()
+                if p in ["X", "Y"]:
+                    flip |= 1 << shift
+                if p == "Y":
+                    source_phase = source_phase * 1.0j * (1 - 2 * bits)
+                elif p == "Z":
+                    source_phase = source_phase * (1 - 2 * bits)
+            perm = indices ^ flip
+            perms.append(perm)
+            phases.append(source_phase[perm])
+            coeffs.append(coeff)
+            owners.append(i)
+    summation = numpy.zeros((len(hamiltonians), len(coeffs)))
+    summation[owners, numpy.arange(len(coeffs))] = 1.0
+    if len(coeffs) == 0:
+        return (numpy.zeros((0, dim), dtype=numpy.int64), numpy.zeros((0, dim), dtype=numpy.complex128),
+                numpy.zeros(0, dtype=numpy.complex128), summation)
+    return numpy.asarray(perms), numpy.asarray(phases), numpy.asarray(coeffs), summation
+
+
+class BackendCircuitJax(BackendCircuit):
+    """
+    The circuit is not translated, the gates are applied by a pure function of the parameter vector
+    (statevector), the order of the parameters is given by parameter_keys
+    """
+
+    compiler_arguments = {
+        "trotterized": True,
+        "swap": True,
+        "multitarget": True,
+        "controlled_rotation": False,
+        "gaussian": True,
+        "exponential_pauli": True,
+        "controlled_exponential_pauli": True,
+        "phase": False,
+        "power": False,
+        "hadamard_power": False,
+        "controlled_power": False,
+        "controlled_phase": False,
+        "toffoli": False,
+        "phase_to_z": False,
+        "cc_max": False
+    }
+
+    def create_circuit(self, abstract_circuit, *args, **kwargs):
+        if abstract_circuit is self.abstract_circuit:
+            self._initialize_program(abstract_circuit)
+        return abstract_circuit
+
+    def _initialize_program(self, abstract_circuit):
+        n_qubits = self.n_qubits
+        gates = []
+        for gate in abstract_circuit.gates:
+            if gate.name == "Measure":
+                continue
+            if len(gate.target) != 1:
+                raise TequilaJaxException("gate {} was not compiled to single target gates".format(gate))
+            mask = None
+            if gate.is_controlled():
+                mask = numpy.zeros((2,) * n_qubits, dtype=bool)
+                index = [slice(None)] * n_qubits
+                for c in gate.control:
+                    index[self.qubit_map[c]] = 1
+                mask[tuple(index)] = True
+            gates.append((gate, self.qubit_map[gate.target[0]], mask))
+        self._gates = gates
+        # the variables of the circuit come first, shifts which are not given are zero
+        self._circuit_keys = tuple(assign_variable(k) for k in abstract_circuit.extract_variables())
+        self.parameter_keys = self._circuit_keys + tuple(_shift_parameters(abstract_circuit.gates))
+        self._simulate = jax.jit(self.statevector)
+
+    def statevector(self, values, initial_state):
+        """
+        Pure function (can be jitted and differentiated)
+        :param values: vector with the values of the parameters in the order of self.parameter_keys
+        :param initial_state: dense initial state
+        :return: the dense final state (qubit 0 of the register is the most significant bit)
+        """
+        variables = dict(zip(self.parameter_keys, values))
+        state = jnp.reshape(initial_state, (2,) * self.n_qubits)
+        for gate, target, mask in self._gates:
+            state = _apply_gate(state, _gate_matrix(gate, variables), target, mask)
+        return jnp.reshape(state, (-1,))
+
+    def parameter_vector(self, variables) -> jnp.ndarray:
+        """
+        :param variables: dictionary with values for all variables (and optionally shifts) of the circuit
+        :return: the values in the order of self.parameter_keys
+        """
+        values = [variables[k] for k in self._circuit_keys]
+        for k in self.parameter_keys[len(self._circuit_keys):]:
+            try:
+                values.append(variables[k])
+            except KeyError:
+                values.append(0.0)
+        return jnp.asarray(values, dtype=jnp.float64)
+
+    def initial_vector(self, initial_state: int = 0) -> jnp.ndarray:
+        state = numpy.zeros(2 ** self.n_qubits, dtype=numpy.complex128)
+        state[initial_state] = 1.0
+        return jnp.asarray(state)
+
+    def update_variables(self, variables):
+        # the parameters are passed with every simulation
+        pass
+
+    @enable_x64()
+    def do_simulate(self, variables, initial_state=0, *args, **kwargs) -> QubitWaveFunction:
+        state = self._simulate(self.parameter_vector(variables), self.initial_vector(initial_state))
+        return QubitWaveFunction.from_array(arr=numpy.asarray(state))
+
+    def do_sample(self, *args, **kwargs):
+        raise TequilaJaxException("sampling is not supported, use another backend")
+
+    def sample(self, *args, **kwargs):
+        raise TequilaJaxException("sampling is not supported, use another backend")
+
+
+class BackendExpectationValueJax(BackendExpectationValue):
+    """
+    All hamiltonians are evaluated by a single jitted function of the parameter vector of the circuit
+    jax_evaluate gives the traceable version for JaxObjective
+    """
+    BackendCircuitType = BackendCircuitJax
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for k in ["_expectationvalues", "_terms"]:
+            state.pop(k, None)
+        return state
+
+    def initialize_unitary(self, U, variables, noise):
+        if noise is not None:
+            raise TequilaJaxException("noise is not supported, use another backend")
+        return super().initialize_unitary(U=U, variables=variables, noise=noise)
+
+    def initialize_hamiltonian(self, H):
+        H = tuple(H)
+        # the hamiltonian can act on qubits the circuit does not touch, they are appended in state |0>
+        axes = dict(self.U.qubit_map)
+        extra = sorted(set(q for h in H for q in h.qubits if q not in axes))
+        for i, q in enumerate(extra):
+            axes[q] = self.U.n_qubits + i
+        self._n_extra = len(extra)
+        self._terms = _pauli_terms(H, axes, self.U.n_qubits + self._n_extra)
+        self._expectationvalues = jax.jit(self.expectationvalues)
+        return H
+
+    def expectationvalues(self, values, initial_state):
+        """
+        Pure function (can be jitted and differentiated)
+        :param values: parameter vector in the order of U.parameter_keys
+        :param initial_state: dense initial state of the circuit
+        :return: the expectationvalues of all hamiltonians (without their constant parts)
+        """
+        state = self.U.statevector(values, initial_state)
+        if self._n_extra > 0:
+            state = jnp.reshape(jnp.zeros((state.shape[0], 2 ** self._n_extra), dtype=state.dtype)
+                                .at[:, 0].set(state), (-1,))
+        perms, phases, coeffs, summation = self._terms
+        if len(coeffs) == 0:
+            return jnp.zeros(summation.shape[0])
+        terms = jnp.sum(jnp.conj(state)[None, :] * phases * state[perms], axis=1)
+        return jnp.real(jnp.asarray(summation) @ (coeffs * terms))
+
+    @enable_x64()
+    def simulate(self, variables, initial_state: int = 0, *args, **kwargs):
+        values = self._expectationvalues(self.U.parameter_vector(variables), self.U.initial_vector(initial_state))
+        return numpy.asarray(values)
+
+    def sample(self, *args, **kwargs):
+        raise TequilaJaxException("sampling is not supported, use another backend")
+
+    def jax_evaluate(self, variables):
+        """
+        Traceable version of evaluate (full wavefunction simulation)
+        :param variables: dictionary with values (or jax tracers) for the variables of the expectationvalue
+        """
+        data = self.expectationvalues(self.U.parameter_vector(variables), self.U.initial_vector()) + self._constants
+        if self._shape is None and self._contraction is None:
+            return jnp.sum(data)
+        if self._shape is not None:
+            data = data.reshape(self._shape)
+        if self._contraction is None:
+            return data
+        return self._contraction(data)
+
+
+class JaxObjective:
+    """
+    A tequila Objective as pure function of a parameter vector
+    function can be used with jax.jit, jax.grad, jax.hessian and jax.vmap,
+    calling the JaxObjective evaluates the jitted function
+    gradient and hessian give the exact derivatives by automatic differentiation (no shift rule circuits)
+    """
+
+    @property
+    def keys(self) -> typing.Tuple[Variable, ...]:
+        return self._keys
+
+    def __init__(self, objective: Objective, keys: typing.List[typing.Hashable] = None,
+                 fixed: typing.Dict[typing.Hashable, numbers.Real] = None):
+        """
+        :param objective: the objective, compiled for the jax backend if it is not already
+        :param keys: the order of the variables in the parameter vector, None means objective.extract_variables()
+        :param fixed: values for variables which are not part of the parameter vector
+        """
+        if any(isinstance(arg, ExpectationValueImpl) for arg in objective.args):
+            from tequila.simulators.simulator_api import compile
+            objective = compile(objective=objective, backend="jax")
+        if keys is None:
+            keys = objective.extract_variables()
+        self.objective = objective
+        self._keys = tuple(assign_variable(k) for k in keys)
+        self._fixed = {}
+        if fixed is not None:
+            self._fixed = {assign_variable(k): v for k, v in fixed.items() if assign_variable(k) not in self._keys}
+        missing = [v for v in objective.extract_variables() if v not in self._keys and v not in self._fixed]
+        if len(missing) > 0:
+            raise TequilaJaxException("no values for the variables {}".format(missing))
+
+        unique = {}
+        self._functions = []
+        self._positions = []
+        for arg in objective.args:
+            if arg not in unique:
+                unique[arg] = len(self._functions)
+                self._functions.append(self._traceable(arg))
+            self._positions.append(unique[arg])
+        self._transformation = objective.transformation
+
+        self._jitted = jax.jit(self.function)
+        self._gradient = jax.jit(jax.grad(self.function))
+        self._hessian = jax.jit(jax.hessian(self.function))
+        self._cache = {}
+
+    @staticmethod
+    def _traceable(arg):
+        if isinstance(arg, BackendExpectationValueShifted) and isinstance(arg._template, BackendExpectationValueJax):
+            return lambda variables: arg._template.jax_evaluate(arg.shifted_variables(variables))
+        elif isinstance(arg, BackendExpectationValueJax):
+            return arg.jax_evaluate
+        elif isinstance(arg, BackendExpectationValue):
+            raise TequilaJaxException("expectationvalue was compiled for another backend: {}".format(type(arg)))
+        # variables and constants
+        return arg
+
+    @enable_x64()
+    def function(self, values):
+        """
+        Pure function of the parameter vector (in the order of self.keys)
+        """
+        variables = dict(zip(self._keys, values))
+        variables.update(self._fixed)
+        results = [f(variables) for f in self._functions]
+        return self._transformation(*[results[i] for i in self._positions])
+
+    @enable_x64()
+    def __call__(self, values, *args, **kwargs) -> float:
+        return float(self._jitted(jnp.asarray(values, dtype=jnp.float64)))
+
+    @enable_x64()
+    def gradient(self, values) -> numpy.ndarray:
+        """
+        :return: the exact gradient at values (in the order of self.keys)
+        """
+        return numpy.asarray(self._gradient(jnp.asarray(values, dtype=jnp.float64)))
+
+    @enable_x64()
+    def hessian(self, values) -> numpy.ndarray:
+        """
+        :return: the exact Hessian at values (in the order of self.keys)
+        """
+        return numpy.asarray(self._hessian(jnp.asarray(values, dtype=jnp.float64)))
+
+    def derivative(self, variables, index: typing.Tuple[int, ...]) -> float:
+        """
+        Component of the gradient (index of length 1) or Hessian (index of length 2)
+        The full gradient or Hessian is computed once per point and the components are handed out
+        :param variables: dictionary with the values of all variables in self.keys
+        """
+        variables = format_variable_dictionary(variables)
+        values = tuple(float(variables[k]) for k in self._keys)
+        order = len(index)
+        if self._cache.get(order, (None,))[0] != values:
+            f = self.gradient if order == 1 else self.hessian
+            self._cache[order] = (values, f(numpy.asarray(values)))
+        return self._cache[order][1][index]
+
+    def count_expectationvalues(self, *args, **kwargs):
+        return self.objective.count_expectationvalues(*args, **kwargs)
+
+    def __repr__(self):
+        return "JaxObjective with keys {}".format(self._keys)
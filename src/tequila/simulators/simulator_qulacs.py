@@ -3,6 +3,7 @@ import numbers, numpy
 from tequila import TequilaException
 from tequila.utils.bitstrings import BitNumbering, BitString, BitStringLSB
 from tequila.wavefunction.qubit_wavefunction import QubitWaveFunction
+from tequila.hamiltonian.pauli_table import PauliTable
 from tequila.simulators.simulator_base import BackendCircuit, BackendExpectationValue, QCircuit, change_basis
 
 """
@@ -58,7 +59,6 @@ class BackendCircuitQulacs(BackendCircuit):
             'Exp-Pauli': None
         }
 
-        self.variables = []
         super().__init__(abstract_circuit=abstract_circuit, noise=noise, *args, **kwargs)
         self.has_noise=False
         if noise is not None:
@@ -76,10 +76,6 @@ class BackendCircuitQulacs(BackendCircuit):
 
             self.circuit=self.add_noise_to_circuit(noise)
 
-    def update_variables(self, variables):
-        for k, angle in enumerate(self.variables):
-            self.circuit.set_parameter(k, angle(variables))
-
     def do_simulate(self, variables, initial_state, *args, **kwargs):
         state = qulacs.QuantumState(self.n_qubits)
         lsb = BitStringLSB.from_int(initial_state, nbits=self.n_qubits)
@@ -108,10 +104,17 @@ class BackendCircuitQulacs(BackendCircuit):
         if hasattr(self, "measurements"):
             result = {}
             for sample in range(samples):
+                # measurements collapse the state, every sample starts from the state before them
+                if self.has_noise:
+                    state_tmp = qulacs.QuantumState(self.n_qubits)
+                    state_tmp.set_computational_basis(BitString.from_binary(lsb.binary).integer)
+                    self.circuit.update_quantum_state(state_tmp)
+                else:
+                    state_tmp = state.copy()
                 sample_result = {}
                 for t, m in self.measurements.items():
-                    m.update_quantum_state(state)
-                    sample_result[t] = state.get_classical_value(t)
+                    m.update_quantum_state(state_tmp)
+                    sample_result[t] = state_tmp.get_classical_value(t)
 
                 sample_result = dict(sorted(sample_result.items(), key=lambda x: x[0]))
                 binary = BitString.from_array(sample_result.values())
@@ -133,31 +136,39 @@ class BackendCircuitQulacs(BackendCircuit):
         n_qubits = len(self.qubit_map)
         return qulacs.ParametricQuantumCircuit(n_qubits)
 
+    @staticmethod
+    def qulacs_angle(gate, variables):
+        # see the developer note at the top
+        if gate.name == 'Exp-Pauli':
+            return -gate.parameter(variables) * gate.paulistring.coeff
+        return -gate.parameter(variables)
+
+    def update_parameter(self, circuit, slot, gate, variables):
+        circuit.set_parameter(slot, self.qulacs_angle(gate, variables))
+
     def add_exponential_pauli_gate(self, gate, circuit, variables, *args, **kwargs):
         assert not gate.is_controlled()
         convert = {'x': 1, 'y': 2, 'z': 3}
         pind = [convert[x.lower()] for x in gate.paulistring.values()]
         qind = [self.qubit_map[x] for x in gate.paulistring.keys()]
         if len(gate.extract_variables()) > 0:
-            self.variables.append(-gate.parameter * gate.paulistring.coeff)
-            circuit.add_parametric_multi_Pauli_rotation_gate(qind, pind,
-                                                             -gate.parameter(variables) * gate.paulistring.coeff)
+            circuit.add_parametric_multi_Pauli_rotation_gate(qind, pind, self.qulacs_angle(gate, variables))
+            return circuit.get_parameter_count() - 1
         else:
-            circuit.add_multi_Pauli_rotation_gate(qind, pind, -gate.parameter(variables) * gate.paulistring.coeff)
+            circuit.add_multi_Pauli_rotation_gate(qind, pind, self.qulacs_angle(gate, variables))
 
     def add_parametrized_gate(self, gate, circuit, variables, *args, **kwargs):
         op = self.op_lookup[gate.name]
         if gate.name == 'Exp-Pauli':
-            self.add_exponential_pauli_gate(gate, circuit, variables)
-            return
+            return self.add_exponential_pauli_gate(gate, circuit, variables)
         else:
             if len(gate.extract_variables()) > 0:
                 op = op[0]
-                self.variables.append(-gate.parameter)
-                op(circuit)(self.qubit_map[gate.target[0]], -gate.parameter(variables=variables))
                 if gate.is_controlled():
                     raise TequilaQulacsException("Gates which depend on variables can not be controlled! Gate was:\n{}".format(gate))
-                return
+                op(circuit)(self.qubit_map[gate.target[0]], self.qulacs_angle(gate, variables))
+                # the position of the gate is the index of its parameter
+                return circuit.get_parameter_count() - 1
             else:
                 op = op[1]
                 qulacs_gate = op(self.qubit_map[gate.target[0]], -gate.parameter(variables=variables))
@@ -178,7 +189,8 @@ class BackendCircuitQulacs(BackendCircuit):
         circuit.add_gate(qulacs_gate)
 
     def add_measurement(self, gate, circuit, *args, **kwargs):
-        measurements = {t: qulacs.gate.Measurement(t, t) for t in gate.target}
+        measurements = {self.qubit_map[t]: qulacs.gate.Measurement(self.qubit_map[t], self.qubit_map[t])
+                        for t in gate.target}
         if hasattr(self, "measurements"):
             for key in measurements:
                 if key in self.measurements:
@@ -225,6 +237,9 @@ class BackendCircuitQulacs(BackendCircuit):
 class BackendExpectationValueQulacs(BackendExpectationValue):
     BackendCircuitType = BackendCircuitQulacs
     use_mapping = True
+    # paulistrings are evaluated with a Walsh-Hadamard transform on the amplitudes instead of a qulacs Observable
+    # if at least this many paulistrings (of all hamiltonians) share the same X/Y qubits
+    stacked_group_size = 24
 
     def simulate(self, variables, *args, **kwargs) -> numpy.array:
         # fast return if possible
@@ -239,63 +254,88 @@ class BackendExpectationValueQulacs(BackendExpectationValue):
         state = qulacs.QuantumState(self.U.n_qubits)
         self.U.circuit.update_quantum_state(state)
         result = []
-        for H in self.H:
-            if isinstance(H, numbers.Number):
-                result.append(H) # those are accumulated unit strings, e.g 0.1*X(3) in wfn on qubits 0,1
+        for offset, H in self.H:
+            # offset: accumulated unit strings, e.g 0.1*Z(3) in wfn on qubits 0,1
+            if H is None:
+                result.append(offset)
             else:
-                result.append(H.get_expectation_value(state))
-
-        return numpy.asarray(result)
+                result.append(offset + H.get_expectation_value(state))
+        result = numpy.asarray(result)
+        if self._stacked is not None:
+            # the large groups of all hamiltonians are evaluated together on the amplitude array
+            table, owners = self._stacked
+            values = numpy.zeros(len(self.H), dtype=numpy.complex128)
+            numpy.add.at(values, owners, table.expectation_values(state=state.get_vector(), n_qubits=self.n_qubits,
+                                                                  min_group_size=0))
+            result = result + values.real
+        return result
 
     def initialize_hamiltonian(self, hamiltonians):
-        result = []
+        # one tuple (offset, qulacs.Observable or None) for each hamiltonian
+        # paulistrings which share their X/Y part with many others (over all hamiltonians) are not added to the
+        # observables, they are stacked into one PauliTable and evaluated with a single transform (see simulate)
+        mapped = []
         for H in hamiltonians:
+            terms = []
+            offset = 0.0
             if self.use_mapping:
                 # initialize only the active parts of the Hamiltonian and pre-evaluate the passive ones
                 # passive parts are the components of each individual pauli string which act on qubits where the circuit does not act on
                 # if the circuit does not act on those qubits the passive parts are always evaluating to 1 (if the pauli operator is Z) or 0 (otherwise)
                 # since those qubits are always in state |0>
-                non_zero_strings = []
-                unit_strings = []
                 for ps in H.paulistrings:
-                    string = ""
+                    key = []
                     for k, v in ps.items():
                         if k in self.U.qubit_map:
-                            string += v.upper() + " " + str(self.U.qubit_map[k]) + " "
+                            key.append((self.U.qubit_map[k], v.upper()))
                         elif v.upper() != "Z":
-                            string = "ZERO"
+                            key = None
                             break
-                    string = string.strip()
-                    if string != "ZERO":
-                        non_zero_strings.append((ps.coeff, string))
-                    elif string == "":
-                        unit_strings.append((ps.coeff, string))
-
-                # accumulate unit strings
-                if len(unit_strings) > 0:
-                    coeffs = [x[0] for x in unit_strings]
-                    result.append(sum(coeffs))
-
-                if len(non_zero_strings) > 0:
-                    qulacs_H = qulacs.Observable(self.n_qubits)
-                    for coeff, string in non_zero_strings:
-                        qulacs_H.add_operator(coeff, string)
-                    result.append(qulacs_H)
-
-
-
+                    if key is None:
+                        continue
+                    elif len(key) == 0:
+                        offset += ps.coeff
+                    else:
+                        terms.append((ps.coeff, key))
             else:
                 if self.U.n_qubits < H.n_qubits:
                     raise TequilaQulacsException(
                         "Hamiltonian has more qubits as the Unitary. Mapped expectationvalues are switched off")
+                terms = [(ps.coeff, [(k, v.upper()) for k, v in ps.items()]) for ps in H.paulistrings]
+            mapped.append((offset, terms))
+
+        # qulacs qubit k is bit k of the amplitude index (least significant first)
+        stacked_terms = [(i, coeff, tuple((self.n_qubits - 1 - k, v) for k, v in key))
+                         for i, (_, terms) in enumerate(mapped) for coeff, key in terms]
+        groups = {}
+        for _, _, key in stacked_terms:
+            xkey = tuple(k for k, v in key if v != "Z")
+            groups[xkey] = groups.get(xkey, 0) + 1
+        stacked = numpy.asarray([groups[tuple(k for k, v in key if v != "Z")] >= self.stacked_group_size
+                                 for _, _, key in stacked_terms], dtype=bool)
+        self._stacked = None
+        if numpy.any(stacked):
+            selected = [stacked_terms[i] for i in numpy.flatnonzero(stacked)]
+            rows = {}
+            for _, _, key in selected:
+                rows.setdefault(key, len(rows))
+            unique = PauliTable.from_terms({key: 1.0 for key in rows})
+            indices = numpy.asarray([rows[key] for _, _, key in selected])
+            table = PauliTable(x=unique.x[indices], z=unique.z[indices],
+                               coeffs=numpy.asarray([coeff for _, coeff, _ in selected]))
+            self._stacked = (table, numpy.asarray([i for i, _, _ in selected]))
 
-                qulacs_H = qulacs.Observable(self.n_qubits)
-                for ps in H.paulistrings:
-                    string = ""
-                    for k, v in ps.items():
-                        string += v.upper() + " " + str(k)
-                    qulacs_H.add_operator(ps.coeff, string)
-                result.append(qulacs_H)
+        result = []
+        position = 0
+        for offset, terms in mapped:
+            qulacs_H = None
+            for coeff, key in terms:
+                if not stacked[position]:
+                    if qulacs_H is None:
+                        qulacs_H = qulacs.Observable(self.n_qubits)
+                    qulacs_H.add_operator(coeff, " ".join("{} {}".format(v, k) for k, v in key))
+                position += 1
+            result.append((offset, qulacs_H))
         return result
 
     def sample(self, variables, samples, *args, **kwargs) -> numpy.array:
@@ -309,7 +349,7 @@ class BackendExpectationValueQulacs(BackendExpectationValue):
             for ps in H.paulistrings:
                 # change basis, measurement is destructive so copy the state
                 # to avoid recomputation
-                bc = QCircuit()
+                basis = []
                 zero_string = False
                 for idx, p in ps.items():
                     if idx not in self.U.qubit_map:
@@ -319,12 +359,14 @@ class BackendExpectationValueQulacs(BackendExpectationValue):
                         if p.upper() != "Z":
                             zero_string = True
                     else:
-                        bc += change_basis(target=idx, axis=p)
+                        basis.append((idx, p.upper()))
 
                 if zero_string:
                     continue
 
-                qbc = self.U.create_circuit(abstract_circuit=bc, variables=None)
+                # translated only once for each basis
+                qbc = self.U.measurement_suffix(basis=tuple(sorted(basis)), measure=False)
+                has_basis_change = any(p != "Z" for idx, p in basis)
                 Esamples = []
                 for sample in range(samples):
                     if self.U.has_noise:
@@ -333,7 +375,7 @@ class BackendExpectationValueQulacs(BackendExpectationValue):
                         state_tmp = state
                     else:
                         state_tmp = state.copy()
-                    if len(bc.gates) > 0:  # otherwise there is no basis change (empty qulacs circuit does not work out)
+                    if has_basis_change:  # otherwise there is no basis change (empty qulacs circuit does not work out)
                         qbc.update_quantum_state(state_tmp)
                     ps_measure = 1.0
                     for idx in ps.keys():
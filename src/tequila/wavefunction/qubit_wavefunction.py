@@ -259,8 +259,17 @@ class QubitWaveFunction:
         return normalized
 
     def compute_expectationvalue(self, operator: 'QubitHamiltonian') -> numbers.Real:
-        tmp = self.apply_qubitoperator(operator=operator)
-        E = self.inner(other=tmp)
+        arrays = self._apply_qubitoperator_arrays(operator=operator)
+        if arrays is None:
+            tmp = self.apply_qubitoperator(operator=operator)
+            E = self.inner(other=tmp)
+        else:
+            n_qubits, keys, values, result_keys, result_values = arrays
+            # both key arrays are sorted (numpy.unique), match them with a single searchsorted
+            positions = numpy.searchsorted(result_keys, keys)
+            positions[positions == len(result_keys)] = 0
+            found = result_keys[positions] == keys if len(result_keys) else numpy.zeros(len(keys), dtype=bool)
+            E = complex(numpy.vdot(values[found], result_values[positions[found]]))
         if hasattr(E, "imag") and numpy.isclose(E.imag, 0.0, atol=1.e-6):
             return float(E.real)
         else:
@@ -268,14 +277,73 @@ class QubitWaveFunction:
 
     def apply_qubitoperator(self, operator: 'QubitHamiltonian'):
         """
-        Inefficient function which computes the action of a QubitHamiltonian on this wfn
+        Computes the action of a QubitHamiltonian on this wfn
+        Basis states are handled as integer arrays, the paulistrings act on all of them at once
+        Falls back to the paulistring-wise dictionary loop for symbolic amplitudes or coefficients
         :param operator: QubitOperator
         :return: resulting Qubitwavefunction
         """
-        result = QubitWaveFunction()
-        for ps in operator.paulistrings:
-            result += self.apply_paulistring(paulistring=ps)
-        return result
+        arrays = self._apply_qubitoperator_arrays(operator=operator)
+        if arrays is None:
+            result = QubitWaveFunction()
+            for ps in operator.paulistrings:
+                result += self.apply_paulistring(paulistring=ps)
+            return result
+        n_qubits, _, _, result_keys, result_values = arrays
+        state = {BitString.from_int(integer=k, nbits=n_qubits): v for k, v in
+                 zip(result_keys.tolist(), result_values.tolist())}
+        return QubitWaveFunction(state=state, n_qubits=n_qubits)
+
+    def _key_arrays(self, n_qubits: int) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        :param n_qubits: number of qubits the keys are padded to (qubit 0 stays the most significant bit)
+        :return: sorted int64 array of the basis states and the corresponding amplitudes
+        """
+        keys = numpy.fromiter((int(k) << (n_qubits - k.nbits) for k in self._state.keys()),
+                              dtype=numpy.int64, count=len(self._state))
+        values = numpy.fromiter(self._state.values(), dtype=numpy.complex128, count=len(self._state))
+        order = numpy.argsort(keys)
+        return keys[order], values[order]
+
+    def _apply_qubitoperator_arrays(self, operator: 'QubitHamiltonian'):
+        """
+        Vectorized action of a QubitHamiltonian
+        Every paulistring flips the X mask of all keys at once (XOR) and the signs are
+        the parities of the keys masked with the Z mask (Y contributes to both masks)
+        Contributions to the same basis state are merged with numpy.unique and bincount
+        :param operator: QubitOperator
+        :return: n_qubits, sorted keys and amplitudes of this wfn, sorted keys and amplitudes of the result
+                 or None if the operator or the amplitudes are not numeric (or too many qubits)
+        """
+        table = getattr(operator, "pauli_table", None)
+        if table is None or not table.is_numeric:
+            return None
+        if not all(isinstance(v, numbers.Number) for v in self._state.values()):
+            return None
+        n_qubits = max([table.n_qubits] + [k.nbits for k in self._state.keys()])
+        if n_qubits > 62:
+            return None
+        keys, values = self._key_arrays(n_qubits=n_qubits)
+        x_masks, z_masks, factors = table.basis_action(n_qubits)
+
+        result_keys = numpy.zeros(0, dtype=numpy.int64)
+        result_values = numpy.zeros(0, dtype=numpy.complex128)
+        # merge in chunks of paulistrings to keep the intermediate arrays small
+        chunk = max(1, (1 << 22) // max(len(keys), 1))
+        for start in range(0, len(x_masks), chunk):
+            x = x_masks[start:start + chunk, None]
+            z = z_masks[start:start + chunk, None]
+            parity = keys[None, :] & z
+            for shift in (32, 16, 8, 4, 2, 1):
+                parity ^= parity >> shift
+            signs = 1 - 2 * (parity & 1)
+            new_keys = numpy.concatenate([result_keys, (keys[None, :] ^ x).ravel()])
+            new_values = numpy.concatenate(
+                [result_values, (factors[start:start + chunk, None] * signs * values[None, :]).ravel()])
+            result_keys, inverse = numpy.unique(new_keys, return_inverse=True)
+            result_values = numpy.bincount(inverse, weights=new_values.real, minlength=len(result_keys)) \
+                            + 1.j * numpy.bincount(inverse, weights=new_values.imag, minlength=len(result_keys))
+        return n_qubits, keys, values, result_keys, result_values
 
     def apply_paulistring(self, paulistring: 'PauliString'):
         """
@@ -32,4 +32,28 @@ def test_array_contraction(backend, shape):
     hamiltonians = [tq.paulis.I(), tq.paulis.X(0), tq.paulis.Y(0), tq.paulis.Z(0)]
     E = tq.ExpectationValue(H=hamiltonians, U=U, shape=shape, contraction=contraction)
     result = tq.simulate(E, backend=backend)
-    assert result == contraction(expected)
\ No newline at end of file
+    assert result == contraction(expected)
+
+@pytest.mark.parametrize("backend", [tq.pick_backend("random"), tq.pick_backend()])
+def test_array_many_hamiltonians(backend):
+    # enough terms with the same X/Y part to use the stacked evaluation in all backends
+    U = tq.gates.Ry(target=0, angle=0.3) + tq.gates.CNOT(0, 1) + tq.gates.Rx(target=2, angle=-0.7)
+    U += tq.gates.Ry(target=3, angle=1.1) + tq.gates.CNOT(3, 1)
+    hamiltonians = []
+    for p in range(4):
+        for q in range(4):
+            hamiltonians.append(tq.paulis.Z(p) * tq.paulis.Z(q) + 0.5 * tq.paulis.X(p))
+            hamiltonians.append((tq.paulis.Y(p) * tq.paulis.X(q) if p != q else tq.paulis.Y(p)) + 0.3 * tq.paulis.Z(q))
+    E = tq.ExpectationValue(H=hamiltonians, U=U, shape=[len(hamiltonians)])
+    wfn = tq.simulate(U, backend=backend)
+    expected = numpy.asarray([wfn.inner(wfn.apply_qubitoperator(H)).real for H in hamiltonians])
+    for stacked_group_size in [1, 1000]:
+        if backend == "qulacs":
+            from tequila.simulators.simulator_qulacs import BackendExpectationValueQulacs
+            BackendExpectationValueQulacs.stacked_group_size = stacked_group_size
+        try:
+            result = tq.simulate(E, backend=backend)
+        finally:
+            if backend == "qulacs":
+                BackendExpectationValueQulacs.stacked_group_size = 24
+        assert numpy.allclose(result, expected)
@@ -200,3 +200,61 @@ def test_active_spaces(active):
     assert (tq.numpy.isclose(hf, mol.energies["hf"], atol=1.e-4))
     qubits = 2*sum([len(v) for v in active.values()])
     assert (H.n_qubits == qubits)
+
+
+@pytest.mark.skipif(condition=not qc.has_psi4, reason="you don't have psi4")
+def test_tapering_psi4():
+    parameters = qc.ParametersQC(geometry="data/h2.xyz", basis_set="sto-3g")
+    molecule = qc.QuantumChemistryPsi4(parameters=parameters)
+    H = molecule.make_hamiltonian()
+    tapering = molecule.make_tapering(H=H)
+    assert tapering.n_tapered >= 2
+    tapered = tapering.taper(H)
+    assert numpy.isclose(numpy.linalg.eigvalsh(tapered.to_matrix())[0], -1.1368354639104123, atol=1.e-4)
+    U = tapering.taper_circuit(molecule.prepare_reference())
+    energy = tq.simulate(tq.ExpectationValue(H=tapered, U=U))
+    assert numpy.isclose(energy, tq.simulate(tq.ExpectationValue(H=H, U=molecule.prepare_reference())))
+
+
+@pytest.mark.parametrize("samples", [None, 10000])
+def test_compute_rdms(samples):
+    import itertools, openfermion
+    from openfermion import MolecularData
+    parameters = qc.ParametersQC(geometry="h 0.0 0.0 0.0\nh 0.0 0.0 0.7\nh 0.0 0.0 1.4\nh 0.0 0.0 2.1",
+                                 basis_set="sto-3g")
+    molecule = MolecularData(**parameters.molecular_data_param)
+    molecule.n_orbitals = 3
+    mol = qc.QuantumChemistryBase(parameters=parameters, molecule=molecule)
+    numpy.random.seed(3)
+    h1 = numpy.random.randn(3, 3)
+    h1 = h1 + h1.T
+    h2 = numpy.random.randn(3, 3, 3, 3)
+    h2 = h2 + h2.transpose(3, 2, 1, 0)
+    fop = openfermion.FermionOperator()
+    for p, q in itertools.product(range(3), repeat=2):
+        for s in range(2):
+            fop += openfermion.FermionOperator(((2 * p + s, 1), (2 * q + s, 0)), h1[p, q])
+    for p, q, r, t in itertools.product(range(3), repeat=4):
+        for s1, s2 in itertools.product(range(2), repeat=2):
+            fop += openfermion.FermionOperator(((2 * p + s1, 1), (2 * q + s2, 1), (2 * r + s2, 0), (2 * t + s1, 0)),
+                                               h2[p, q, r, t])
+    H = tq.QubitHamiltonian(openfermion.jordan_wigner(fop))
+    g1 = tq.QubitHamiltonian(openfermion.jordan_wigner(openfermion.FermionOperator("2^ 0", 1.j)
+                                                       + openfermion.FermionOperator("0^ 2", -1.j)))
+    g2 = tq.QubitHamiltonian(openfermion.jordan_wigner(openfermion.FermionOperator("4^ 5^ 1 0", 1.j)
+                                                       + openfermion.FermionOperator("0^ 1^ 5 4", -1.j)))
+    U = tq.gates.X(0) + tq.gates.X(1) + tq.gates.GeneralizedRotation(angle="a", generator=g1)
+    U += tq.gates.GeneralizedRotation(angle="b", generator=g2)
+    variables = {"a": 0.4, "b": -0.9}
+    rdm1, rdm2 = mol.compute_rdms(U, variables, samples=samples)
+    assert numpy.isclose(numpy.trace(rdm1), 2.0, atol=1.e-1)
+    if samples is None:
+        energy = tq.simulate(tq.ExpectationValue(H=H, U=U), variables)
+        assert numpy.isclose(numpy.einsum("pq,pq", h1, rdm1) + numpy.einsum("pqrs,pqrs", h2, rdm2), energy)
+        rdm1, rdm2 = mol.compute_rdms(U, variables, spin_free=False, get_rdm1=False)
+        assert rdm1 is None and rdm2.shape == (6, 6, 6, 6)
+        assert numpy.isclose(numpy.einsum("pqqp", rdm2), 2.0)
+    else:
+        exact1, exact2 = mol.compute_rdms(U, variables)
+        assert numpy.allclose(rdm1, exact1, atol=0.1)
+        assert numpy.allclose(rdm2, exact2, atol=0.1)
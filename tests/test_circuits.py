@@ -128,3 +128,34 @@ def test_circuit_from_moments():
     moms = c.moments
     c2 = QCircuit.from_moments(moms)
     assert c == c2
+
+
+def test_concatenation_and_replacement():
+    a = Variable('a')
+    gates = [Rx(angle=a * i, target=i % 5) if i % 3 == 0 else H(target=i % 7) for i in range(500)]
+    U = QCircuit()
+    reference = []
+    for g in gates:
+        U = U + g
+        reference += g.gates
+    assert U.gates == reference
+    assert U.max_qubit() == 6
+    assert sorted(x[0] for x in U._parameter_map[a]) == [i for i in range(500) if i % 3 == 0]
+
+    positions = [0, 17, 18, 250, 499]
+    replacements = [X(target=9), Z(target=0) + Y(target=1), H(target=2), Rz(angle=a, target=3), X(target=4)]
+    for replace in [[True] * 5, [False] * 5, [True, False, True, False, True]]:
+        expected = []
+        for i, g in enumerate(reference):
+            if i in positions:
+                k = positions.index(i)
+                expected += replacements[k].gates
+                if not replace[k]:
+                    expected.append(g)
+            else:
+                expected.append(g)
+        result = U.replace_gates(positions=positions, circuits=replacements, replace=replace)
+        assert result.gates == expected
+        assert result.n_qubits == 10
+        # operands are not changed
+        assert U.gates == reference
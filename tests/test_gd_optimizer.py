@@ -7,7 +7,8 @@ from tequila.optimizers.optimizer_gd import minimize
 
 @pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
 @pytest.mark.parametrize('method', numpy.random.choice(tq.optimizers.optimizer_gd.OptimizerGD.available_methods(),1))
-@pytest.mark.parametrize('options', [None, '2-point', {"method":"2-point", "stepsize": 1.e-4}, {"method":"2-point-forward", "stepsize": 1.e-4}, {"method":"2-point-backward", "stepsize": 1.e-4} ])
+@pytest.mark.parametrize('options', [None, '2-point', {"method":"2-point", "stepsize": 1.e-4}, {"method":"2-point-forward", "stepsize": 1.e-4}, {"method":"2-point-backward", "stepsize": 1.e-4},
+                                     {"method":"4-point", "stepsize": "auto"}, {"method":"2-point", "stepsize": 1.e-4, "n_workers": 2}])
 def test_execution(simulator,method, options):
     U = tq.gates.Rz(angle="a", target=0) \
         + tq.gates.X(target=2) \
@@ -70,3 +71,71 @@ def test_methods_qng(simulator, method):
                                          initial_values=initial_values, silent=False)
     assert(numpy.isclose(result.energy, -0.612, atol=2.e-2))
 
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend()])
+@pytest.mark.parametrize("method", ["2-point", "2-point-forward", "4-point", "6-point", ((1.0, -1.0), (0.5, -0.5))])
+@pytest.mark.parametrize("n_workers", [None, 2])
+def test_numerical_gradient_engine(simulator, method, n_workers):
+    from tequila.optimizers.optimizer_base import _NumGradEngine, _NumGradComponent
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    U += tq.gates.Ry(angle="c", target=1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(1) + 0.5 * tq.paulis.X(0))
+    variables = {tq.Variable(k): v for k, v in {"a": 0.3, "b": -1.2, "c": 2.1}.items()}
+    keys = list(variables.keys())
+    stepsize = 1.e-4 if method in ["2-point", "2-point-forward"] else "auto"
+    engine = _NumGradEngine(objective=tq.compile(O, backend=simulator), variables=keys, stepsize=stepsize,
+                            method=method, n_workers=n_workers)
+    numerical = engine(variables)
+    analytical = [tq.simulate(tq.grad(O, k), variables=variables, backend=simulator) for k in keys]
+    assert numpy.allclose(numerical, analytical, atol=1.e-3)
+    components = [_NumGradComponent(engine=engine, variable=k)(variables) for k in keys]
+    assert numpy.allclose(components, numerical)
+    engine.evaluator.close()
+
+
+@pytest.mark.parametrize("n_workers", [None, 2])
+def test_evaluate_batch(n_workers):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.Z(1))
+    optimizer = tq.optimizers.OptimizerGD(n_workers=n_workers)
+    compiled = optimizer.compile_objective(O)
+    points = [{tq.Variable("a"): a, tq.Variable("b"): 0.5 * a} for a in numpy.linspace(0.0, numpy.pi, 5)]
+    values = optimizer.evaluate_batch(compiled, points)
+    optimizer.close_workers()
+    assert numpy.allclose(values, [tq.simulate(O, variables=p) for p in points])
+
+
+@pytest.mark.parametrize("method", ["adam", "nesterov"])
+def test_checkpoint_resume(method, tmpdir):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.X(1))
+    initial_values = {"a": 0.3, "b": 1.2}
+    filename = str(tmpdir.join("checkpoint.npz"))
+    reference = minimize(objective=O, method=method, maxiter=10, initial_values=initial_values, silent=True)
+    minimize(objective=O, method=method, maxiter=6, initial_values=initial_values, silent=True,
+             checkpoint=filename, checkpoint_every=5)
+    resumed = minimize(objective=O, method=method, maxiter=10, resume_from=filename, silent=True)
+    assert len(resumed.history.energies) == len(reference.history.energies)
+    assert numpy.allclose(resumed.history.energies, reference.history.energies)
+    assert numpy.isclose(resumed.energy, reference.energy)
+
+
+@pytest.mark.parametrize("max_length", [None, 4])
+def test_columnar_history(max_length):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.X(1))
+    initial_values = {"a": 0.3, "b": 1.2}
+    reference = minimize(objective=O, method="adam", maxiter=10, initial_values=initial_values, silent=True)
+    result = minimize(objective=O, method="adam", maxiter=10, initial_values=initial_values, silent=True,
+                      history_options={"max_length": max_length})
+    assert isinstance(result.history, tq.optimizers.ColumnarHistory)
+    assert result.history.iterations == reference.history.iterations
+    iterations = result.history.extract_iterations("energies")
+    energies = result.history.extract_energies()
+    angles = result.history.extract_angles("a")
+    if max_length is not None:
+        assert len(energies) <= max_length
+        assert len(result.history.angles) <= max_length
+    assert numpy.allclose(energies, [reference.history.energies[i] for i in iterations])
+    assert numpy.allclose(angles, [reference.history.extract_angles("a")[i] for i in iterations])
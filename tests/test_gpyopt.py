@@ -71,4 +71,14 @@ def test_one_qubit_shot(simulator):
     H = tq.paulis.X(0)
     O = tq.ExpectationValue(U=U, H=H)
     result = tq.minimize(method="lbfgs",objective=O, maxiter=20, backend=simulator, samples=10000)
-    assert (numpy.isclose(result.energy, -1.0, atol=1.e-2))
\ No newline at end of file
+    assert (numpy.isclose(result.energy, -1.0, atol=1.e-2))
+
+@pytest.mark.skipif(condition=not has_gpyopt, reason="you don't have GPyOpt")
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
+def test_one_qubit_wfn_batch(simulator):
+    U = tq.gates.Trotterized(angles=["a"], steps=1, generators=[tq.paulis.Y(0)])
+    H = tq.paulis.X(0)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = tq.minimize(method="lbfgs", objective=O, maxiter=8, backend=simulator, n_workers=2, batch_size=3)
+    assert (numpy.isclose(result.energy, -1.0, atol=1.e-2))
+    assert (len(result.history.energies) > 8)
@@ -449,3 +449,33 @@ def test_gradient_deep_H(simulator, power, controls):
     dE = simulate(dO, variables=variables, backend=simulator)
 
     assert (numpy.isclose(dE, numpy.pi * numpy.sin(angle(variables) * (numpy.pi)) / 2, atol=1.e-4))
+
+
+@pytest.mark.parametrize("simulator", [tequila.simulators.simulator_api.pick_backend("random"),
+                                       tequila.simulators.simulator_api.pick_backend()])
+def test_gradient_shared_template(simulator):
+    a = Variable(name="a")
+    b = Variable(name="b")
+    variables = {a: 0.3, b: -0.7}
+    U = gates.Ry(target=0, angle=a) + gates.Rx(target=1, angle=2 * b) + gates.CNOT(0, 1)
+    U += gates.ExpPauli(paulistring="X(0)Y(1)", angle=a * b)
+    H = paulis.X(0) * paulis.Z(1) + paulis.Y(1)
+    O = ExpectationValue(U=U, H=H)
+
+    dO = grad(objective=O)
+    compiled_expectationvalues = {}
+    for k in [a, b]:
+        # the shifted expectation values of all components share one compiled template
+        compiled = tequila.simulators.simulator_api.compile_objective(objective=dO[k], backend=simulator,
+                                                                       expectationvalues=compiled_expectationvalues)
+        templates = set([id(E.template) for E in compiled.args if hasattr(E, "template")])
+        assert len(templates) == 1
+        plus = {**variables, k: variables[k] + 1.e-3}
+        minus = {**variables, k: variables[k] - 1.e-3}
+        reference = (simulate(O, variables=plus, backend=simulator) - simulate(O, variables=minus,
+                                                                               backend=simulator)) / 2.e-3
+        assert numpy.isclose(compiled(variables), reference, atol=1.e-3)
+        # same result as the individually created component
+        single = simulate(grad(objective=O, variable=k), variables=variables, backend=simulator)
+        assert numpy.isclose(compiled(variables), single, atol=1.e-4)
+    assert len([E for E in compiled_expectationvalues.values() if isinstance(E, tuple)]) == 1
@@ -266,3 +266,207 @@ def test_matrix_form():
     Hm3p = kron(Hm, paulis.Z(0).to_matrix())
     assert allclose(Hm3 , Hm3p)
 
+
+
+@pytest.mark.parametrize("qubits", [[0, 3, 5], [2, 63, 64, 130]])
+def test_pauli_table(qubits):
+    H = QubitHamiltonian.zero()
+    G = QubitHamiltonian.zero()
+    for repeat in range(5):
+        H += random.uniform(0, 1) * paulis.pauli(qubits, random.choice(["X", "Y", "Z"], len(qubits)).tolist())
+        G += random.uniform(0, 1) * 1j * paulis.pauli(qubits[1:], random.choice(["X", "Y", "Z"], len(qubits) - 1).tolist())
+    table = H.pauli_table
+    assert table.qubits == H.qubits
+    assert QubitHamiltonian.from_pauli_table(table) == H
+
+    product = QubitHamiltonian.from_pauli_table(H.pauli_table.multiply(G.pauli_table))
+    assert product == QubitHamiltonian(qubit_hamiltonian=H.qubit_operator * G.qubit_operator)
+
+    commutes = H.pauli_table.commutes(G.pauli_table)
+    for i, ps1 in enumerate(H.paulistrings):
+        for j, ps2 in enumerate(G.paulistrings):
+            A = QubitHamiltonian.from_paulistrings([ps1.naked()])
+            B = QubitHamiltonian.from_paulistrings([ps2.naked()])
+            assert commutes[i, j] == (len((A * B - B * A).simplify(threshold=1.e-8)) == 0)
+
+    qubit_map = {q: 2 * q + 1 for q in qubits}
+    mapped = H.map_qubits(qubit_map)
+    assert mapped.qubits == sorted(qubit_map.values())
+    assert mapped.map_qubits({v: k for k, v in qubit_map.items()}) == H
+
+
+def test_pauli_table_simplify():
+    H = paulis.X(0) + 2.0 * paulis.Y(1) + paulis.Z(70)
+    table = H.pauli_table.concatenate((-1.0 * paulis.X(0) + 1.e-3 * paulis.Z(70)).pauli_table)
+    simplified = table.simplify()
+    assert len(simplified) == 2
+    assert QubitHamiltonian.from_pauli_table(simplified) == 2.0 * paulis.Y(1) + 1.001 * paulis.Z(70)
+    assert len(table.simplify(threshold=1.5)) == 1
+
+    H = 1.0 * paulis.X(0) + 1.j * paulis.Y(1)
+    assert not H.is_hermitian()
+    assert (H + H.dagger()).is_hermitian()
+    assert H.dagger() == 1.0 * paulis.X(0) - 1.j * paulis.Y(1)
+
+
+def test_sparse_and_matrix_free():
+    H = QubitHamiltonian.zero()
+    for repeat in range(5):
+        H += make_random_pauliword(complex=True)
+    H += H.dagger()
+    Hm = H.to_matrix()
+    assert allclose(H.to_sparse().toarray(), Hm)
+    assert allclose(H.to_sparse(n_qubits=H.n_qubits + 1).toarray(), kron(Hm, eye(2)))
+
+    vector = random.uniform(0, 1, len(Hm)) + 1.j * random.uniform(0, 1, len(Hm))
+    assert allclose(H.apply(vector), Hm.dot(vector))
+    block = numpy.stack([vector, 2.0 * vector], axis=1)
+    assert allclose(H.apply(block), Hm.dot(block))
+
+    import scipy.sparse.linalg
+    exact = numpy.linalg.eigvalsh(Hm)[0]
+    energy = scipy.sparse.linalg.eigsh(H.to_linear_operator(), k=1, which="SA")[0][0]
+    assert numpy.isclose(energy, exact)
+
+
+def test_eigenstates():
+    H = paulis.X(0) * paulis.X(1) + paulis.Y(0) * paulis.Y(1) + 0.5 * paulis.Z(0) + 0.2 * paulis.Z(1) \
+        + paulis.X(1) * paulis.X(2) + paulis.Y(1) * paulis.Y(2) - 0.3 * paulis.Z(2)
+    exact = numpy.linalg.eigvalsh(H.to_matrix())
+    energies, wavefunctions = H.eigenstates(k=3)
+    assert allclose(energies, exact[:3])
+    for energy, wfn in zip(energies, wavefunctions):
+        assert numpy.isclose(wfn.compute_expectationvalue(H), energy)
+
+    # hopping conserves the number of excitations
+    for n_particles in range(4):
+        energies, wavefunctions = H.eigenstates(k=1, sector={"n_particles": n_particles})
+        assert all(BitString.from_int(k.integer).array.count(1) == n_particles for k in wavefunctions[0].keys())
+        assert numpy.isclose(wavefunctions[0].compute_expectationvalue(H), energies[0])
+    assert numpy.isclose(min(H.eigenstates(k=1, sector={"n_particles": n})[0][0] for n in range(4)), exact[0])
+    same = H.eigenstates(k=1, sector=lambda basis: basis == 0)
+    assert numpy.isclose(same[0][0], H.eigenstates(k=1, sector=[0])[0][0])
+    sector = QubitHamiltonian._sector_basis(sector={"n_particles": 2, "sz": 0}, n_qubits=4)
+    assert sector.tolist() == [0b0011, 0b0110, 0b1001, 0b1100]
+    assert QubitHamiltonian._sector_basis(sector={}, n_qubits=3).tolist() == list(range(8))
+    assert numpy.allclose(H.eigenstates(k=2, sector={})[0], H.eigenstates(k=2)[0])
+
+
+def test_cached_views():
+    H = paulis.X(0) + paulis.Z(3)
+    assert H.qubits == [0, 3] and H.n_qubits == 4 and len(H.paulistrings) == 2
+    # the cached paulistrings are handed out as copies
+    ps = H.paulistrings[0]
+    ps.coeff = 5.0
+    assert H == paulis.X(0) + paulis.Z(3)
+    assert [p.coeff for p in H.paulistrings] == [1.0, 1.0] and str(H) == str(paulis.X(0) + paulis.Z(3))
+    H += paulis.Y(5)
+    assert H.qubits == [0, 3, 5] and H.n_qubits == 6 and len(H.paulistrings) == 3
+    H.qubit_operator.terms[((7, 'X'),)] = 1.0
+    assert H.qubits == [0, 3, 5, 7] and H.n_qubits == 8 and len(H.paulistrings) == 4
+    H.paulistrings = [PauliString.from_string("X(1)", coeff=2.0)]
+    assert H.qubits == [1] and H.n_qubits == 2
+    assert H == 2.0 * paulis.X(1)
+
+
+def test_native_arithmetic():
+    A = QubitHamiltonian.zero()
+    B = QubitHamiltonian.zero()
+    for repeat in range(4):
+        A += make_random_pauliword(complex=True)
+        B += make_random_pauliword(complex=True)
+    a = A.qubit_operator
+    b = B.qubit_operator
+    assert (A + B).qubit_operator == a + b
+    assert (A - B).qubit_operator == a - b
+    assert (A * B).qubit_operator == a * b
+    assert (A ** 3).qubit_operator == a ** 3
+    assert allclose((2.0 - 0.5 * A).to_matrix(), 2.0 * eye(2 ** A.n_qubits) - 0.5 * A.to_matrix())
+    assert A.commutator(B) == QubitHamiltonian(qubit_hamiltonian=a * b - b * a)
+    assert len(A.commutator(A).simplify(threshold=1.e-8)) == 0
+    assert len(paulis.X(0) - paulis.X(0)) == 0
+
+
+def test_screening():
+    H = 1.5 + paulis.Z(0) + 0.3 * paulis.Z(2) + 0.2 * paulis.X(2) - 0.05 * paulis.Y(1)
+    screened, error = H.screen(threshold=0.25)
+    assert screened == 1.5 + paulis.Z(0) + 0.3 * paulis.Z(2)
+    assert numpy.isclose(error, 0.25)
+    constant, rest = H.split_constant()
+    assert constant == 1.5
+    assert rest + constant == H
+    assert H.screen()[1] == 0.0
+
+
+def test_tapering():
+    import openfermion
+    import tequila as tq
+    from tequila.hamiltonian import QubitTapering
+    numpy.random.seed(5)
+    # spin-conserving two-body Hamiltonian on 3 spatial orbitals
+    fop = openfermion.FermionOperator((), 0.5)
+    for p, q in [(p, q) for p in range(3) for q in range(3)]:
+        c1, c2 = numpy.random.randn(2)
+        for s in range(2):
+            fop += openfermion.FermionOperator(((2 * p + s, 1), (2 * q + s, 0)), c1)
+            for t in range(2):
+                fop += openfermion.FermionOperator(((2 * p + s, 1), (2 * q + t, 1), (2 * q + t, 0), (2 * p + s, 0)), c2)
+    fop = fop + openfermion.hermitian_conjugated(fop)
+    H = QubitHamiltonian(openfermion.jordan_wigner(fop))
+    reference = BitString.from_binary("110000")
+    tapering = QubitTapering.from_hamiltonian(H, reference=reference)
+    assert tapering.n_tapered == 2 and tapering.sector == [-1, -1]
+    tapered = tapering.taper(H)
+    assert tapered.n_qubits <= 4 and tapered.is_hermitian()
+    sector = [i for i in range(2 ** 6)
+              if tapering.sector_from_reference(BitString.from_int(i, nbits=6)) == tapering.sector]
+    exact = numpy.linalg.eigvalsh(H.to_matrix()[numpy.ix_(sector, sector)])
+    assert allclose(numpy.linalg.eigvalsh(tapered.to_sparse(n_qubits=4).toarray()), exact)
+
+    # reference circuit and a symmetry conserving generator
+    generator = QubitHamiltonian(openfermion.jordan_wigner(openfermion.FermionOperator("2^ 0", 1.j)
+                                                           + openfermion.FermionOperator("0^ 2", -1.j)))
+    U = tq.gates.X(0) + tq.gates.X(1) + tq.gates.Trotterized(generators=[generator], angles=["a"], steps=1)
+    U += tq.gates.Rz(angle="b", target=3)
+    tapered_U = tapering.taper_circuit(U)
+    for variables in [{"a": 0.1, "b": 0.2}, {"a": -1.0, "b": 0.5}]:
+        energy = tq.simulate(tq.ExpectationValue(H=H, U=U), variables)
+        assert numpy.isclose(tq.simulate(tq.ExpectationValue(H=tapered, U=tapered_U), variables), energy)
+
+    with pytest.raises(tq.TequilaException):
+        tapering.taper_circuit(tq.gates.X(0) + tq.gates.Rx(angle="a", target=1))
+
+
+def test_pauli_table_expectation_values():
+    H = QubitHamiltonian.zero()
+    for repeat in range(20):
+        H += make_random_pauliword(complex=False)
+    n_qubits = H.n_qubits
+    state = random.randn(2 ** n_qubits) + 1.j * random.randn(2 ** n_qubits)
+    expected = [state.conj().dot(QubitHamiltonian.from_paulistrings([ps]).to_sparse(n_qubits=n_qubits).dot(state))
+                for ps in H.paulistrings]
+    for min_group_size in [0, None, 100]:
+        values = H.pauli_table.expectation_values(state=state, n_qubits=n_qubits, min_group_size=min_group_size)
+        assert allclose(values, expected)
+
+
+def test_apply_qubitoperator():
+    H = QubitHamiltonian.zero()
+    for repeat in range(10):
+        H += make_random_pauliword(complex=True)
+    n_qubits = H.n_qubits
+    state = random.randn(2 ** n_qubits) + 1.j * random.randn(2 ** n_qubits)
+    state[random.randint(2 ** n_qubits)] = 0.0
+    wfn = QubitWaveFunction.from_array(arr=state, threshold=0.0)
+    expected = H.to_matrix().dot(state)
+    result = wfn.apply_qubitoperator(operator=H)
+    assert allclose([result(i) for i in range(2 ** n_qubits)], expected)
+    reference = QubitWaveFunction()
+    for ps in H.paulistrings:
+        reference += wfn.apply_paulistring(paulistring=ps)
+    for k, v in reference.items():
+        assert numpy.isclose(result[k], v)
+    assert numpy.isclose(wfn.compute_expectationvalue(operator=H), state.conj().dot(expected))
+    # operators acting beyond the qubits of the keys
+    wfn = QubitWaveFunction.from_int(1, n_qubits=1)
+    assert numpy.isclose(wfn.compute_expectationvalue(operator=paulis.Z(0) + 2.0 * paulis.Z(2)), 1.0)
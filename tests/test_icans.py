@@ -0,0 +1,44 @@
+import pytest, numpy
+import tequila as tq
+from tequila.optimizers.optimizer_icans import minimize
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random", samples=1)])
+def test_execution_shot(simulator):
+    U = tq.gates.Rz(angle="a", target=0) \
+        + tq.gates.X(target=2) \
+        + tq.gates.Ry(angle="b", target=1, control=2) \
+        + tq.gates.Trotterized(angles=["c", "d"],
+                               generators=[-0.25 * tq.paulis.Z(1), tq.paulis.X(0) + tq.paulis.Y(1)], steps=2) \
+        + tq.gates.ExpPauli(angle="a", paulistring="X(0)Y(1)Z(2)")
+    H = 1.0 * tq.paulis.X(0) + 2.0 * tq.paulis.Y(1) + 3.0 * tq.paulis.Z(2)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = minimize(objective=O, maxiter=2, backend=simulator, samples=10)
+    assert len(result.history.energies) == 2
+    assert result.shots > 0
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random", samples=1)])
+def test_shot_budget(simulator):
+    U = tq.gates.Ry(angle="a", target=0)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.X(0))
+    result = tq.minimize(method="icans", objective=O, maxiter=1000, backend=simulator, samples=10,
+                         shot_budget=500, silent=True)
+    assert result.shots >= 500
+    assert len(result.history.energies) < 1000
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random", samples=1)])
+def test_one_qubit_shot(simulator):
+    U = tq.gates.Ry(angle="a", target=0)
+    H = tq.paulis.X(0)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = tq.minimize(method="icans", objective=O, initial_values={"a": 0.1}, maxiter=100, backend=simulator,
+                         samples=1000, silent=True)
+    assert numpy.isclose(tq.simulate(O, variables=result.angles), -1.0, atol=5.e-2)
+
+
+def test_needs_samples():
+    O = tq.ExpectationValue(U=tq.gates.Ry(angle="a", target=0), H=tq.paulis.X(0))
+    with pytest.raises(tq.TequilaException):
+        minimize(objective=O, maxiter=1)
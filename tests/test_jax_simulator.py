@@ -0,0 +1,92 @@
+import numpy
+import pytest
+import os
+import tequila as tq
+import tequila.simulators.simulator_api
+
+HAS_JAX = tequila.simulators.simulator_api.HAS_JAX
+reference_backends = [k for k in tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys()
+                      if k not in ["jax", "symbolic"]]
+
+
+def circuit():
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.H(target=2)
+    U += tq.gates.Rx(angle=tq.Variable("b") * numpy.pi, target=1, control=0)
+    U += tq.gates.ExpPauli(angle="a", paulistring="X(0)Y(1)Z(2)")
+    U += tq.gates.Phase(phi="b", target=2, control=1)
+    U += tq.gates.Trotterized(angles=["c"], generators=[tq.paulis.X(0) * tq.paulis.Y(2)], steps=1)
+    return U
+
+
+@pytest.mark.skipif(condition=not HAS_JAX or len(reference_backends) == 0, reason="jax not installed")
+@pytest.mark.parametrize("initial_state", [0, 3])
+def test_expectationvalues(initial_state):
+    H = tq.paulis.X(0) + 0.5 * tq.paulis.Y(1) * tq.paulis.Z(2) - 2.0 * tq.paulis.Z(4) + 1.0
+    U = circuit() + tq.gates.X(target=1, power="c") + tq.gates.H(target=0, power=0.3)
+    E = tq.ExpectationValue(H=H, U=U)
+    variables = {"a": 0.3, "b": 1.2, "c": -0.4}
+    reference = tq.simulate(E, variables=variables, backend=reference_backends[0])
+    assert numpy.isclose(tq.simulate(E, variables=variables, backend="jax"), reference)
+
+    wfn = tq.simulate(U, variables=variables, backend="jax", initial_state=initial_state)
+    other = tq.simulate(U, variables=variables, backend=reference_backends[0], initial_state=initial_state)
+    # power gates are compiled with different global phases in the other backends
+    assert numpy.isclose(abs(wfn.inner(other)), 1.0)
+
+
+@pytest.mark.skipif(condition=not HAS_JAX, reason="jax not installed")
+def test_jax_objective():
+    from tequila.simulators.simulator_jax import JaxObjective
+    from jax.experimental import enable_x64
+    import jax
+    U = circuit()
+    E1 = tq.ExpectationValue(H=tq.paulis.X(0) + tq.paulis.Z(2), U=U)
+    E2 = tq.ExpectationValue(H=tq.paulis.Y(1), U=U)
+    O = E1 ** 2 + E2.apply(tq.numpy.sin) + tq.Variable("a")
+    keys = [tq.Variable(k) for k in ["a", "b", "c"]]
+    values = numpy.asarray([0.3, 1.2, -0.4])
+    variables = dict(zip(keys, values))
+
+    f = JaxObjective(objective=O, keys=keys)
+    assert numpy.isclose(f(values), tq.simulate(O, variables=variables, backend="jax"))
+    # central differences of the simulated objective (tq.grad misses the controlled phase)
+    # the transformation (tq.numpy.sin) needs double precision as well
+    step = 1.e-5
+    for i, k in enumerate(keys):
+        with enable_x64():
+            plus = tq.simulate(O, variables={**variables, k: values[i] + step}, backend="jax")
+            minus = tq.simulate(O, variables={**variables, k: values[i] - step}, backend="jax")
+            difference = float(plus - minus) / (2.0 * step)
+        assert numpy.isclose(f.gradient(values)[i], difference, atol=1.e-6)
+    batch = numpy.asarray([values, 0.5 * values, -values])
+    energies = jax.vmap(f.function)(batch)
+    assert numpy.allclose(energies, [f(v) for v in batch])
+    hessian = f.hessian(values)
+    assert numpy.allclose(hessian, hessian.T)
+
+
+@pytest.mark.skipif(condition=not HAS_JAX, reason="jax not installed")
+@pytest.mark.parametrize("method", ["adam", "bfgs"])
+def test_autodiff_optimization(method):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1, control=0)
+    H = tq.paulis.Z(0) + tq.paulis.X(1) + tq.paulis.Z(1)
+    O = tq.ExpectationValue(U=U, H=H)
+    initial_values = {"a": 0.5, "b": 0.3}
+    result = tq.minimize(method=method, objective=O, backend="jax", initial_values=initial_values, maxiter=200, silent=True)
+    reference = tq.minimize(method="bfgs", objective=O, initial_values=initial_values, silent=True)
+    assert numpy.isclose(result.energy, reference.energy, atol=1.e-3)
+
+
+@pytest.mark.skipif(condition=not HAS_JAX or "JAX_ENABLE_X64" in os.environ, reason="jax not installed")
+def test_precision():
+    from tequila.simulators.simulator_jax import JaxObjective
+    import jax
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1, control=0)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.X(1))
+    f = JaxObjective(objective=O, keys=["a", "b"])
+    values = numpy.asarray([0.5, 0.3])
+    assert f.gradient(values).dtype == numpy.float64
+    assert numpy.isclose(f(values), tq.simulate(O, variables={"a": 0.5, "b": 0.3}), atol=1.e-12)
+    # the global configuration of other jax programs is not changed
+    assert not jax.config.jax_enable_x64
+    assert jax.numpy.asarray(1.0).dtype == jax.numpy.float32
@@ -0,0 +1,46 @@
+import pytest, numpy
+import tequila as tq
+from tequila.optimizers.optimizer_multistart import minimize, _prune
+
+
+def objective():
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    U += tq.gates.Rx(angle="c", target=0)
+    H = tq.paulis.Z(0) + 0.5 * tq.paulis.Z(1) - 0.3 * tq.paulis.X(0) * tq.paulis.X(1)
+    return tq.ExpectationValue(U=U, H=H)
+
+
+def test_prune():
+    energies = numpy.asarray([0.5, -1.0, 0.0, -0.9])
+    before = numpy.asarray([0.6, 0.0, 2.0, -0.95])
+    # start 0 improves too slowly and start 3 got worse, start 2 could still catch up
+    assert list(_prune(energies, before, remaining=1, keep=1.0, min_starts=1)) == [1, 2]
+    assert list(_prune(energies, before, remaining=1, keep=0.25, min_starts=1)) == [1]
+    assert list(_prune(energies, before, remaining=0, keep=1.0, min_starts=2)) == [1, 3]
+
+
+@pytest.mark.parametrize("n_workers", [None, 2])
+@pytest.mark.parametrize("method", ["bfgs", "newton-cg", "adam", "cobyla"])
+def test_multistart(method, n_workers):
+    O = objective()
+    reference = tq.minimize(method="bfgs", objective=O, initial_values={"a": 0.1, "b": 0.1, "c": 0.1}, silent=True)
+    result = minimize(O, method=method, n_starts=6, maxiter=200, rounds=4, keep=0.5, n_workers=n_workers,
+                      silent=True)
+    assert numpy.isclose(result.energy, reference.energy, atol=1.e-2)
+    assert numpy.isclose(result.energy, tq.simulate(O, variables=result.angles), atol=1.e-4)
+    assert result.energy == min([r.energy for r in result.results])
+    assert result.pruned[result.best] is None
+    assert len(result.histories) == 6
+    assert sum([p is None for p in result.pruned]) <= 2
+
+
+def test_initial_values():
+    O = objective()
+    initial_values = [{"a": 0.0, "b": 0.0, "c": 0.0}, {"a": 3.0, "b": 1.0, "c": 2.0}]
+    result = minimize(O, method="bfgs", initial_values=initial_values, maxiter=20, rounds=1, silent=True)
+    assert len(result.results) == 2
+    assert all([p is None for p in result.pruned])
+    # a fixed variable is shared by all starts
+    result = minimize(O, method="bfgs", variables=["a", "b"], initial_values={"c": 0.5}, n_starts=3, maxiter=20,
+                      silent=True)
+    assert all([numpy.isclose(r.angles[tq.Variable("c")], 0.5) for r in result.results])
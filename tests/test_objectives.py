@@ -595,3 +595,25 @@ def test_really_awfull_thing(simulator, value1=(numpy.random.randint(0, 1000) /
     assert np.isclose(en1, an1, atol=1.e-4)
     assert np.isclose(deval, an2 * (uen + den), atol=1.e-4)
     assert np.isclose(doval, dtrue, atol=1.e-4)
+
+
+@pytest.mark.parametrize("backend", [tequila.simulators.simulator_api.pick_backend("random"), tequila.simulators.simulator_api.pick_backend()])
+def test_positional(backend):
+    a = Variable("a")
+    b = Variable("b")
+    U = gates.Ry(angle=a, target=0) + gates.Rx(angle=b * numpy.pi, target=1, control=0)
+    E = ExpectationValue(H=paulis.X(0) + paulis.Z(1), U=U)
+    O = E * E + a - 2.0 * ExpectationValue(H=paulis.Y(1), U=U)
+    variables = {a: 0.4, b: 1.3}
+    compiled = tq.compile(O, backend=backend)
+    reference = compiled(variables=variables)
+
+    f = compiled.positional(keys=[b, a])
+    assert numpy.isclose(f(numpy.asarray([1.3, 0.4])), reference)
+    f = compiled.positional(keys=["a"], fixed={"b": 1.3})
+    assert numpy.isclose(f([0.4]), reference)
+    with pytest.raises(tq.TequilaException):
+        compiled.positional(keys=["a"])
+
+    dO = tq.compile(grad(O, a), backend=backend)
+    assert numpy.isclose(dO.positional(keys=[a, b])([0.4, 1.3]), dO(variables=variables))
@@ -61,3 +61,14 @@ def test_one_qubit_shot(simulator):
     O = tq.ExpectationValue(U=U, H=H)
     result = tq.minimize(method="phoenics", objective=O, maxiter=3, backend=simulator, samples=10000)
     assert (numpy.isclose(result.energy, -1.0, atol=1.e-1))
+
+
+@pytest.mark.skipif(condition=not has_phoenics, reason="you don't have phoenics")
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
+def test_one_qubit_wfn_parallel(simulator):
+    U = tq.gates.Trotterized(angles=["a"], steps=1, generators=[tq.paulis.Y(0)])
+    H = tq.paulis.X(0)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = tq.minimize(method="phoenics", objective=O, maxiter=8, backend=simulator, n_workers=2)
+    assert (numpy.isclose(result.energy, -1.0, atol=1.e-2))
+    assert (numpy.isclose(result.energy, tq.simulate(objective=O, variables=result.angles)))
@@ -0,0 +1,65 @@
+import pytest, numpy
+import tequila as tq
+from tequila.optimizers.optimizer_rotosolve import minimize, check_rotosolve_structure
+
+
+def hardware_efficient_objective():
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    U += tq.gates.Rx(angle="c", target=0) + tq.gates.ExpPauli(angle="d", paulistring="Y(0)Z(1)")
+    H = tq.paulis.Z(0) + 0.5 * tq.paulis.Z(1) - 0.3 * tq.paulis.X(0) * tq.paulis.X(1)
+    return tq.ExpectationValue(U=U, H=H), H
+
+
+def test_structure():
+    O, H = hardware_efficient_objective()
+    assert check_rotosolve_structure(O, [tq.Variable(k) for k in "abcd"]) == []
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="a", target=1) + tq.gates.Ry(angle="b", target=1,
+                                                                                          control=0)
+    U += tq.gates.Rz(angle=2.0 * tq.Variable("c"), target=0)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0))
+    assert check_rotosolve_structure(O, [tq.Variable(k) for k in "abc"]) == [tq.Variable(k) for k in "abc"]
+    with pytest.raises(tq.TequilaException):
+        minimize(O, maxiter=1, silent=True)
+
+
+def test_structure_transformation():
+    O, H = hardware_efficient_objective()
+    E2 = tq.ExpectationValue(U=tq.gates.Ry(angle="a", target=0), H=tq.paulis.X(0))
+    assert check_rotosolve_structure(2.0 * O - 0.5 * E2 + 1.0, [tq.Variable(k) for k in "abcd"]) == []
+    # the fit of a sinusoid does not describe nonlinear transformations of the expectationvalues
+    O = (O + 2.0) ** 2
+    assert check_rotosolve_structure(O, [tq.Variable(k) for k in "abcd"]) == [tq.Variable(k) for k in "abcd"]
+    with pytest.raises(tq.TequilaException):
+        minimize(O, maxiter=1, silent=True)
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
+@pytest.mark.parametrize("block_size", [1, 2])
+def test_convergence(simulator, block_size):
+    O, H = hardware_efficient_objective()
+    result = tq.minimize(method="rotosolve", objective=O, maxiter=30, backend=simulator, block_size=block_size,
+                         silent=True)
+    assert numpy.isclose(result.energy, tq.simulate(O, variables=result.angles, backend=simulator))
+    if block_size == 1:
+        # exact coordinate-wise minimization never increases the energy
+        assert all(numpy.diff(result.history.energies) <= 1.e-8)
+        reference = tq.minimize(method="bfgs", objective=O, initial_values=result.angles, backend=simulator,
+                                silent=True)
+        assert numpy.isclose(result.energy, reference.energy, atol=1.e-3)
+
+
+def test_single_sweep_exact():
+    U = tq.gates.Ry(angle="a", target=0)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.X(0) + 0.5 * tq.paulis.Z(0))
+    result = minimize(O, maxiter=1, initial_values={"a": 0.3}, silent=True)
+    assert numpy.isclose(result.energy, -numpy.sqrt(1.25))
+    assert len(result.history.energies) == 2
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random", samples=1)])
+def test_execution_shot(simulator):
+    O, H = hardware_efficient_objective()
+    result = minimize(O, maxiter=2, backend=simulator, samples=100, block_size=2, silent=True)
+    assert len(result.history.energies) == 3
+    assert numpy.isfinite(result.energy)
+    assert set(result.angles.keys()) == set(O.extract_variables())
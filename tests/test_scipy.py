@@ -162,3 +162,23 @@ def test_hessian_based_methods(simulator, method, use_hessian):
     result = tq.optimizer_scipy.minimize(objective=-E,backend=simulator, hessian=use_hessian, method=method, tol=1.e-4,
                                          method_options=method_options, initial_values=initial_values, silent=True)
     assert (numpy.isclose(result.energy, -1.0, atol=1.e-1))
+
+
+@pytest.mark.parametrize("simulator", [tequila.simulators.simulator_api.pick_backend("random")])
+def test_columnar_history(simulator, tmpdir):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Rx(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.X(1))
+    initial_values = {"a": 0.3, "b": 1.2}
+    reference = tq.optimizer_scipy.minimize(objective=O, method="BFGS", backend=simulator,
+                                            initial_values=initial_values, silent=True)
+    spill_dir = str(tmpdir.join("history"))
+    result = tq.optimizer_scipy.minimize(objective=O, method="BFGS", backend=simulator,
+                                         initial_values=initial_values, silent=True,
+                                         history_options={"max_length": 2, "spill_dir": spill_dir})
+    assert numpy.isclose(result.energy, reference.energy)
+    # everything is kept, only two entries per record stay in memory
+    assert numpy.allclose(result.history.extract_energies(), reference.history.energies)
+    assert numpy.allclose(numpy.asarray(result.history.energy_evaluations), reference.history.energy_evaluations)
+    assert numpy.allclose(result.history.angles_evaluations.extract(tq.Variable("b")),
+                          [d[tq.Variable("b")] for d in reference.history.angles_evaluations])
+    assert result.history.angles[-1] == reference.history.angles[-1]
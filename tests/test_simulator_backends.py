@@ -237,6 +237,15 @@ def test_shot_multi_control(simulator):
     tequila.simulators.simulator_api.simulate(ac,backend=simulator, samples=1)
 
 
+@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SAMPLERS.keys())
+def test_shot_measured_subset(simulator):
+    # inactive qubits are not part of the register, every sample is drawn from the state before the measurements
+    ac = tq.gates.X(0) + tq.gates.X(4) + tq.gates.H(2)
+    ac += tq.gates.Measurement([2, 4])
+    wfn = tequila.simulators.simulator_api.simulate(ac, backend=simulator, samples=1000)
+    assert set(wfn.keys()) == {tq.BitString.from_binary("01"), tq.BitString.from_binary("11")}
+
+
 @pytest.mark.skipif(condition='cirq' not in tq.INSTALLED_SAMPLERS or 'qiskit' not in tq.INSTALLED_SAMPLERS,
                     reason="need qiskit and cirq")
 def test_shot_simple_consistency():
@@ -264,3 +273,85 @@ def test_initial_state_from_integer(simulator, initial_state):
     wfn = tq.simulate(U, initial_state=initial_state, backend=simulator)
     assert (initial_state in wfn)
     assert (numpy.isclose(wfn[initial_state], 1.0))
+
+
+@pytest.mark.skipif(condition=not tequila.simulators.simulator_api.HAS_CLOUDPICKLE, reason="need cloudpickle")
+@pytest.mark.parametrize("simulator", tequila.simulators.simulator_api.INSTALLED_SIMULATORS.keys())
+def test_compilation_cache(simulator, tmpdir):
+    import cloudpickle
+    a = tq.Variable("a")
+    U = tq.gates.Ry(target=0, angle=a) + tq.gates.ExpPauli(paulistring="X(0)Y(1)", angle=2 * a)
+    H = tq.paulis.X(0) + tq.paulis.Z(0) * tq.paulis.Y(1)
+    E = tq.ExpectationValue(H=H, U=U)
+    O = E ** 2 + E.apply(tq.numpy.exp)
+    dO = tq.grad(O, a)
+    variables = {a: 0.7}
+    cache_dir = str(tmpdir.join("cache"))
+    for objective in [O, dO]:
+        reference = tq.simulate(objective, variables=variables, backend=simulator)
+        compiled = tq.compile(objective, backend=simulator, cache_dir=cache_dir)
+        assert numpy.isclose(compiled(variables), reference)
+        loaded = tq.compile(objective, backend=simulator, cache_dir=cache_dir)
+        assert numpy.isclose(loaded(variables), reference)
+    assert len(os.listdir(cache_dir)) == 2
+    # further arguments are part of the key
+    tq.compile(O, variables=variables, backend=simulator, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 3
+    wfn = tq.compile(U, backend=simulator, cache_dir=cache_dir)(variables)
+    assert wfn == tq.compile(U, backend=simulator, cache_dir=cache_dir)(variables)
+    # backend specific arguments survive serialization
+    CircType = tequila.simulators.simulator_api.INSTALLED_SIMULATORS[simulator].CircType
+    circuit = CircType(abstract_circuit=U, variables=variables, some_option=42)
+    loaded = cloudpickle.loads(cloudpickle.dumps(circuit))
+    assert loaded._init_kwargs == {"some_option": 42}
+    assert loaded(variables) == wfn
+
+
+@pytest.mark.parametrize("simulator", INSTALLED_SAMPLERS)
+def test_sampling_reuses_measurement_circuits(simulator):
+    U = tq.gates.Ry(target=0, angle="a") + tq.gates.CNOT(0, 1)
+    H = tq.paulis.X(0) + tq.paulis.Y(1) * tq.paulis.X(0) + 2.0 * tq.paulis.X(0) + tq.paulis.Z(0) * tq.paulis.Z(1)
+    E = tq.compile(tq.ExpectationValue(H=H, U=U), backend=simulator, samples=1)
+    for a in [0.0, 1.0]:
+        result = E({"a": a}, samples=1000)
+        assert numpy.isclose(result, tq.simulate(tq.ExpectationValue(H=H, U=U), variables={"a": a}), atol=0.3)
+    circuit = E.get_expectationvalues()[0].U
+    # X(0) and 2.0*X(0) share the same basis
+    assert len(circuit._measurement_suffixes) == 3
+    basis = ((0, "X"),)
+    assert circuit.measurement_suffix(basis=basis, measure=False) is circuit.measurement_suffix(basis=basis,
+                                                                                                measure=False)
+
+
+@pytest.mark.parametrize("simulator", INSTALLED_SIMULATORS)
+def test_update_variables_in_place(simulator):
+    a = tq.Variable("a")
+    b = tq.Variable("b")
+    U = tq.gates.Ry(target=0, angle=a) + tq.gates.Rz(target=1, angle=-b, control=0) + tq.gates.Rx(target=1, angle=1.0)
+    U += tq.gates.ExpPauli(paulistring="X(0)Y(1)", angle=a * b)
+    compiled = tq.compile(U, backend=simulator)
+    if simulator == "qulacs":
+        # parameters are changed in the translated circuit
+        assert compiled.parameter_slots is not None
+    for values in [{a: 0.1, b: 0.2}, {a: -1.0, b: 2.0}, {a: 0.1, b: 0.2}]:
+        assert compiled(values) == tq.simulate(U, variables=values, backend=simulator)
+
+
+@pytest.mark.parametrize("simulator", INSTALLED_SIMULATORS)
+def test_hamiltonian_screening(simulator):
+    U = tq.gates.Ry(target=0, angle="a")
+    H = 1.5 + tq.paulis.Z(0) + 0.3 * tq.paulis.Z(2) + 1.e-3 * tq.paulis.X(1)
+    E = tq.ExpectationValue(H=H, U=U)
+    compiled = tq.compile(E, backend=simulator)
+    expval = compiled.get_expectationvalues()[0]
+    assert numpy.isclose(expval.truncation_error[0], 0.0)
+    assert numpy.isclose(compiled({"a": 0.3}), 1.8 + numpy.cos(0.3))
+    expval.__class__.screening_threshold = 1.e-2
+    try:
+        compiled = tq.compile(E, backend=simulator)
+    finally:
+        expval.__class__.screening_threshold = 1.e-8
+    expval = compiled.get_expectationvalues()[0]
+    assert numpy.isclose(expval.truncation_error[0], 1.e-3)
+    assert numpy.isclose(compiled({"a": 0.3}), 1.8 + numpy.cos(0.3))
+    assert numpy.isclose(tq.simulate(tq.ExpectationValue(H=2.0 * tq.paulis.I(0), U=U), {"a": 0.3}, backend=simulator), 2.0)
@@ -0,0 +1,77 @@
+import pytest, numpy
+import tequila as tq
+from tequila.optimizers.optimizer_spsa import minimize
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
+@pytest.mark.parametrize('method', tq.optimizers.optimizer_spsa.OptimizerSPSA.available_methods())
+def test_execution(simulator, method):
+    U = tq.gates.Rz(angle="a", target=0) \
+        + tq.gates.X(target=2) \
+        + tq.gates.Ry(angle="b", target=1, control=2) \
+        + tq.gates.Trotterized(angles=["c", "d"],
+                               generators=[-0.25 * tq.paulis.Z(1), tq.paulis.X(0) + tq.paulis.Y(1)], steps=2) \
+        + tq.gates.ExpPauli(angle="a", paulistring="X(0)Y(1)Z(2)")
+    H = 1.0 * tq.paulis.X(0) + 2.0 * tq.paulis.Y(1) + 3.0 * tq.paulis.Z(2)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = minimize(objective=O, method=method, maxiter=2, backend=simulator)
+    assert len(result.history.energies) == 2
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random", samples=1)])
+@pytest.mark.parametrize('method', tq.optimizers.optimizer_spsa.OptimizerSPSA.available_methods())
+def test_execution_shot(simulator, method):
+    U = tq.gates.Rz(angle="a", target=0) + tq.gates.Ry(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    H = 1.0 * tq.paulis.X(0) + 2.0 * tq.paulis.Z(1)
+    O = tq.ExpectationValue(U=U, H=H)
+    result = minimize(objective=O, method=method, maxiter=2, backend=simulator, samples=10, resamplings=2)
+    assert len(result.history.energies) == 2
+    # sampled energies are bounded by the sum of the absolute coefficients
+    assert numpy.isfinite(result.energy) and abs(result.energy) <= 3.0
+
+
+@pytest.mark.parametrize("simulator", [tq.simulators.simulator_api.pick_backend("random")])
+@pytest.mark.parametrize('method', tq.optimizers.optimizer_spsa.OptimizerSPSA.available_methods())
+@pytest.mark.parametrize('lr', [None, 0.5])
+def test_method_convergence(simulator, method, lr):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    H = tq.paulis.Z(0) + tq.paulis.Z(1)
+    O = tq.ExpectationValue(U=U, H=H)
+    angles = {'a': numpy.pi / 3, 'b': -numpy.pi / 4}
+    result = tq.minimize(objective=O, method=method, initial_values=angles, lr=lr, maxiter=200, backend=simulator,
+                         silent=True)
+    assert (numpy.isclose(result.energy, -2.0, atol=3.e-2))
+
+
+def test_parallel_execution():
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.Z(1))
+    result = minimize(objective=O, maxiter=3, n_workers=2, silent=True)
+    assert numpy.isclose(result.energy, tq.simulate(O, variables=result.angles))
+
+
+@pytest.mark.parametrize('method', tq.optimizers.optimizer_spsa.OptimizerSPSA.available_methods())
+def test_checkpoint_resume(method, tmpdir):
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.Z(1))
+    initial_values = {"a": 0.3, "b": 1.2}
+    filename = str(tmpdir.join("checkpoint.npz"))
+    numpy.random.seed(42)
+    reference = minimize(objective=O, method=method, maxiter=8, initial_values=initial_values, stability=1.0,
+                         silent=True)
+    numpy.random.seed(42)
+    minimize(objective=O, method=method, maxiter=4, initial_values=initial_values, stability=1.0, silent=True,
+             checkpoint=filename, checkpoint_every=4)
+    # the random state is restored from the checkpoint
+    resumed = minimize(objective=O, method=method, maxiter=8, resume_from=filename, stability=1.0, silent=True)
+    assert numpy.allclose(resumed.history.energies, reference.history.energies)
+    assert numpy.isclose(resumed.energy, reference.energy)
+
+
+def test_blocking():
+    U = tq.gates.Ry(angle="a", target=0) + tq.gates.Ry(angle="b", target=1) + tq.gates.CNOT(0, 1)
+    O = tq.ExpectationValue(U=U, H=tq.paulis.Z(0) + tq.paulis.Z(1))
+    result = minimize(objective=O, method="2-spsa", maxiter=50, initial_values={"a": 1.0, "b": -0.8}, silent=True)
+    # blocked steps keep the current point, the energy never increases without sampling
+    assert all(numpy.diff(result.history.energies) <= 1.e-12)
+    assert result.energy <= result.history.energies[0]